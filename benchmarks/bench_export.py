@@ -0,0 +1,132 @@
+"""Benchmark the headless export against rendering the schedule for the
+interface.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_export
+
+The tasks are generated in memory, so neither path runs Taskwarrior. The
+export writes to /dev/null; its peak memory should stay flat as the task
+count grows, while rendering every row grows with the schedule."""
+
+import curses
+import os
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Tuple
+
+from taskschedule.config_parser import ConfigParser
+from taskschedule.export import WRITERS, export
+from taskschedule.schedule import Schedule
+from taskschedule.screen import Screen
+from taskschedule.task_record import TaskRecord
+
+DAYS = 30
+TASK_COUNTS = [10000, 100000]
+
+
+class HeadlessScreen(Screen):
+    """A screen which renders rows without a terminal."""
+
+    def __getattr__(self, name: str):
+        if name.startswith("COLOR_"):
+            return 0
+        raise AttributeError(name)
+
+    def get_maxyx(self) -> Tuple[int, int]:
+        return 40, 120
+
+
+def make_schedule(count: int) -> Schedule:
+    start = datetime(2019, 12, 1)
+    end = start + timedelta(days=DAYS)
+    schedule = Schedule(backend=None, scheduled_after=start, scheduled_before=end)
+    records = [
+        TaskRecord(
+            id=i,
+            uuid=None,
+            scheduled=start.timestamp() + random.randrange(DAYS * 86400),
+            estimate="PT30M",
+            end=None,
+            start=None,
+            status="pending",
+            project="project",
+            description=f"task {i}",
+        )
+        for i in range(count)
+    ]
+    schedule.__dict__["tasks"] = records
+    schedule.__dict__["records"] = records
+    return schedule
+
+
+def make_screen(schedule: Schedule) -> Screen:
+    screen = HeadlessScreen.__new__(HeadlessScreen)
+    screen.config = ConfigParser().config()
+    screen.schedule = schedule
+    screen.scheduled_after = schedule.scheduled_after
+    screen.scheduled_before = schedule.scheduled_before
+    screen.hide_projects = False
+    screen.hide_empty = True
+    screen.scroll_level = 0
+    screen.current_task = None
+    screen.pad = None
+    screen.pad_size = (1, 1)
+    return screen
+
+
+def render_all_rows(screen: Screen):
+    """Render every row of the schedule, as drawing the whole schedule did
+    before the interface rendered only the visible rows."""
+    screen.refresh_buffer()
+    for line, row in enumerate(screen.rows):
+        screen.prerender_row(row, line + 1)
+
+
+def measure(run: Callable[[], None]) -> Tuple[float, float]:
+    """Return the time taken by a function in seconds and its peak memory
+    allocation in MiB. The memory is traced in a second run, since tracing
+    slows the function down."""
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    # The interface resizes its pad, which needs no terminal when stubbed
+    curses.newpad = lambda *size: None
+
+    print(f"{'tasks':>8} {'path':<16} {'total (ms)':>12} {'peak (MiB)':>12}")
+    with open(os.devnull, "w") as devnull:
+        for count in TASK_COUNTS:
+            schedule = make_schedule(count)
+            # Build the indexes up front, so both paths are measured on a
+            # loaded schedule
+            schedule.start_time_index
+            schedule.conflict_index
+            schedule.column_layout
+
+            paths = {
+                f"export {format}": lambda format=format: export(
+                    schedule.iter_records(), format, devnull
+                )
+                for format in WRITERS
+            }
+            paths["first frame"] = make_screen(schedule).refresh_buffer
+            paths["all rows"] = lambda: render_all_rows(make_screen(schedule))
+
+            for name, run in paths.items():
+                elapsed, peak = measure(run)
+                print(f"{count:>8} {name:<16} {elapsed * 1000:>12.1f} {peak:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark decoding task rows with and without pydantic validation.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_row_decoding
+
+Both decoders are fed the JSON data of a synthetic taskchampion database, as
+PydanticJSONType would receive it."""
+
+import json
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from benchmarks.taskchampion import create_database
+from taskschedule.tasklib3.sqlpydantic import trusted_decoder
+from taskschedule.tasklib3.task import TaskData
+
+ROWS = 20000
+
+
+def rows_per_second(decode, rows) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        decode(row)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as data_location:
+        path = create_database(Path(data_location), ROWS)
+        with sqlite3.connect(path) as connection:
+            rows = [
+                json.loads(data)
+                for data, in connection.execute("SELECT data FROM tasks")
+            ]
+        connection.close()
+
+    decoders = {
+        "validated": TypeAdapter(TaskData).validate_python,
+        "trusted": trusted_decoder(TaskData),
+    }
+    for name, decode in decoders.items():
+        print(f"{name:>10}: {rows_per_second(decode, rows):>10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
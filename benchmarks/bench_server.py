@@ -0,0 +1,146 @@
+"""Load test the schedule API of `taskschedule serve`.
+
+Run from the repository root, with uvicorn installed:
+
+    python -m benchmarks.bench_server
+
+The server is started in-process on a free local port with generated tasks,
+so Taskwarrior is not needed. Several client threads then poll each
+endpoint over keep-alive connections, once fetching the full response and
+once revalidating with If-None-Match, and the throughput and latency
+percentiles are reported."""
+
+import http.client
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from taskschedule.schedule import Schedule
+from taskschedule.server import ScheduleService, create_app
+from taskschedule.task_record import TaskRecord
+
+TASKS = 2000
+DAYS = 30
+CLIENTS = 8
+REQUESTS_PER_CLIENT = 100
+
+ENDPOINTS = ["/tasks/next", "/conflicts", "/schedule?from=today&to=tomorrow"]
+
+
+def make_schedule(count: int) -> Schedule:
+    start = datetime.combine(datetime.now().date(), datetime.min.time())
+    end = start + timedelta(days=DAYS)
+    schedule = Schedule(backend=None, scheduled_after=start, scheduled_before=end)
+    schedule.use_records(
+        [
+            TaskRecord(
+                id=i,
+                uuid=f"uuid-{i}",
+                scheduled=start.timestamp() + random.randrange(DAYS * 86400),
+                estimate="PT30M",
+                end=None,
+                start=None,
+                status="pending",
+                project="project",
+                description=f"task {i}",
+            )
+            for i in range(count)
+        ]
+    )
+    return schedule
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(service: ScheduleService, port: int):
+    import uvicorn
+
+    config = uvicorn.Config(
+        create_app(service), host="127.0.0.1", port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+def poll(port: int, path: str, etag: Optional[str], latencies: List[float]):
+    """Request a path repeatedly over one connection, recording the latency
+    of every request."""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"If-None-Match": etag} if etag else {}
+    for _ in range(REQUESTS_PER_CLIENT):
+        start = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def load_test(port: int, path: str, etag: Optional[str]) -> Tuple[float, float, float]:
+    """Return the throughput in requests per second, and the median and 99th
+    percentile latencies in milliseconds."""
+    latencies: List[float] = []
+    clients = [
+        threading.Thread(target=poll, args=(port, path, etag, latencies))
+        for _ in range(CLIENTS)
+    ]
+
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return len(latencies) / elapsed, percentiles[49] * 1000, percentiles[98] * 1000
+
+
+def main():
+    try:
+        import uvicorn  # noqa: F401
+    except ImportError:
+        sys.exit("This benchmark needs uvicorn: pip install uvicorn")
+
+    service = ScheduleService(make_schedule(TASKS))
+    port = get_free_port()
+    server, thread = start_server(service, port)
+
+    etags: Dict[str, str] = {}
+    for path in ENDPOINTS:
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        etags[path] = response.getheader("ETag")
+        connection.close()
+
+    print(f"{TASKS} tasks, {CLIENTS} clients, {REQUESTS_PER_CLIENT} requests each")
+    print(f"{'endpoint':<36} {'mode':<6} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    try:
+        for path in ENDPOINTS:
+            for mode, etag in (("full", None), ("304", etags[path])):
+                throughput, p50, p99 = load_test(port, path, etag)
+                print(
+                    f"{path:<36} {mode:<6} {throughput:>8.0f} {p50:>9.2f} {p99:>9.2f}"
+                )
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
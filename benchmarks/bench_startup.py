@@ -0,0 +1,69 @@
+"""Benchmark the import time of the taskschedule entry points against a
+startup budget.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup
+
+Each entry point is imported in a fresh interpreter with `-X importtime`. The
+median of several runs is compared with its budget, and the modules that
+took the longest to import are listed. The exit status is 1 if an entry
+point is over budget. For the phases after the imports, run the report with
+`taskschedule --refresh -1 --profile-startup`."""
+
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+RUNS = 5
+SLOWEST = 8
+
+# Milliseconds on a warm disk cache; sqlmodel alone takes most of the tasklib3
+# budget
+BUDGETS: Dict[str, float] = {
+    "taskschedule.main": 150,
+    "taskschedule.tasklib3.backends": 750,
+}
+
+
+def import_times(module: str) -> List[Tuple[str, int]]:
+    """Import a module in a fresh interpreter. Return the cumulative import
+    time of every module it loaded, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times.append((name.strip(), int(cumulative)))
+
+    return times
+
+
+def main():
+    over_budget = False
+    for module, budget in BUDGETS.items():
+        runs = [dict(import_times(module)) for _ in range(RUNS)]
+        total = statistics.median(run[module] for run in runs) / 1000
+
+        status = "ok" if total <= budget else "OVER BUDGET"
+        print(f"{module}: {total:.0f} ms (budget {budget:.0f} ms) {status}")
+        over_budget = over_budget or total > budget
+
+        slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+        for name, duration in slowest[1 : SLOWEST + 1]:
+            print(f"    {name:<40}{duration / 1000:>8.1f} ms")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
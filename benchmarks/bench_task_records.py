@@ -0,0 +1,81 @@
+"""Compare the memory and attribute access cost of tasks and task records.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_task_records"""
+
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from taskschedule.scheduled_task import ScheduledTask
+from taskschedule.task_record import TaskRecord
+
+TASKS = 100000
+FIELDS = ["id", "project", "description", "tb_estimate", "tb_real"]
+
+
+def export_date(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def make_tasks(count: int):
+    """Build tasks the way tasklib does from `task export` output."""
+    start = datetime(2019, 12, 1)
+    tasks = []
+    for i in range(count):
+        task = ScheduledTask.__new__(ScheduledTask)
+        task.backend = None
+        task._load_data(
+            {
+                "id": i + 1,
+                "uuid": f"00000000-0000-0000-0000-{i:012d}",
+                "description": f"Synthetic task {i}",
+                "status": "pending",
+                "project": "work",
+                "scheduled": export_date(start + timedelta(minutes=i)),
+                "estimate": "PT30M",
+                "entry": export_date(start),
+                "modified": export_date(start),
+            }
+        )
+        task.glyph = "○"
+        tasks.append(task)
+    return tasks
+
+
+def measure(build):
+    tracemalloc.start()
+    objects = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, size
+
+
+def time_access(objects, get) -> float:
+    start = time.perf_counter()
+    for obj in objects:
+        for field in FIELDS:
+            get(obj, field)
+    return time.perf_counter() - start
+
+
+def main():
+    tasks, task_size = measure(lambda: make_tasks(TASKS))
+
+    # tasklib caches missing fields in a task's data on first access, so
+    # read them once before measuring the records themselves.
+    [TaskRecord.from_task(task) for task in tasks]
+    records, record_size = measure(lambda: [TaskRecord.from_task(t) for t in tasks])
+
+    print(f"{TASKS} tasks: {task_size / 2**20:8.1f} MiB")
+    print(f"{TASKS} records: {record_size / 2**20:6.1f} MiB")
+
+    task_time = time_access(tasks, lambda task, field: task[field])
+    record_time = time_access(records, getattr)
+    print(f"task[field]: {task_time * 1000:10.1f} ms")
+    print(f"record.field: {record_time * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
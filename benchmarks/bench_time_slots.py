@@ -0,0 +1,53 @@
+"""Benchmark Schedule.get_time_slots for a growing number of tasks.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_time_slots
+
+The time per task should stay roughly constant as the task count grows,
+i.e. building the time slots scales linearly in the number of tasks."""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from taskschedule.schedule import Schedule
+from taskschedule.task_record import TaskRecord
+
+DAYS = 30
+TASK_COUNTS = [1000, 2000, 4000, 8000, 16000]
+
+
+def make_schedule(count: int) -> Schedule:
+    start = datetime(2019, 12, 1)
+    end = start + timedelta(days=DAYS)
+    schedule = Schedule(backend=None, scheduled_after=start, scheduled_before=end)
+    schedule.__dict__["records"] = [
+        TaskRecord(
+            id=i,
+            uuid=None,
+            scheduled=start.timestamp() + random.randrange(DAYS * 86400),
+            estimate=None,
+            end=None,
+            start=None,
+            status="pending",
+            project=None,
+            description=f"task {i}",
+        )
+        for i in range(count)
+    ]
+    return schedule
+
+
+def main():
+    print(f"{'tasks':>8} {'total (ms)':>12} {'per task (us)':>14}")
+    for count in TASK_COUNTS:
+        schedule = make_schedule(count)
+        start = time.perf_counter()
+        schedule.get_time_slots()
+        elapsed = time.perf_counter() - start
+        print(f"{count:>8} {elapsed * 1000:>12.2f} {elapsed / count * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
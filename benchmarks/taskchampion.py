@@ -0,0 +1,44 @@
+"""Helpers to create synthetic Taskwarrior 3 (taskchampion) databases."""
+
+import json
+import random
+import sqlite3
+import time
+from pathlib import Path
+from uuid import uuid4
+
+STATUSES = ["pending"] * 6 + ["completed"] * 3 + ["deleted"]
+
+
+def make_task_data(index: int, now: int) -> dict:
+    scheduled = now + random.randrange(-30, 30) * 86400 + random.randrange(86400)
+    data = {
+        "description": f"Synthetic task {index}",
+        "entry": str(scheduled - 86400),
+        "modified": str(now - random.randrange(86400 * 365)),
+        "scheduled": str(scheduled),
+        "status": random.choice(STATUSES),
+        "project": random.choice(["work", "home", "errands"]),
+        "tags": "one,two",
+        "estimate": "PT30M",
+        "tag_one": "",
+        "tag_two": "",
+    }
+    if data["status"] == "completed":
+        data["end"] = str(scheduled + 1800)
+    return data
+
+
+def create_database(data_location: Path, count: int) -> Path:
+    """Create a taskchampion database with `count` tasks in the given data
+    location and return its path."""
+    path = data_location / "taskchampion.sqlite3"
+    now = int(time.time())
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE tasks (uuid STRING PRIMARY KEY, data STRING)")
+        connection.executemany(
+            "INSERT INTO tasks (uuid, data) VALUES (?, ?)",
+            ((str(uuid4()), json.dumps(make_task_data(i, now))) for i in range(count)),
+        )
+    connection.close()
+    return path
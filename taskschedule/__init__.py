@@ -0,0 +1,4 @@
+import time
+
+# When the package started importing, for --profile-startup
+IMPORT_STARTED = time.perf_counter()
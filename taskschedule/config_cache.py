@@ -0,0 +1,134 @@
+"""This module provides a ConfigCache, which keeps the output of `task show` on
+disk. The cached config is reused as long as the taskrc, the files it
+includes and the `task` binary are unchanged, so reading the config does not
+need a `task` process."""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+INCLUDE_REGEX = re.compile(r"^\s*include\s+(?P<path>.+?)\s*$")
+
+Stamp = Tuple[str, Optional[int], Optional[int]]
+
+
+def get_stamp(path: str) -> Stamp:
+    """Return the path, modification time and size of a file. The time and
+    size are None if the file does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def find_includes(taskrc_location: str) -> List[str]:
+    """Return the files included by a taskrc, recursively. Relative paths are
+    resolved against the directory of the including file."""
+    includes: List[str] = []
+    seen: Set[str] = {os.path.realpath(taskrc_location)}
+    pending = [os.path.realpath(taskrc_location)]
+    while pending:
+        location = pending.pop()
+        try:
+            with open(location) as file:
+                lines = file.readlines()
+        except OSError:
+            continue
+
+        for line in lines:
+            match = INCLUDE_REGEX.match(line)
+            if not match:
+                continue
+
+            path = os.path.expanduser(match.group("path"))
+            path = os.path.realpath(os.path.join(os.path.dirname(location), path))
+            if path not in seen:
+                seen.add(path)
+                includes.append(path)
+                pending.append(path)
+
+    return includes
+
+
+class ConfigCache:
+    """Cache the Taskwarrior config of each taskrc in a directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_stamps(self, taskrc_location: str, task_command: str) -> List[Stamp]:
+        """Return the stamps the cached config of a taskrc depends on: the
+        taskrc, its includes and the `task` binary, which stands in for the
+        Taskwarrior version."""
+        taskrc = os.path.realpath(taskrc_location)
+        stamps = [get_stamp(taskrc)]
+        stamps.extend(get_stamp(path) for path in find_includes(taskrc))
+
+        binary = shutil.which(task_command.split()[0])
+        if binary is not None:
+            stamps.append(get_stamp(os.path.realpath(binary)))
+        else:
+            stamps.append((task_command, None, None))
+
+        return stamps
+
+    def get_cache_file(self, taskrc_location: str) -> str:
+        """Return the cache file of a taskrc."""
+        taskrc = os.path.realpath(taskrc_location)
+        digest = hashlib.sha1(taskrc.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"config-{digest}.json")
+
+    def read(
+        self, taskrc_location: str, stamps: List[Stamp]
+    ) -> Optional[Dict[str, str]]:
+        """Return the cached config of a taskrc, or None if there is no
+        cached config or it was cached with different stamps."""
+        try:
+            with open(self.get_cache_file(taskrc_location)) as file:
+                cached = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get("stamps") != [list(stamp) for stamp in stamps]:
+            return None
+
+        return cached.get("config")
+
+    def write(
+        self, taskrc_location: str, stamps: List[Stamp], config: Mapping[str, str]
+    ):
+        """Store the config of a taskrc. The file is replaced atomically, so
+        concurrent instances never read a partial cache."""
+        os.makedirs(self.directory, exist_ok=True)
+        cached = {"stamps": stamps, "config": dict(config)}
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(cached, file)
+            os.replace(temp_path, self.get_cache_file(taskrc_location))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def load(
+        self,
+        taskrc_location: str,
+        fetch: Callable[[], Mapping[str, str]],
+        task_command: str = "task",
+    ) -> Dict[str, str]:
+        """Return the config of a taskrc, from the cache if it is up to date.
+        Otherwise fetch the config and cache it. The stamps are taken before
+        fetching, so a taskrc edited meanwhile is fetched again next time."""
+        stamps = self.get_stamps(taskrc_location, task_command)
+        config = self.read(taskrc_location, stamps)
+        if config is None:
+            config = {str(key): str(value) for key, value in fetch().items()}
+            self.write(taskrc_location, stamps, config)
+
+        return config
@@ -6,7 +6,10 @@ DEFAULTS: dict = {
         "underestimated_glyph": "◆",
         "progress_pending_glyph": "▰",
         "progress_done_glyph": "▰",
-    }
+    },
+    "schedule": {
+        "conflict_glyph": "◎",
+    },
 }
 
 
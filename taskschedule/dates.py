@@ -0,0 +1,171 @@
+"""This module evaluates the subset of Taskwarrior's date expressions used by
+taskschedule, such as 'today+9hr' or 'yesterday-7days', without shelling out
+to `task calc`."""
+
+import calendar
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+from isodate import ISO8601Error, parse_duration
+
+ISO_DATE_REGEX = re.compile(
+    r"^(?P<date>\d{4}-\d{2}-\d{2})(?:T(?P<time>\d{2}:\d{2}(?::\d{2})?))?"
+)
+NAMED_DATE_REGEX = re.compile(r"^(?P<name>[a-z]+)")
+OFFSET_REGEX = re.compile(r"^(?P<sign>[+-])(?P<duration>[^+-]+)")
+DURATION_REGEX = re.compile(r"^(?P<amount>\d+)?(?P<unit>[a-z]+)$")
+
+END_OF_DAY = time(23, 59, 59)
+
+# Week-relative dates such as 'sow' and 'eow' are left to `task calc`, as they
+# depend on the user's rc.weekstart
+NAMED_DATES: Dict[str, Callable[[datetime], datetime]] = {
+    "now": lambda now: now,
+    "today": lambda now: datetime.combine(now.date(), time()),
+    "sod": lambda now: datetime.combine(now.date(), time()),
+    "eod": lambda now: datetime.combine(now.date(), END_OF_DAY),
+    "yesterday": lambda now: datetime.combine(now.date() - timedelta(days=1), time()),
+    "tomorrow": lambda now: datetime.combine(now.date() + timedelta(days=1), time()),
+    "som": lambda now: datetime.combine(now.date().replace(day=1), time()),
+    "eom": lambda now: datetime.combine(
+        now.date().replace(day=calendar.monthrange(now.year, now.month)[1]),
+        END_OF_DAY,
+    ),
+    "soy": lambda now: datetime(now.year, 1, 1),
+    "eoy": lambda now: datetime.combine(date(now.year, 12, 31), END_OF_DAY),
+}
+
+SECONDS_PER_UNIT: Dict[str, int] = {
+    "s": 1,
+    "sec": 1,
+    "secs": 1,
+    "second": 1,
+    "seconds": 1,
+    "min": 60,
+    "mins": 60,
+    "minute": 60,
+    "minutes": 60,
+    "h": 3600,
+    "hr": 3600,
+    "hrs": 3600,
+    "hour": 3600,
+    "hours": 3600,
+    "d": 86400,
+    "day": 86400,
+    "days": 86400,
+    "w": 604800,
+    "wk": 604800,
+    "wks": 604800,
+    "week": 604800,
+    "weeks": 604800,
+}
+
+MONTHS_PER_UNIT: Dict[str, int] = {
+    "mo": 1,
+    "mos": 1,
+    "month": 1,
+    "months": 1,
+    "y": 12,
+    "yr": 12,
+    "yrs": 12,
+    "year": 12,
+    "years": 12,
+}
+
+
+class DateExpressionError(ValueError):
+    """Raised when a date expression cannot be evaluated in-process."""
+
+    # pylint: disable=unnecessary-pass
+    pass
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Add a number of months to a datetime, clamping the day to the length
+    of the resulting month."""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def apply_duration(value: datetime, duration: str, sign: int) -> datetime:
+    """Offset a datetime by a Taskwarrior ('9hr', '7days') or ISO 8601
+    ('PT1H') duration."""
+    if duration.startswith("P"):
+        try:
+            return value + sign * parse_duration(duration)
+        except ISO8601Error as err:
+            raise DateExpressionError(duration) from err
+
+    match = DURATION_REGEX.match(duration)
+    if not match:
+        raise DateExpressionError(duration)
+
+    amount = int(match.group("amount") or 1)
+    unit = match.group("unit")
+    if unit in SECONDS_PER_UNIT:
+        return value + timedelta(seconds=sign * amount * SECONDS_PER_UNIT[unit])
+    if unit in MONTHS_PER_UNIT:
+        return add_months(value, sign * amount * MONTHS_PER_UNIT[unit])
+
+    raise DateExpressionError(duration)
+
+
+def parse_base(expression: str, now: datetime) -> Tuple[datetime, str]:
+    """Parse the named or ISO date an expression starts with. Return the
+    resulting datetime and the rest of the expression."""
+    match = ISO_DATE_REGEX.match(expression)
+    if match:
+        value = datetime.fromisoformat(match.group("date"))
+        if match.group("time"):
+            value = datetime.combine(
+                value.date(), time.fromisoformat(match.group("time"))
+            )
+        return value, expression[match.end() :]
+
+    match = NAMED_DATE_REGEX.match(expression)
+    if match and match.group("name") in NAMED_DATES:
+        return NAMED_DATES[match.group("name")](now), expression[match.end() :]
+
+    raise DateExpressionError(expression)
+
+
+def evaluate(expression: str, now: datetime) -> datetime:
+    """Evaluate a date expression relative to a naive local `now`. The result
+    is a timezone-aware datetime in the local timezone.
+
+    >>> evaluate("today+9hr", datetime(2019, 12, 7, 15, 30)).strftime("%F %R")
+    '2019-12-07 09:00'
+    """
+    value, rest = parse_base(expression.strip(), now)
+    while rest:
+        match = OFFSET_REGEX.match(rest)
+        if not match:
+            raise DateExpressionError(expression)
+
+        sign = 1 if match.group("sign") == "+" else -1
+        value = apply_duration(value, match.group("duration"), sign)
+        rest = rest[match.end() :]
+
+    return value.astimezone()
+
+
+@lru_cache(maxsize=256)
+def _evaluate_for_day(expression: str, today: date) -> datetime:
+    return evaluate(expression, datetime.combine(today, time()))
+
+
+def calculate(expression: str) -> Optional[datetime]:
+    """Evaluate a date expression in-process. Expressions that do not depend
+    on the time of day are cached per day. Return None if the expression is
+    not supported."""
+    try:
+        if "now" in expression:
+            return evaluate(expression, datetime.now())
+        return _evaluate_for_day(expression, date.today())
+    except (DateExpressionError, ValueError):
+        return None
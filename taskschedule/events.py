@@ -0,0 +1,119 @@
+"""This module provides an EventBus, which compares consecutive snapshots of
+the schedule and runs hooks for the changes between them. The events of a
+tick are batched, so each hook runs at most once per tick and receives a JSON
+array of events on stdin."""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from taskschedule.export import to_row
+from taskschedule.hooks import HookRunner, get_default_runner
+from taskschedule.task_record import TaskRecord
+
+# The task entered the schedule's window
+ON_ENTER = "on-enter"
+# The task's scheduled start has come
+ON_DUE = "on-due"
+# The task's scheduled end, from its estimate, has passed before it was
+# completed
+ON_OVERDUE = "on-overdue"
+ON_START = "on-start"
+ON_STOP = "on-stop"
+ON_COMPLETE = "on-complete"
+
+EVENT_TYPES = (ON_ENTER, ON_DUE, ON_OVERDUE, ON_START, ON_STOP, ON_COMPLETE)
+
+
+class TaskSnapshot(NamedTuple):
+    """The state of a task at a tick, which events are derived from."""
+
+    status: str
+    active: bool
+    due: bool
+    overdue: bool
+
+
+class Event(NamedTuple):
+    type: str
+    task: TaskRecord
+
+    def as_dict(self) -> Dict[str, object]:
+        data = to_row(self.task)
+        data["event"] = self.type
+        return data
+
+
+def take_snapshot(task: TaskRecord, now: datetime) -> TaskSnapshot:
+    """Return the state of a task at the given time."""
+    now_ts = now.timestamp()
+    due = task.scheduled is not None and task.scheduled <= now_ts
+    overdue = (
+        not task.completed
+        and task.scheduled_end is not None
+        and task.scheduled_end <= now_ts
+    )
+    return TaskSnapshot(task.status, task.active, due, overdue)
+
+
+def diff_snapshots(
+    previous: Dict[str, TaskSnapshot],
+    current: Dict[str, TaskSnapshot],
+    tasks: Dict[str, TaskRecord],
+) -> List[Event]:
+    """Return the events between two snapshots of the schedule, keyed by
+    uuid."""
+    events: List[Event] = []
+    for uuid, state in current.items():
+        task = tasks[uuid]
+        before = previous.get(uuid)
+        if before is None:
+            events.append(Event(ON_ENTER, task))
+            continue
+
+        if state.due and not before.due:
+            events.append(Event(ON_DUE, task))
+        if state.overdue and not before.overdue:
+            events.append(Event(ON_OVERDUE, task))
+        if state.active and not before.active:
+            events.append(Event(ON_START, task))
+        if state.status == "completed" and before.status != "completed":
+            events.append(Event(ON_COMPLETE, task))
+        elif before.active and not state.active:
+            events.append(Event(ON_STOP, task))
+
+    return events
+
+
+class EventBus:
+    """Emit events for the changes to the schedule between ticks. The first
+    tick only records the schedule, so starting taskschedule does not emit an
+    event for every task."""
+
+    def __init__(self, runner: Optional[HookRunner] = None):
+        self.runner = runner or get_default_runner()
+        self.snapshots: Optional[Dict[str, TaskSnapshot]] = None
+
+    def tick(self, tasks: Iterable[TaskRecord], now: Optional[datetime] = None):
+        """Compare the schedule with the previous tick and deliver the events
+        between them. Return the events."""
+        now = now or datetime.now()
+        by_uuid = {task.uuid: task for task in tasks if task.uuid is not None}
+        snapshots = {uuid: take_snapshot(task, now) for uuid, task in by_uuid.items()}
+
+        events: List[Event] = []
+        if self.snapshots is not None:
+            events = diff_snapshots(self.snapshots, snapshots, by_uuid)
+        self.snapshots = snapshots
+
+        self.deliver(events)
+        return events
+
+    def deliver(self, events: List[Event]):
+        """Start the hooks of each event type once, with the batch of events
+        of that type."""
+        batches: Dict[str, List[Dict[str, object]]] = {}
+        for event in events:
+            batches.setdefault(event.type, []).append(event.as_dict())
+
+        for event_type, batch in batches.items():
+            self.runner.submit(event_type, batch, skip_running=False)
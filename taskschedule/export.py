@@ -0,0 +1,142 @@
+"""This module exports the schedule as JSON, CSV or iCalendar without curses.
+The tasks are written as they are iterated, so the output is never built in
+memory."""
+
+import csv
+import json
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
+
+from taskschedule.task_record import TaskRecord
+
+FIELDS = (
+    "id",
+    "uuid",
+    "scheduled",
+    "scheduled_end",
+    "estimate",
+    "status",
+    "project",
+    "description",
+)
+
+# Lines of an iCalendar file are folded at 75 octets
+ICS_LINE_LENGTH = 75
+
+
+def format_epoch(value: Optional[float]) -> Optional[str]:
+    """Format a POSIX timestamp as a local ISO 8601 datetime, or None."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value).astimezone().isoformat()
+
+
+def to_row(task: TaskRecord) -> Dict[str, object]:
+    """Return the exported fields of a task."""
+    return {
+        "id": task.id,
+        "uuid": task.uuid,
+        "scheduled": format_epoch(task.scheduled),
+        "scheduled_end": format_epoch(task.scheduled_end),
+        "estimate": task.estimate,
+        "status": task.status,
+        "project": task.project,
+        "description": task.description,
+    }
+
+
+def write_json(tasks: Iterable[TaskRecord], out: TextIO):
+    """Write the tasks as a JSON array, one task per line."""
+    out.write("[")
+    separator = "\n"
+    for task in tasks:
+        out.write(separator)
+        out.write(json.dumps(to_row(task)))
+        separator = ",\n"
+    out.write("\n]\n")
+
+
+def write_csv(tasks: Iterable[TaskRecord], out: TextIO):
+    """Write the tasks as CSV, with a header row."""
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+    for task in tasks:
+        writer.writerow(to_row(task))
+
+
+def format_ics_time(value: float) -> str:
+    """Format a POSIX timestamp as an iCalendar UTC datetime."""
+    return datetime.fromtimestamp(value, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def escape_ics_text(text: str) -> str:
+    """Escape a value of an iCalendar text property."""
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_ics_line(line: str) -> str:
+    """Fold an iCalendar content line into lines of at most 75 octets,
+    without splitting a UTF-8 character."""
+    if len(line.encode("utf-8")) <= ICS_LINE_LENGTH:
+        return line
+
+    lines: List[str] = []
+    current = ""
+    length = 0
+    for char in line:
+        size = len(char.encode("utf-8"))
+        # Continuation lines start with a space, which counts towards them
+        if length + size > ICS_LINE_LENGTH:
+            lines.append(current)
+            current = " "
+            length = 1
+        current += char
+        length += size
+    lines.append(current)
+    return "\r\n".join(lines)
+
+
+def write_ics(tasks: Iterable[TaskRecord], out: TextIO):
+    """Write the tasks as iCalendar events. Tasks without a scheduled time
+    are skipped, and tasks without an estimate are events of no duration."""
+    now = format_ics_time(datetime.now().timestamp())
+
+    def write_line(line: str):
+        out.write(fold_ics_line(line))
+        out.write("\r\n")
+
+    write_line("BEGIN:VCALENDAR")
+    write_line("VERSION:2.0")
+    write_line("PRODID:-//taskschedule//taskschedule//EN")
+    for task in tasks:
+        if task.scheduled is None:
+            continue
+
+        write_line("BEGIN:VEVENT")
+        write_line(f"UID:{task.uuid}")
+        write_line(f"DTSTAMP:{now}")
+        write_line(f"DTSTART:{format_ics_time(task.scheduled)}")
+        if task.scheduled_end is not None:
+            write_line(f"DTEND:{format_ics_time(task.scheduled_end)}")
+        write_line(f"SUMMARY:{escape_ics_text(task.description)}")
+        if task.project:
+            write_line(f"CATEGORIES:{escape_ics_text(task.project)}")
+        write_line("END:VEVENT")
+    write_line("END:VCALENDAR")
+
+
+WRITERS: Dict[str, Callable[[Iterable[TaskRecord], TextIO], None]] = {
+    "json": write_json,
+    "csv": write_csv,
+    "ics": write_ics,
+}
+
+
+def export(tasks: Iterable[TaskRecord], format: str, out: TextIO):
+    """Write the tasks to out in the given format."""
+    WRITERS[format](tasks, out)
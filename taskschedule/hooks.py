@@ -1,32 +1,236 @@
+import errno
 import json
 import os
 import subprocess
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
+# Seconds a hook may run before it is killed
+HOOK_TIMEOUT = 10.0
 
-def run_hooks(hook_type, data={"id": -1, "description": "none"}):
-    """Run hook scripts in the hooks directory.
+# Hooks running at the same time; further hooks wait for a free worker
+MAX_CONCURRENT_HOOKS = 4
+
+# Outputs of hooks kept until the main thread takes them
+MAX_KEPT_OUTPUTS = 100
 
-    :param hook_type: the hook type to run.
-                      valid values: 'on-progress'
-    :param data: the JSON data to pass as a string to stdin."""
 
+def get_hooks_directory() -> str:
     home = os.path.expanduser("~")
+    return home + "/.taskschedule/hooks"
+
+
+class HookStats:
+    """The latency and outcomes of the runs of a hook."""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_stdout = ""
+        self.last_stderr = ""
+
+    def record(self, duration: float, failed: bool = False, timed_out: bool = False):
+        """Record a finished run of the hook."""
+        self.runs += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        if failed:
+            self.failures += 1
+        if timed_out:
+            self.timeouts += 1
+
+    @property
+    def mean_time(self) -> float:
+        if not self.runs:
+            return 0.0
+        return self.total_time / self.runs
+
+
+class HookRunner:
+    """Run hook scripts on a bounded pool of worker threads, so a slow hook
+    never blocks the caller. The listing of the hooks directory is cached
+    until the directory's modification time changes.
+
+    The runs of a hook never overlap: a run submitted while the hook is
+    running waits in the hook's queue, and the worker which ran the hook
+    runs the queued ones in order.
+
+    Hooks run while curses owns the terminal, so their output is never
+    printed by the workers. It is kept in the hook's stats and in a queue,
+    which the main thread drains with take_output()."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        timeout: float = HOOK_TIMEOUT,
+        max_workers: int = MAX_CONCURRENT_HOOKS,
+    ):
+        self.directory = directory or get_hooks_directory()
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="taskschedule-hook"
+        )
+
+        self.listing: List[str] = []
+        self.listing_mtime: Optional[int] = None
+
+        self.lock = threading.Lock()
+        # The runs of each hook which have not finished, and the input and
+        # future of those which have not started, in submission order
+        self.pending: Counter = Counter()
+        self.queued: Dict[str, Deque[Tuple[bytes, Future]]] = defaultdict(deque)
+        self.stats: Dict[str, HookStats] = {}
+        self.outputs: Deque[Tuple[str, str]] = deque(maxlen=MAX_KEPT_OUTPUTS)
+
+    def list_hooks(self) -> List[str]:
+        """Return the names of the files in the hooks directory."""
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return []
+
+        if mtime != self.listing_mtime:
+            with os.scandir(self.directory) as entries:
+                names = [entry.name for entry in entries if entry.is_file()]
+            self.listing = sorted(names)
+            self.listing_mtime = mtime
+
+        return self.listing
+
+    def get_hooks(self, hook_type: str) -> List[str]:
+        """Return the names of the hooks of a type, e.g. `on-progress-notify.py`
+        for 'on-progress'."""
+        prefix = hook_type + "-"
+        return [name for name in self.list_hooks() if name.startswith(prefix)]
+
+    def get_stats(self, name: str) -> HookStats:
+        with self.lock:
+            return self.stats.setdefault(name, HookStats())
+
+    def submit(
+        self, hook_type: str, data: Any, skip_running: bool = True
+    ) -> List[Future]:
+        """Start the hooks of a type without waiting for them. A hook which
+        has not finished its previous runs is skipped, unless skip_running is
+        False, in which case it runs again once they have finished."""
+        input_data = json.dumps(data, ensure_ascii=False).encode("utf8")
+
+        futures = []
+        for name in self.get_hooks(hook_type):
+            future: Future = Future()
+            with self.lock:
+                stats = self.stats.setdefault(name, HookStats())
+                if skip_running and self.pending[name]:
+                    stats.skipped += 1
+                    continue
+                self.queued[name].append((input_data, future))
+                self.pending[name] += 1
+                start = self.pending[name] == 1
+
+            if start:
+                self.executor.submit(self.run_queued, name)
+            futures.append(future)
+
+        return futures
+
+    def run_queued(self, name: str):
+        """Run the queued runs of a hook one after another, until none is
+        left."""
+        while True:
+            with self.lock:
+                input_data, future = self.queued[name].popleft()
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    self.run_hook(name, input_data)
+                except BaseException as err:
+                    future.set_exception(err)
+                else:
+                    future.set_result(None)
+
+            with self.lock:
+                self.pending[name] -= 1
+                if not self.pending[name]:
+                    return
+
+    def execute(self, name: str, input_data: bytes) -> subprocess.CompletedProcess:
+        """Execute a hook script. A script without a shebang line is run
+        with /bin/sh, as it was when hooks were started through a shell."""
+        path = os.path.join(self.directory, name)
+        kwargs: Dict[str, Any] = dict(
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            input=input_data,
+            timeout=self.timeout,
+        )
+        try:
+            return subprocess.run([path], **kwargs)
+        except OSError as err:
+            if err.errno != errno.ENOEXEC:
+                raise
+            return subprocess.run(["/bin/sh", path], **kwargs)
+
+    def run_hook(self, name: str, input_data: bytes):
+        """Run a hook with the given data on stdin, and record its latency,
+        outcome and output."""
+        failed = False
+        timed_out = False
+        stdout = stderr = ""
+        start = time.perf_counter()
+        try:
+            result = self.execute(name, input_data)
+            failed = result.returncode != 0
+            stdout = result.stdout.decode("utf-8", errors="replace")
+            stderr = result.stderr.decode("utf-8", errors="replace")
+        except subprocess.TimeoutExpired:
+            failed = timed_out = True
+        except OSError as err:
+            failed = True
+            stderr = str(err)
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                stats = self.stats.setdefault(name, HookStats())
+                stats.record(duration, failed, timed_out)
+                stats.last_stdout = stdout
+                stats.last_stderr = stderr
+                if stdout:
+                    self.outputs.append((name, stdout))
+
+    def take_output(self) -> List[Tuple[str, str]]:
+        """Return the name and standard output of the hook runs which wrote
+        any, since the last call."""
+        with self.lock:
+            outputs = list(self.outputs)
+            self.outputs.clear()
+        return outputs
+
+    def close(self, wait: bool = True):
+        """Stop accepting hooks, and wait for the running ones to finish."""
+        self.executor.shutdown(wait=wait)
+
+
+@lru_cache(maxsize=None)
+def get_default_runner() -> HookRunner:
+    """Return the runner of the default hooks directory, shared by this
+    process."""
+    return HookRunner()
+
+
+def run_hooks(hook_type, data={"id": -1, "description": "none"}) -> List[Future]:
+    """Run hook scripts in the hooks directory, in the background.
+
+    :param hook_type: the hook type to run.
+                      valid values: 'on-progress', or one of the event types
+                      in taskschedule.events
+    :param data: the JSON data to pass as a string to stdin."""
 
-    hooks_directory = home + "/.taskschedule/hooks"
-    onlyfiles = [
-        f
-        for f in os.listdir(hooks_directory)
-        if os.path.isfile(os.path.join(hooks_directory, f))
-    ]
-
-    for filename in onlyfiles:
-        if hook_type == "on-progress" and filename.startswith("on-progress-"):
-            input_data = json.dumps(data, ensure_ascii=False).encode("utf8")
-            result = subprocess.run(
-                [home + "/.taskschedule/hooks/" + filename],
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                input=input_data,
-            )
-            print(result.stdout.decode("utf-8"))
+    return get_default_runner().submit(hook_type, data)
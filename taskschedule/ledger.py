@@ -0,0 +1,97 @@
+"""This module provides a NotificationLedger, which records when a notification
+was last sent for each task. The ledger is a small SQLite database, so lookups
+and updates are O(1) and several taskschedule instances can share it: SQLite's
+file locking makes every claim atomic, and only one instance notifies."""
+
+import os
+import sqlite3
+import tempfile
+import time
+from functools import lru_cache
+from typing import Optional
+
+DEFAULT_LEDGER_LOCATION = os.path.join(tempfile.gettempdir(), "taskschedule.sqlite3")
+
+# Seconds before a task is notified again
+DEFAULT_MIN_DELAY = 300
+
+# Seconds to wait for another instance to release the database lock
+LOCK_TIMEOUT = 5.0
+
+
+class NotificationLedger:
+    """Record the last notification time of each task."""
+
+    def __init__(
+        self,
+        location: str = DEFAULT_LEDGER_LOCATION,
+        min_delay: int = DEFAULT_MIN_DELAY,
+    ):
+        self.location = location
+        self.min_delay = min_delay
+
+        # Autocommit, every statement is its own transaction
+        self.connection = sqlite3.connect(
+            location, timeout=LOCK_TIMEOUT, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS notifications "
+            "(uuid TEXT PRIMARY KEY, notified_at REAL NOT NULL)"
+        )
+
+    def close(self):
+        """Close the ledger database."""
+        self.connection.close()
+
+    def claim(self, uuid: str, now: Optional[float] = None) -> bool:
+        """Record a notification for the given task. Return False if the
+        task was already notified within the minimum delay, in which case
+        nothing is recorded and no notification should be sent."""
+        if now is None:
+            now = time.time()
+
+        cursor = self.connection.execute(
+            "INSERT INTO notifications (uuid, notified_at) VALUES (?, ?) "
+            "ON CONFLICT (uuid) DO UPDATE SET notified_at = excluded.notified_at "
+            "WHERE notified_at <= ?",
+            (uuid, now, now - self.min_delay),
+        )
+        return cursor.rowcount > 0
+
+    def release(self, uuid: str, claimed_at: float):
+        """Undo a claim whose notification could not be sent, so the task
+        can be claimed again. A newer claim is left alone."""
+        self.connection.execute(
+            "DELETE FROM notifications WHERE uuid = ? AND notified_at = ?",
+            (uuid, claimed_at),
+        )
+
+    def notified_at(self, uuid: str) -> Optional[float]:
+        """Return when the given task was last notified, or None."""
+        row = self.connection.execute(
+            "SELECT notified_at FROM notifications WHERE uuid = ?", (uuid,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Delete the entries older than the minimum delay, which no longer
+        suppress a notification. Return the number of deleted entries.
+
+        Entries are only purged by age, as instances sharing the ledger may
+        show different date ranges, and a task which is not a candidate in
+        one instance can still be one in another."""
+        if now is None:
+            now = time.time()
+
+        cursor = self.connection.execute(
+            "DELETE FROM notifications WHERE notified_at <= ?",
+            (now - self.min_delay,),
+        )
+        return cursor.rowcount
+
+
+@lru_cache(maxsize=None)
+def get_default_ledger() -> NotificationLedger:
+    """Return the ledger at the default location, shared by this process."""
+    return NotificationLedger()
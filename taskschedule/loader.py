@@ -0,0 +1,111 @@
+"""This module provides a ScheduleLoader, which reloads the schedule on a
+worker thread. The interface keeps rendering the current tasks while the new
+ones are exported from Taskwarrior and indexed, and swaps them in once they
+are ready."""
+
+import os
+import threading
+from typing import Optional
+
+from taskschedule.schedule import Schedule
+
+# Seconds to wait for a load in progress when closing
+CLOSE_TIMEOUT = 5.0
+
+
+class ScheduleLoader:
+    """Load snapshots of a schedule on a background thread. A reload
+    requested while one is in progress runs after it, and only the latest
+    snapshot is kept.
+
+    The loader is readable through fileno() when a snapshot is ready, so the
+    main loop can wait on it along with the keyboard."""
+
+    def __init__(self, schedule: Schedule):
+        self.schedule = schedule
+        self.requested = threading.Event()
+        self.closed = False
+        # Set if close() gave up waiting for the worker, which then closes
+        # the pipe itself
+        self.orphaned = False
+
+        self.lock = threading.Lock()
+        self.snapshot: Optional[Schedule] = None
+        self.error: Optional[Exception] = None
+
+        self.read_fd, self.write_fd = os.pipe()
+        os.set_blocking(self.read_fd, False)
+
+        self.thread = threading.Thread(
+            target=self.run, name="taskschedule-loader", daemon=True
+        )
+        self.thread.start()
+
+    def fileno(self) -> int:
+        return self.read_fd
+
+    def request(self):
+        """Request a reload of the schedule, without waiting for it."""
+        self.requested.set()
+
+    def run(self):
+        try:
+            self.load_until_closed()
+        finally:
+            with self.lock:
+                if self.orphaned:
+                    self.close_pipe()
+
+    def load_until_closed(self):
+        while True:
+            self.requested.wait()
+            self.requested.clear()
+            if self.closed:
+                return
+
+            snapshot: Optional[Schedule] = None
+            error: Optional[Exception] = None
+            try:
+                snapshot = self.schedule.load_snapshot()
+            except Exception as err:
+                error = err
+
+            with self.lock:
+                self.snapshot = snapshot
+                self.error = error
+
+            os.write(self.write_fd, b"\0")
+
+    def take(self) -> Optional[Schedule]:
+        """Return the latest snapshot if one is ready, or None. An error
+        raised while loading is raised again here, on the caller's thread."""
+        try:
+            os.read(self.read_fd, 4096)
+        except BlockingIOError:
+            pass
+
+        with self.lock:
+            snapshot, self.snapshot = self.snapshot, None
+            error, self.error = self.error, None
+
+        if error is not None:
+            raise error
+
+        return snapshot
+
+    def close(self, timeout: float = CLOSE_TIMEOUT):
+        """Stop the worker thread, after the load in progress if any. If the
+        load takes longer than the timeout, the worker closes the pipe once
+        it is done, so it never writes to a closed or reused descriptor."""
+        self.closed = True
+        self.requested.set()
+        self.thread.join(timeout)
+        with self.lock:
+            if self.thread.is_alive():
+                self.orphaned = True
+                return
+        self.close_pipe()
+
+    def close_pipe(self):
+        os.close(self.read_fd)
+        os.close(self.write_fd)
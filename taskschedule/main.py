@@ -1,5 +1,10 @@
-"""Command line interface of taskschedule"""
-from typing import Union
+"""Command line interface of taskschedule
+
+Only the modules every command needs are imported here. The others are
+imported by the commands which use them, to keep startup fast."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Mapping, Optional, Tuple, Union
 
 import argparse
 import os
@@ -8,100 +13,226 @@ import sys
 import time
 from curses import KEY_RESIZE
 from curses import error as curses_error
-from curses import napms
 from datetime import datetime
 
-from tasklib import TaskWarrior
-
-from taskschedule.notifier import Notifier, SoundDoesNotExistError
+from taskschedule import IMPORT_STARTED
+from taskschedule.export import WRITERS
 from taskschedule.schedule import (
     Schedule,
     TaskDirDoesNotExistError,
     TaskrcDoesNotExistError,
     UDADoesNotExistError,
 )
-from taskschedule.screen import Screen
 from taskschedule.taskwarrior import PatchedTaskWarrior
 from taskschedule.utils import calculate_datetime
 
+if TYPE_CHECKING:
+    from taskschedule.events import EventBus
+    from taskschedule.notifier import Notifier
+    from taskschedule.screen import Screen
+    from taskschedule.snapshot import SnapshotWindow, SnapshotWriter
+
+
+class StartupProfile:
+    """Measure how long each phase of startup takes, starting with the
+    imports of the taskschedule package."""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+        self.last = IMPORT_STARTED
+
+    def mark(self, phase: str):
+        """End the current phase."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self) -> str:
+        """Return a table of the phases and their durations."""
+        lines = [
+            f"{phase:<20}{duration * 1000:>8.1f} ms" for phase, duration in self.phases
+        ]
+        total = sum(duration for _, duration in self.phases)
+        lines.append(f"{'total':<20}{total * 1000:>8.1f} ms")
+        return "\n".join(lines)
+
 
 class Main:
     notifier: Union[None, Notifier]
+    profile: Optional[StartupProfile]
+    events: Optional[EventBus]
+    publisher: Optional[SnapshotWriter]
+    screen: Screen
 
     def __init__(self, argv):
+        self.profile = None
         self.home_dir = os.path.expanduser("~")
 
         self.parse_args(argv)
         self.check_files()
-
+        self.mark("check files")
+
+        if self.viewer:
+            # A viewer shows the publisher's records, and never runs Taskwarrior
+            self.schedule = Schedule(
+                None,
+                scheduled_after=self.scheduled_after,
+                scheduled_before=self.scheduled_before,
+            )
+        else:
+            self.schedule = self.create_schedule(
+                self.scheduled_after, self.scheduled_before
+            )
+        self.backend = self.schedule.backend
+        self.mark("create backend")
+
+    def create_schedule(
+        self, scheduled_after: datetime, scheduled_before: datetime
+    ) -> Schedule:
+        """Create a schedule of the given date range, with a backend which
+        only exports the tasks scheduled in it."""
         task_command_args = ["task", "status.not:deleted"]
 
-        task_command_args.append(f"scheduled.after:{self.scheduled_after}")
-        task_command_args.append(f"scheduled.before:{self.scheduled_before}")
+        task_command_args.append(f"scheduled.after:{scheduled_after}")
+        task_command_args.append(f"scheduled.before:{scheduled_before}")
 
         if not self.show_completed:
             task_command_args.append(f"status.not:{self.show_completed}")
 
-        self.backend = PatchedTaskWarrior(
+        backend = PatchedTaskWarrior(
             data_location=self.data_location,
             create=False,
             taskrc_location=self.taskrc_location,
             task_command=" ".join(task_command_args),
         )
 
-        self.schedule = Schedule(
-            self.backend,
-            scheduled_after=self.scheduled_after,
-            scheduled_before=self.scheduled_before,
+        return Schedule(
+            backend,
+            scheduled_after=scheduled_after,
+            scheduled_before=scheduled_before,
         )
 
-    def check_files(self):
-        """Check if the required files, directories and settings are present."""
-        # Create a temporary taskwarrior instance to read the config
-        taskwarrior = TaskWarrior(
-            data_location=self.data_location,
-            create=False,
-            taskrc_location=self.taskrc_location,
+    def load_current_window(self) -> Schedule:
+        """Return a loaded schedule of the --from and --to dates, evaluated
+        again, e.g. so 'today' moves on after midnight."""
+        schedule = self.create_schedule(
+            calculate_datetime(self.after_expression),
+            calculate_datetime(self.before_expression),
         )
+        schedule.load()
+        return schedule
 
-        # Disable _forcecolor because it breaks tw config output
-        taskwarrior.overrides.update({"_forcecolor": "off"})
+    def get_snapshot_window(self) -> SnapshotWindow:
+        """Return the window shared by a publisher and its viewers."""
+        from taskschedule.snapshot import SnapshotWindow
+
+        return SnapshotWindow.create(
+            self.scheduled_after, self.scheduled_before, self.show_completed
+        )
+
+    def mark(self, phase: str):
+        """End a startup phase, if startup is being profiled."""
+        if self.profile is not None:
+            self.profile.mark(phase)
+
+    def check_files(self):
+        """Check if the required files, directories and settings are present.
+        A viewer does not read the Taskwarrior files, so they are not checked
+        for it."""
+        if not self.viewer:
+            self.check_taskwarrior_files()
+
+        # Create user directory if it does not exist
+        taskschedule_dir = self.home_dir + "/.taskschedule"
+        hooks_directory = self.home_dir + "/.taskschedule/hooks"
+        if not os.path.isdir(taskschedule_dir):
+            os.mkdir(taskschedule_dir)
+        if not os.path.isdir(hooks_directory):
+            os.mkdir(hooks_directory)
+
+        # Check sound file
+        sound_file = self.home_dir + "/.taskschedule/hooks/drip.wav"
+        if self.show_notifications and os.path.isfile(sound_file) is False:
+            shutil.copyfile("hooks/drip.wav", sound_file)
 
+    def check_taskwarrior_files(self):
+        """Check if the Taskwarrior directory, taskrc and UDAs are present."""
         # Check taskwarrior directory and taskrc
         if os.path.isdir(self.data_location) is False:
             raise TaskDirDoesNotExistError(".task directory not found")
         if os.path.isfile(self.taskrc_location) is False:
             raise TaskrcDoesNotExistError(".taskrc not found")
 
+        from taskschedule.config_cache import ConfigCache
+
+        # Read the config through the cache, so `task show` only runs when the
+        # taskrc, its includes or the task binary have changed
+        config_cache = ConfigCache(self.home_dir + "/.taskschedule/cache")
+        config = config_cache.load(self.taskrc_location, self.fetch_config)
+
         # Check if required UDAs exist
-        if taskwarrior.config.get("uda.estimate.type") is None:
+        if config.get("uda.estimate.type") is None:
             raise UDADoesNotExistError(
                 ("uda.estimate.type does not exist " "in .taskrc")
             )
-        if taskwarrior.config.get("uda.estimate.label") is None:
+        if config.get("uda.estimate.label") is None:
             raise UDADoesNotExistError(
                 ("uda.estimate.label does not exist " "in .taskrc")
             )
 
-        # Create user directory if it does not exist
-        taskschedule_dir = self.home_dir + "/.taskschedule"
-        hooks_directory = self.home_dir + "/.taskschedule/hooks"
-        if not os.path.isdir(taskschedule_dir):
-            os.mkdir(taskschedule_dir)
-        if not os.path.isdir(hooks_directory):
-            os.mkdir(hooks_directory)
+    def fetch_config(self) -> Mapping[str, str]:
+        """Read the Taskwarrior config with `task show`."""
+        from tasklib import TaskWarrior
 
-        # Check sound file
-        sound_file = self.home_dir + "/.taskschedule/hooks/drip.wav"
-        if self.show_notifications and os.path.isfile(sound_file) is False:
-            shutil.copyfile("hooks/drip.wav", sound_file)
+        # Create a temporary taskwarrior instance to read the config
+        taskwarrior = TaskWarrior(
+            data_location=self.data_location,
+            create=False,
+            taskrc_location=self.taskrc_location,
+        )
+
+        # Disable _forcecolor because it breaks tw config output
+        taskwarrior.overrides.update({"_forcecolor": "off"})
+
+        return taskwarrior.config
 
     def parse_args(self, argv):
         parser = argparse.ArgumentParser(
             description="""Display a schedule report for taskwarrior."""
         )
         parser.add_argument(
-            "-r", "--refresh", help="refresh every n seconds", type=int, default=1
+            "command",
+            help="""export the schedule to stdout, or serve it over HTTP,
+            instead of displaying it""",
+            nargs="?",
+            choices=["export", "serve"],
+        )
+        parser.add_argument(
+            "-f",
+            "--format",
+            help="export format",
+            choices=sorted(WRITERS),
+            default="json",
+        )
+        parser.add_argument(
+            "--host",
+            help="address to serve the schedule on",
+            type=str,
+            default="127.0.0.1",
+        )
+        parser.add_argument(
+            "--port",
+            help="port to serve the schedule on",
+            type=int,
+            default=8765,
+        )
+        parser.add_argument(
+            "-r",
+            "--refresh",
+            help="refresh at least every n seconds (default: 60), or draw once "
+            "if negative",
+            type=int,
+            default=60,
         )
         parser.add_argument(
             "--from",
@@ -162,8 +293,40 @@ class Main:
             default=True,
             dest="notifications",
         )
+        parser.add_argument(
+            "--conflicts",
+            help="print the overlapping tasks and free time, then exit",
+            action="store_true",
+            default=False,
+        )
+        sharing = parser.add_mutually_exclusive_group()
+        sharing.add_argument(
+            "--publish",
+            help="share the loaded schedule with --viewer instances on this host",
+            action="store_true",
+            default=False,
+        )
+        sharing.add_argument(
+            "--viewer",
+            help="display the schedule shared by a --publish instance",
+            action="store_true",
+            default=False,
+        )
+        parser.add_argument(
+            "--profile-startup",
+            help="print how long each phase of startup took on exit",
+            action="store_true",
+            default=False,
+        )
         args = parser.parse_args(argv)
 
+        if args.profile_startup:
+            self.profile = StartupProfile()
+            self.mark("imports")
+
+        if args.viewer and (args.command or args.conflicts):
+            parser.error("--viewer only applies to the interface")
+
         if args.before and not args.after or not args.before and args.after:
             print(
                 "Error: Either both --until and --from or neither options must be used."
@@ -174,6 +337,8 @@ class Main:
         self.taskrc_location = args.taskrc_location
 
         # Parse schedule date range
+        self.after_expression = args.after
+        self.before_expression = args.before
         self.scheduled_after: datetime = calculate_datetime(args.after)
         self.scheduled_before: datetime = calculate_datetime(args.before)
 
@@ -182,23 +347,87 @@ class Main:
         self.hide_projects = args.project
         self.refresh_rate = args.refresh
         self.show_notifications = args.notifications
+        self.show_conflicts = args.conflicts
+        self.command = args.command
+        self.export_format = args.format
+        self.host = args.host
+        self.port = args.port
+        self.publish = args.publish
+        self.viewer = args.viewer
+        self.snapshot_location = self.home_dir + "/.taskschedule/snapshot"
+        self.mark("parse arguments")
 
     def main(self):
         """Initialize the screen and notifier, and start the main loop of
         the interface."""
 
+        if self.command == "export":
+            from taskschedule.export import export
+
+            export(self.schedule.iter_records(), self.export_format, sys.stdout)
+            return
+
+        if self.command == "serve":
+            # FastAPI is slow to import, so only the server imports it
+            from taskschedule.server import ServerError, serve
+
+            try:
+                serve(
+                    self.schedule,
+                    self.data_location,
+                    self.host,
+                    self.port,
+                    load=self.load_current_window,
+                )
+            except ServerError as err:
+                print("Error: {}".format(err))
+                sys.exit(1)
+            return
+
+        if self.show_conflicts:
+            from taskschedule.report import format_conflict_report
+
+            print(format_conflict_report(self.schedule))
+            return
+
+        from taskschedule.events import EventBus
+        from taskschedule.hooks import get_default_runner
+        from taskschedule.notifier import Notifier, SoundDoesNotExistError
+        from taskschedule.screen import Screen
+        from taskschedule.snapshot import (
+            PublisherRunningError,
+            SnapshotWindowError,
+            SnapshotWriter,
+        )
+
         if self.show_notifications:
-            self.notifier = Notifier(self.backend)
+            self.notifier = Notifier(self.backend, self.schedule)
         else:
             self.notifier = None
 
+        # A viewer leaves the event hooks to the publisher
+        self.events = None if self.viewer else EventBus()
+
+        self.publisher = None
+        if self.publish:
+            try:
+                self.publisher = SnapshotWriter(
+                    self.snapshot_location, self.get_snapshot_window()
+                )
+            except PublisherRunningError as err:
+                print("Error: {}".format(err))
+                sys.exit(1)
+
         self.screen = Screen(
             self.schedule,
             scheduled_after=self.scheduled_after,
             scheduled_before=self.scheduled_before,
             hide_empty=self.hide_empty,
             hide_projects=self.hide_projects,
+            # A viewer leaves the on-progress hooks to the publisher
+            hooks_enabled=not self.viewer,
         )
+        self.mark("initialize screen")
 
         try:
             self.run()
@@ -222,59 +451,138 @@ class Main:
             self.screen.close()
             print("Error: {}".format(err))
             sys.exit(1)
+        except SnapshotWindowError as err:
+            self.screen.close()
+            print("Error: {}".format(err))
+            sys.exit(1)
         else:
             try:
                 self.screen.close()
             except curses_error as err:
                 print(err.with_traceback)
+        finally:
+            if self.notifier:
+                self.notifier.close()
+            if self.publisher is not None:
+                self.publisher.close()
+
+            # Hooks cannot write to the terminal while curses owns it, so
+            # their output is shown once the screen is closed
+            for name, output in get_default_runner().take_output():
+                print(f"{name}: {output.rstrip()}")
+            if self.profile is not None:
+                print(self.profile.report(), file=sys.stderr)
+
+    def handle_key(self, key: int) -> bool:
+        """Handle a key press. Return False if the interface should quit."""
+        if key == 113:  # q
+            return False
+        elif key == 65 or key == 107:  # Up / k
+            self.screen.scroll(-1)
+        elif key == 66 or key == 106:  # Down / j
+            self.screen.scroll(1)
+        elif key == 54:  # Page down
+            max_y, max_x = self.screen.get_maxyx()
+            self.screen.scroll(max_y - 4)
+        elif key == 53:  # Page up
+            max_y, max_x = self.screen.get_maxyx()
+            self.screen.scroll(-(max_y - 4))
+        elif key == KEY_RESIZE:
+            self.screen.refresh_buffer()
+            self.screen.draw(force=True)
+
+        return True
+
+    def refresh(self):
+        """Send notifications, run the hooks of the events since the last
+        refresh and redraw the schedule."""
+        if self.notifier:
+            self.notifier.send_notifications()
+
+        if self.publisher is not None:
+            self.publisher.publish(self.schedule.records)
+
+        if self.events is not None:
+            self.events.tick(self.schedule.records)
+
+        self.screen.refresh_buffer()
+        self.screen.draw()
 
     def run(self):
-        """The main loop of the interface."""
-
-        filename = f"{self.data_location}/pending.data"
-        cached_stamp = 0.0
-
-        last_refresh_time = 0.0
-        while True:
-            key = self.screen.stdscr.getch()
-            if key == 113:  # q
-                break
-            elif key == 65 or key == 107:  # Up / k
-                self.screen.scroll(-1)
-                last_refresh_time = time.time()
-            elif key == 66 or key == 106:  # Down / j
-                self.screen.scroll(1)
-                last_refresh_time = time.time()
-            elif key == 54:  # Page down
-                max_y, max_x = self.screen.get_maxyx()
-                self.screen.scroll(max_y - 4)
-                last_refresh_time = time.time()
-            elif key == 53:  # Page up
-                max_y, max_x = self.screen.get_maxyx()
-                self.screen.scroll(-(max_y - 4))
-                last_refresh_time = time.time()
-            elif key == KEY_RESIZE:
-                last_refresh_time = time.time()
-                self.screen.refresh_buffer()
-                self.screen.draw()
-            elif time.time() > last_refresh_time + self.refresh_rate:
-                if self.notifier:
-                    self.notifier.send_notifications()
+        """The main loop of the interface. Sleep until a key is pressed, the
+        task data changes, a task's scheduled time comes or the next refresh
+        is due, which is aligned to the refresh rate (minute boundaries by
+        default).
+
+        When the task data changes, the tasks are reloaded on a worker
+        thread. The previous tasks stay on screen and keys are handled until
+        the new ones are swapped in. A viewer instead takes the tasks from
+        the shared snapshot whenever its generation changes."""
+
+        from taskschedule.loader import ScheduleLoader
+        from taskschedule.snapshot import SnapshotReader
+        from taskschedule.watcher import DataWatcher
+
+        reader = None
+        if self.viewer:
+            reader = SnapshotReader(
+                self.snapshot_location, self.schedule, self.get_snapshot_window()
+            )
+            self.schedule.use_records(reader.load())
 
-                # Redraw if task data has changed
-                stamp = os.stat(filename).st_mtime
-                if stamp != cached_stamp:
-                    cached_stamp = stamp
-                    self.schedule.clear_cache()
-                    self.screen.refresh_buffer()
-                    self.screen.draw()
+        if self.profile is not None:
+            # Load the tasks ahead of the first frame, to time them separately
+            self.schedule.records
+            self.mark("load tasks")
 
-                last_refresh_time = time.time()
+        self.refresh()
+        self.mark("first frame")
+        if self.refresh_rate < 0:
+            return
 
-            napms(1)
+        refresh_rate = max(self.refresh_rate, 1)
+        if reader is not None:
+            watcher = loader = reader
+        else:
+            watcher = DataWatcher(self.data_location)
+            loader = ScheduleLoader(self.schedule)
+        input_fd = sys.stdin.fileno()
+        try:
+            while True:
+                now = time.time()
+                next_refresh_time = now + refresh_rate - now % refresh_rate
+                wake_time = next_refresh_time
 
-            if self.refresh_rate < 0:
-                break
+                next_due_time = None
+                if self.notifier:
+                    next_due_time = self.notifier.next_due_time(now)
+                if next_due_time is not None:
+                    wake_time = min(wake_time, next_due_time)
+
+                key_pressed, data_changed = watcher.wait(
+                    input_fd, wake_time - now, wake_fd=loader.fileno()
+                )
+                if data_changed:
+                    loader.request()
+
+                if key_pressed:
+                    key = self.screen.stdscr.getch()
+                    while key != -1:
+                        if not self.handle_key(key):
+                            return
+                        key = self.screen.stdscr.getch()
+
+                snapshot = loader.take()
+                if snapshot is not None:
+                    self.schedule.swap(snapshot)
+
+                if snapshot is not None or time.time() >= next_refresh_time:
+                    self.refresh()
+                elif next_due_time is not None and time.time() >= next_due_time:
+                    self.notifier.send_notifications()
+        finally:
+            loader.close()
+            watcher.close()
 
 
 def run():
@@ -1,89 +1,310 @@
 import os
+import queue
 import subprocess
+import threading
+import time
+from bisect import bisect_right
+from datetime import date, datetime
+from datetime import time as dt_time
+from operator import attrgetter
+from typing import List, NamedTuple, Optional, Union
 
+from taskschedule.ledger import NotificationLedger
 from taskschedule.scheduled_task import ScheduledTask
+from taskschedule.task_record import TaskRecord
+
+# Seconds to wait for a notification command before giving up on it
+COMMAND_TIMEOUT = 5.0
+
+# Bursts waiting for delivery; further bursts are dropped until there is room
+QUEUE_SIZE = 8
 
 
 class SoundDoesNotExistError(Exception):
     ...
 
 
+class Notification(NamedTuple):
+    uuid: str
+    summary: str
+    body: str
+
+
+def is_termux() -> bool:
+    return "termux" in str(os.getenv("PREFIX"))
+
+
+def get_sound_file() -> str:
+    home = os.path.expanduser("~")
+    return home + "/.taskschedule/hooks/drip.wav"
+
+
+def run_command(args: List[str]):
+    """Run a notification command, giving up after the command timeout."""
+    try:
+        subprocess.run(
+            args,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=COMMAND_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+
+
+class NotificationDispatcher:
+    """Deliver notifications from a background thread, so the interface never
+    waits on notify-send or aplay. Bursts which queue up while a delivery is
+    in progress are coalesced into a single notification and sound."""
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue: "queue.Queue[Optional[List[Notification]]]" = queue.Queue(
+            queue_size
+        )
+        self.thread = threading.Thread(
+            target=self.run, name="taskschedule-notifier", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, notifications: List[Notification]) -> bool:
+        """Queue a burst of notifications without blocking. Return False if
+        the queue is full and the burst was dropped."""
+        try:
+            self.queue.put_nowait(notifications)
+        except queue.Full:
+            return False
+
+        return True
+
+    def close(self, timeout: float = COMMAND_TIMEOUT):
+        """Deliver the queued notifications and stop the worker thread."""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def run(self):
+        closing = False
+        while not closing:
+            burst = self.queue.get()
+            if burst is None:
+                break
+
+            # Coalesce the bursts which queued up in the meantime
+            while True:
+                try:
+                    pending = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    closing = True
+                    break
+                burst.extend(pending)
+
+            self.deliver(burst)
+
+    def deliver(self, notifications: List[Notification]):
+        """Deliver a burst of notifications."""
+        if not notifications:
+            return
+
+        if is_termux():
+            # Termux notifications carry per-task start and stop buttons
+            for notification in notifications:
+                self.deliver_termux(notification)
+            return
+
+        if len(notifications) == 1:
+            summary, body = notifications[0].summary, notifications[0].body
+        else:
+            summary = f"{len(notifications)} tasks scheduled"
+            body = "\n".join(
+                f"{notification.summary}: {notification.body}"
+                for notification in notifications
+            )
+
+        run_command(["notify-send", "--urgency", "critical", summary, body])
+
+        sound_file = get_sound_file()
+        if os.path.isfile(sound_file):
+            try:
+                subprocess.Popen(
+                    ["aplay", sound_file],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.STDOUT,
+                )
+            except OSError:
+                pass
+
+    def deliver_termux(self, notification: Notification):
+        uuid = notification.uuid
+        run_command(
+            [
+                "termux-notification",
+                "--title",
+                notification.summary,
+                "--content",
+                notification.body,
+                "--button1",
+                "Start",
+                "--button1-action",
+                f"task {uuid} start",
+                "--button2",
+                "Stop",
+                "--button2-action",
+                f"task {uuid} stop",
+                "--on-delete",
+                "echo deleted",
+                "--action",
+                "echo action",
+                "--id",
+                f"taskschedule-{uuid}",
+                "--vibrate",
+                "200",
+                "--priority",
+                "max",
+                "--led-off",
+                "200",
+                "--led-on",
+                "200",
+            ]
+        )
+
+
 class Notifier:
-    def __init__(self, backend):
+    """Send notifications for tasks when their scheduled time comes.
+
+    Given a schedule, the notification candidates are evaluated in memory,
+    from a queue of the schedule's records sorted by scheduled time. The
+    queue is rebuilt only when the schedule reloads its tasks. Without a
+    schedule, the candidates are queried from the backend."""
+
+    def __init__(
+        self,
+        backend,
+        schedule=None,
+        ledger: Optional[NotificationLedger] = None,
+        dispatcher: Optional[NotificationDispatcher] = None,
+    ):
         self.backend = backend
+        self.schedule = schedule
+        self.ledger = ledger or NotificationLedger()
+        self.dispatcher = dispatcher or NotificationDispatcher()
 
-    def notify(self, task: ScheduledTask):
-        """Send a notification for the given task."""
+        self.records: Optional[List[TaskRecord]] = None
+        self.upcoming: List[TaskRecord] = []
+        self.starts: List[float] = []
 
-        home = os.path.expanduser("~")
+    def close(self):
+        """Deliver the pending notifications and stop the dispatcher."""
+        self.dispatcher.close()
 
+    def create_notification(
+        self, task: Union[ScheduledTask, TaskRecord]
+    ) -> Optional[Notification]:
+        """Return the notification for the given task, or None if the task is
+        not scheduled."""
         scheduled_time = task.scheduled_start_datetime
         if not scheduled_time:
-            return
+            return None
 
         scheduled_time_formatted = scheduled_time.strftime("%H:%M")
 
         task_id: str = task["id"]
         summary: str = f"{scheduled_time_formatted} | Task {task_id}"
         body: str = "{}".format(task["description"])
-        urgency: str = "critical"
-        uuid: str = task["uuid"]
-
-        if "termux" in str(os.getenv("PREFIX")):
-            urgency = "max"
-            subprocess.run(
-                [
-                    "termux-notification",
-                    "--title",
-                    summary,
-                    "--content",
-                    body,
-                    "--button1",
-                    "Start",
-                    "--button1-action",
-                    f"task {uuid} start",
-                    "--button2",
-                    "Stop",
-                    "--button2-action",
-                    f"task {uuid} stop",
-                    "--on-delete",
-                    "echo deleted",
-                    "--action",
-                    "echo action",
-                    "--id",
-                    f"taskschedule-{uuid}",
-                    "--vibrate",
-                    "200",
-                    "--priority",
-                    urgency,
-                    "--led-off",
-                    "200",
-                    "--led-on",
-                    "200",
-                ]
+
+        return Notification(task["uuid"], summary, body)
+
+    def dispatch(self, notifications: List[Notification]) -> bool:
+        """Hand a burst of notifications to the dispatcher. Return False if
+        the dispatcher dropped the burst."""
+        if not notifications:
+            return True
+
+        sound_file = get_sound_file()
+        if not is_termux() and not os.path.isfile(sound_file):
+            raise SoundDoesNotExistError(
+                f"The specified sound file does not exist: {sound_file}"
             )
-        else:
-            subprocess.run(["notify-send", "--urgency", urgency, summary, body])
 
-            sound_file = home + "/.taskschedule/hooks/drip.wav"
-            if os.path.isfile(sound_file) is True:
-                subprocess.Popen(
-                    ["aplay", sound_file],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.STDOUT,
-                )
-            else:
-                raise SoundDoesNotExistError(
-                    f"The specified sound file does not exist: {sound_file}"
-                )
+        return self.dispatcher.submit(notifications)
+
+    def notify(self, task: Union[ScheduledTask, TaskRecord]):
+        """Send a notification for the given task."""
+        notification = self.create_notification(task)
+        if notification is not None:
+            self.dispatch([notification])
 
-    def send_notifications(self):
-        """Send notifications for scheduled tasks that should be started."""
+    def update_queue(self):
+        """Rebuild the queue of upcoming tasks if the schedule has reloaded
+        its records."""
+        records = self.schedule.records
+        if records is self.records:
+            return
 
-        tasks = self.backend.tasks.filter(
-            "-ACTIVE -COMPLETED scheduled.before:now scheduled.after:today"
+        self.records = records
+        self.upcoming = sorted(
+            (
+                record
+                for record in records
+                if record.scheduled is not None
+                and not record.active
+                and not record.completed
+            ),
+            key=attrgetter("scheduled"),
         )
+        self.starts = [record.scheduled for record in self.upcoming]
+
+    def get_candidates(self, now: float) -> List[TaskRecord]:
+        """Return the queued tasks scheduled since the start of today, up to
+        and including now."""
+        self.update_queue()
+        start_of_today = datetime.combine(date.fromtimestamp(now), dt_time())
+        first = bisect_right(self.starts, start_of_today.timestamp())
+        last = bisect_right(self.starts, now)
+        return self.upcoming[first:last]
+
+    def next_due_time(self, now: Optional[float] = None) -> Optional[float]:
+        """Return when the next queued task is scheduled, or None if there is
+        no such task or no schedule to queue tasks from."""
+        if self.schedule is None:
+            return None
+
+        if now is None:
+            now = time.time()
 
+        self.update_queue()
+        index = bisect_right(self.starts, now)
+        if index < len(self.starts):
+            return self.starts[index]
+
+        return None
+
+    def send_notifications(self, now: Optional[float] = None):
+        """Send notifications for scheduled tasks that should be started. All
+        tasks which became due since the last call are sent as one burst.
+
+        Tasks are claimed in the ledger before the burst is dispatched, so
+        only one instance notifies. If the dispatcher drops the burst, the
+        claims are released and the tasks are notified on a later call."""
+        claimed_at = time.time() if now is None else now
+        tasks: List[Union[ScheduledTask, TaskRecord]]
+        if self.schedule is None:
+            tasks = list(
+                self.backend.tasks.filter(
+                    "-ACTIVE -COMPLETED scheduled.before:now scheduled.after:today"
+                )
+            )
+        else:
+            tasks = list(self.get_candidates(claimed_at))
+
+        notifications = []
         for task in tasks:
-            if not task.notified:
-                self.notify(task)
+            if self.ledger.claim(task["uuid"], claimed_at):
+                notification = self.create_notification(task)
+                if notification is not None:
+                    notifications.append(notification)
+
+        self.ledger.purge(claimed_at)
+        if not self.dispatch(notifications):
+            for notification in notifications:
+                self.ledger.release(notification.uuid, claimed_at)
@@ -0,0 +1,44 @@
+"""This module provides the non-interactive reports of taskschedule, which are
+printed instead of drawing the schedule."""
+
+from datetime import datetime
+from typing import List, Optional
+
+from taskschedule.schedule import Schedule
+from taskschedule.task_record import TaskRecord
+
+
+def format_time(value: Optional[datetime]) -> str:
+    """Format a datetime for a report."""
+    if value is None:
+        return ""
+    return value.strftime("%a %d %b %H:%M")
+
+
+def format_task(task: TaskRecord) -> str:
+    """Format a task's scheduled interval, ID and description."""
+    start = format_time(task.scheduled_start_datetime)
+    end = task.scheduled_end_datetime
+    end_time = end.strftime("%H:%M") if end is not None else ""
+    return f"{start}-{end_time} {task.id} {task.description}"
+
+
+def format_conflict_report(schedule: Schedule) -> str:
+    """Return a report of the tasks scheduled to overlap each other, and of
+    the free time between the scheduled tasks."""
+    lines: List[str] = []
+
+    conflicts = schedule.get_conflicts()
+    lines.append(f"{len(conflicts)} conflicts")
+    for task, other in conflicts:
+        lines.append(f"  {format_task(task)}")
+        lines.append(f"    overlaps {format_task(other)}")
+
+    gaps = schedule.get_free_gaps()
+    lines.append("")
+    lines.append(f"{len(gaps)} free intervals")
+    for start, end in gaps:
+        duration = int((end - start).total_seconds() // 60)
+        lines.append(f"  {format_time(start)} - {format_time(end)} ({duration} min)")
+
+    return "\n".join(lines)
@@ -1,12 +1,16 @@
 """This module provides a Schedule class, which is used for retrieving
-   scheduled tasks from taskwarrior and displaying them in a table."""
+scheduled tasks from taskwarrior and displaying them in a table."""
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-
-from cached_property import cached_property
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from functools import cached_property
+from heapq import heappop, heappush
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from taskschedule.scheduled_task import ScheduledTask, ScheduledTaskQuerySet
+from taskschedule.task_record import TaskRecord
 from taskschedule.taskwarrior import PatchedTaskWarrior
 
 
@@ -31,13 +35,229 @@ class TaskDirDoesNotExistError(Exception):
     pass
 
 
+class TimeSlotIndex:
+    """Bucket scheduled tasks by day and hour in a single pass.
+
+    Every bucket is kept sorted by scheduled time, so building the time slots
+    for a date range is a plain lookup per hour instead of a scan over all
+    tasks."""
+
+    def __init__(self, tasks: Iterable[TaskRecord]):
+        self.buckets: Dict[Tuple[date, int], List[TaskRecord]] = defaultdict(list)
+        for task in tasks:
+            if task.scheduled is not None:
+                start = datetime.fromtimestamp(task.scheduled)
+                self.buckets[(start.date(), start.hour)].append(task)
+
+        for bucket in self.buckets.values():
+            bucket.sort(key=lambda task: task.scheduled)
+
+    def get_time_slots(self, start_date: date, end_date: date) -> Dict:
+        """Return a dict with dates and their tasks, one entry per hour."""
+        days = {}
+        day = start_date
+        while day <= end_date:
+            hours = {}
+            for hour in range(24):
+                hours[f"{hour:02d}"] = list(self.buckets.get((day, hour), ()))
+            days[day.isoformat()] = hours
+            day += timedelta(days=1)
+
+        return days
+
+
+class StartTimeIndex:
+    """Index tasks by their scheduled start, so tasks can be looked up by time
+    in O(log n). A task without an estimate is an instant at its start."""
+
+    def __init__(self, tasks: Iterable[TaskRecord]):
+        self.tasks: List[TaskRecord] = sorted(
+            (task for task in tasks if task.scheduled is not None),
+            key=attrgetter("scheduled"),
+        )
+        self.starts: List[float] = [task.scheduled for task in self.tasks]
+        self.uuids: List[Optional[str]] = [task.uuid for task in self.tasks]
+
+        # Bounds how far back a task overlapping a given time can start
+        self.max_duration = max(
+            (
+                task.scheduled_end - task.scheduled
+                for task in self.tasks
+                if task.scheduled_end is not None
+            ),
+            default=0.0,
+        )
+
+    def get_next(self, epoch: float) -> Optional[TaskRecord]:
+        """Return the first task scheduled after the given time."""
+        index = bisect_right(self.starts, epoch)
+        if index < len(self.tasks):
+            return self.tasks[index]
+        return None
+
+    def get_previous(self, epoch: float) -> Optional[TaskRecord]:
+        """Return the last task scheduled before the given time."""
+        index = bisect_left(self.starts, epoch) - 1
+        if index >= 0:
+            return self.tasks[index]
+        return None
+
+    def get_bounds(self, start: float, end: float) -> Tuple[int, int]:
+        """Return the slice of the tasks scheduled to start in [start, end)."""
+        return bisect_left(self.starts, start), bisect_left(self.starts, end)
+
+    def get_between(self, start: float, end: float) -> List[TaskRecord]:
+        """Return the tasks scheduled to start in [start, end)."""
+        first, last = self.get_bounds(start, end)
+        return self.tasks[first:last]
+
+    def get_overlapping(self, start: float, end: float) -> List[TaskRecord]:
+        """Return the tasks whose scheduled interval overlaps [start, end)."""
+        first = bisect_right(self.starts, start - self.max_duration)
+        last = bisect_left(self.starts, end)
+        return [
+            task
+            for task in self.tasks[first:last]
+            if task.scheduled >= start
+            or (task.scheduled_end is not None and task.scheduled_end > start)
+        ]
+
+    def get_current(self, epoch: float) -> Optional[TaskRecord]:
+        """Return the task scheduled to be in progress at the given time, as
+        defined by TaskRecord.get_active_end. If several tasks are in
+        progress, the one which started last is returned."""
+        index = bisect_right(self.starts, epoch) - 1
+        if index < 0:
+            return None
+
+        task = self.tasks[index]
+        next_start = self.starts[index + 1] if index + 1 < len(self.starts) else None
+        end = task.get_active_end(next_start)
+        if end is not None and end > epoch:
+            return task
+
+        in_progress = [
+            task
+            for task in self.get_overlapping(epoch, epoch)
+            if task.scheduled_end is not None and task.scheduled_end > epoch
+        ]
+        return in_progress[-1] if in_progress else None
+
+
+class ConflictIndex:
+    """Find the scheduled tasks which overlap each other, and the free time
+    between them, with a sort and sweep over the tasks' scheduled intervals.
+    Only tasks with an estimate have an interval, so only they can conflict.
+
+    Building the index takes O(n log n + k) time for n tasks and k
+    overlapping pairs."""
+
+    def __init__(self, tasks: Iterable[TaskRecord]):
+        self.intervals: List[TaskRecord] = sorted(
+            (
+                task
+                for task in tasks
+                if task.scheduled is not None
+                and task.scheduled_end is not None
+                and task.scheduled_end > task.scheduled
+            ),
+            key=attrgetter("scheduled", "scheduled_end"),
+        )
+
+        self.pairs: List[Tuple[TaskRecord, TaskRecord]] = []
+        self.conflicting: Set[TaskRecord] = set()
+
+        # The tasks still in progress at the current start, by end time
+        in_progress: List[Tuple[float, int, TaskRecord]] = []
+        for i, task in enumerate(self.intervals):
+            while in_progress and in_progress[0][0] <= task.scheduled:
+                heappop(in_progress)
+
+            for _, _, other in in_progress:
+                self.pairs.append((other, task))
+                self.conflicting.add(other)
+                self.conflicting.add(task)
+
+            heappush(in_progress, (task.scheduled_end, i, task))
+
+    def has_conflict(self, task: TaskRecord) -> bool:
+        """Return True if the task overlaps another task."""
+        return task in self.conflicting
+
+    def get_gaps(self, start: float, end: float) -> List[Tuple[float, float]]:
+        """Return the free intervals between start and end, which no task is
+        scheduled in."""
+        gaps = []
+        free_from = start
+        for task in self.intervals:
+            if task.scheduled >= end:
+                break
+            if task.scheduled > free_from:
+                gaps.append((free_from, task.scheduled))
+            free_from = max(free_from, task.scheduled_end)
+
+        if free_from < end:
+            gaps.append((free_from, end))
+
+        return gaps
+
+
+class ColumnLayout:
+    """Measure the column widths of a set of tasks, and the column offsets
+    derived from them."""
+
+    KEYS = ("id", "project", "description")
+
+    def __init__(self, tasks: Iterable[TaskRecord] = ()):
+        self.lengths: Dict[str, int] = dict.fromkeys(self.KEYS, 0)
+        for task in tasks:
+            for key, length in self.lengths.items():
+                self.lengths[key] = max(length, len(str(getattr(task, key))))
+        self._offsets: Optional[List[int]] = None
+
+    def get_max_length(self, key: str) -> int:
+        """Return the max string length of a given key's value."""
+        return self.lengths[key]
+
+    @property
+    def offsets(self) -> List[int]:
+        """The offsets for each column in the schedule."""
+        if self._offsets is None:
+            offsets = [0, 5]  # Hour, glyph
+            offsets.append(5 + self.get_max_length("id") + 1)  # ID
+            offsets.append(offsets[2] + 12)  # Time
+            offsets.append(offsets[3] + 10)  # Timeboxes
+
+            add_offset = self.get_max_length("project") + 1
+
+            if add_offset < 8:
+                add_offset = 8
+
+            offsets.append(offsets[4] + add_offset)  # Project
+            self._offsets = offsets
+
+        return self._offsets
+
+
 class Schedule:
     """This class provides methods to format tasks and display them in
     a schedule report."""
 
+    # The tasks and the indexes derived from them, which are cached until
+    # the cache is cleared or replaced by a snapshot
+    CACHED_PROPERTIES = (
+        "tasks",
+        "records",
+        "time_slot_index",
+        "start_time_index",
+        "tasks_by_uuid",
+        "conflict_index",
+        "column_layout",
+    )
+
     def __init__(
         self,
-        backend: PatchedTaskWarrior,
+        backend: Optional[PatchedTaskWarrior],
         scheduled_after: datetime,
         scheduled_before: datetime,
     ):
@@ -85,8 +305,43 @@ class Schedule:
 
     def clear_cache(self):
         """Clear the scheduled tasks cache."""
-        if self.tasks:
-            del self.__dict__["tasks"]
+        for name in self.CACHED_PROPERTIES:
+            self.__dict__.pop(name, None)
+
+    def load_snapshot(self) -> "Schedule":
+        """Return a new schedule of the same date range, with its tasks
+        loaded and indexed. This schedule is not touched, so the snapshot
+        can be loaded on another thread while this one is rendered."""
+        snapshot = Schedule(
+            self.backend,
+            scheduled_after=self.scheduled_after,
+            scheduled_before=self.scheduled_before,
+        )
+        snapshot.load()
+        return snapshot
+
+    def load(self):
+        """Load the tasks and build the indexes now, instead of on first
+        use."""
+        for name in self.CACHED_PROPERTIES:
+            getattr(self, name)
+
+    def use_records(self, records: List[TaskRecord]):
+        """Show the given records instead of the tasks in Taskwarrior, e.g.
+        the records of a shared snapshot."""
+        self.clear_cache()
+        self.__dict__["tasks"] = records
+        self.__dict__["records"] = records
+
+    def swap(self, snapshot: "Schedule"):
+        """Replace the cached tasks and indexes with those of a snapshot."""
+        cached = {
+            name: snapshot.__dict__[name]
+            for name in self.CACHED_PROPERTIES
+            if name in snapshot.__dict__
+        }
+        self.clear_cache()
+        self.__dict__.update(cached)
 
     @cached_property
     def tasks(self) -> ScheduledTaskQuerySet:
@@ -95,49 +350,71 @@ class Schedule:
 
         return queryset
 
+    @cached_property
+    def records(self) -> List[TaskRecord]:
+        """Return compact snapshots of the scheduled tasks for rendering."""
+        return [TaskRecord.from_task(task) for task in self.tasks]
+
+    @cached_property
+    def time_slot_index(self) -> TimeSlotIndex:
+        """Index the scheduled tasks by day and hour. The index is rebuilt
+        after the task cache has been cleared."""
+        return TimeSlotIndex(self.records)
+
+    @cached_property
+    def start_time_index(self) -> StartTimeIndex:
+        """Index the scheduled tasks by start time."""
+        return StartTimeIndex(self.records)
+
+    @cached_property
+    def tasks_by_uuid(self) -> Dict[str, ScheduledTask]:
+        return {task["uuid"]: task for task in self.tasks}
+
+    @cached_property
+    def conflict_index(self) -> ConflictIndex:
+        """Index the overlaps between the scheduled tasks."""
+        return ConflictIndex(self.records)
+
+    @cached_property
+    def column_layout(self) -> ColumnLayout:
+        """Measure the columns of the scheduled tasks once per task set."""
+        return ColumnLayout(self.records)
+
     def get_time_slots(self) -> Dict:
         """Return a dict with dates and their tasks.
         >>> get_time_slots()
         {datetime.date(2019, 6, 27): {00: [], 01: [], ..., 23: [task, task]},
          datetime.date(2019, 6, 28): {00: [], ..., 10: [task, task], ...}]
         """
-        start_time = "0:00"
-        end_time = "23:00"
-        slot_time = 60
-
         start_date = self.scheduled_after.date()
         end_date = self.scheduled_before.date()
 
-        days = {}
-        date = start_date
-        while date <= end_date:
-            hours = {}
-            time = datetime.strptime(start_time, "%H:%M")
-            end = datetime.strptime(end_time, "%H:%M")
-            while time <= end:
-                task_list = []
-                task: ScheduledTask
-                for task in self.tasks:
-                    start = task.scheduled_start_datetime
-                    if start and start.date() == date:
-                        if start.hour == int(time.strftime("%H")):
-                            task_list.append(task)
-
-                task_list = sorted(task_list, key=lambda k: k["scheduled"])
-                hours[time.strftime("%H")] = task_list
-                time += timedelta(minutes=slot_time)
-            days[date.isoformat()] = hours
-            date += timedelta(days=1)
+        return self.time_slot_index.get_time_slots(start_date, end_date)
 
-        return days
+    def iter_records(self) -> Iterator[TaskRecord]:
+        """Yield the tasks scheduled in the schedule's date range, in the
+        order of get_time_slots, without building the time slots."""
+        index = self.start_time_index
+        start_date = self.scheduled_after.date()
+        start = datetime(start_date.year, start_date.month, start_date.day)
+        end_date = self.scheduled_before.date() + timedelta(days=1)
+        end = datetime(end_date.year, end_date.month, end_date.day)
+
+        first = bisect_left(index.starts, start.timestamp())
+        last = bisect_left(index.starts, end.timestamp())
+        for i in range(first, last):
+            yield index.tasks[i]
 
     def get_max_length(self, key: str) -> int:
         """Return the max string length of a given key's value of all tasks
         in the schedule. Useful for determining column widths.
         """
+        if key in ColumnLayout.KEYS:
+            return self.column_layout.get_max_length(key)
+
         max_length = 0
-        for task in self.tasks:
-            length = len(str(task[key]))
+        for task in self.records:
+            length = len(str(getattr(task, key)))
             if length > max_length:
                 max_length = length
 
@@ -145,31 +422,66 @@ class Schedule:
 
     def get_column_offsets(self) -> List[int]:
         """Return the offsets for each column in the schedule for rendering
-        a table."""
-        offsets = [0, 5]  # Hour, glyph
-        offsets.append(5 + self.get_max_length("id") + 1)  # ID
-        offsets.append(offsets[2] + 12)  # Time
-        offsets.append(offsets[3] + 10)  # Timeboxes
-
-        add_offset = self.get_max_length("project") + 1
-
-        if add_offset < 8:
-            add_offset = 8
-
-        offsets.append(offsets[4] + add_offset)  # Project
-        return offsets
+        a table. The offsets are computed once per task set."""
+        return list(self.column_layout.offsets)
 
     def get_next_task(self, task: ScheduledTask) -> Optional[ScheduledTask]:
         """Get the next scheduled task after the given task. If there is no
         next scheduled task, return None."""
-        next_tasks = []
-        for task_ in self.tasks:
-            if task_.scheduled_start_datetime > task.scheduled_start_datetime:
-                next_tasks.append(task_)
-
-        next_tasks.sort(key=lambda task: task.scheduled_start_datetime)
-
-        if next_tasks:
-            return next_tasks[0]
-
-        return None
+        record = self.start_time_index.get_next(task["scheduled"].timestamp())
+        if record is None:
+            return None
+
+        return self.tasks_by_uuid[record.uuid]
+
+    def get_previous_task(self, task: ScheduledTask) -> Optional[ScheduledTask]:
+        """Get the last scheduled task before the given task. If there is no
+        previous scheduled task, return None."""
+        record = self.start_time_index.get_previous(task["scheduled"].timestamp())
+        if record is None:
+            return None
+
+        return self.tasks_by_uuid[record.uuid]
+
+    def get_next_start(self, task: TaskRecord) -> Optional[float]:
+        """Return when the next task after the given one is scheduled."""
+        if task.scheduled is None:
+            return None
+
+        next_task = self.start_time_index.get_next(task.scheduled)
+        if next_task is None:
+            return None
+
+        return next_task.scheduled
+
+    def get_tasks_between(self, start: datetime, end: datetime) -> List[TaskRecord]:
+        """Return the tasks scheduled to start in the given interval."""
+        return self.start_time_index.get_between(start.timestamp(), end.timestamp())
+
+    def get_overlapping_tasks(self, start: datetime, end: datetime) -> List[TaskRecord]:
+        """Return the tasks scheduled to overlap the given interval."""
+        return self.start_time_index.get_overlapping(start.timestamp(), end.timestamp())
+
+    def get_current_task(self, now: datetime) -> Optional[TaskRecord]:
+        """Return the task scheduled to be in progress at the given time."""
+        return self.start_time_index.get_current(now.timestamp())
+
+    def get_conflicts(self) -> List[Tuple[TaskRecord, TaskRecord]]:
+        """Return the pairs of tasks scheduled to overlap, in order of the
+        start of the overlap."""
+        return self.conflict_index.pairs
+
+    def has_conflict(self, task: TaskRecord) -> bool:
+        """Return True if the task is scheduled to overlap another task."""
+        return self.conflict_index.has_conflict(task)
+
+    def get_free_gaps(self) -> List[Tuple[datetime, datetime]]:
+        """Return the free intervals of the schedule's date range, which no
+        task is scheduled in."""
+        gaps = self.conflict_index.get_gaps(
+            self.scheduled_after.timestamp(), self.scheduled_before.timestamp()
+        )
+        return [
+            (datetime.fromtimestamp(start), datetime.fromtimestamp(end))
+            for start, end in gaps
+        ]
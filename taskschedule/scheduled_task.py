@@ -1,13 +1,12 @@
 import json
-import os
-import tempfile
-import time
 from datetime import datetime as dt
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 from isodate import parse_duration
 from tasklib.task import Task, TaskQuerySet
 
+from taskschedule.ledger import get_default_ledger
+
 
 class ScheduledTaskQuerySet(TaskQuerySet):
     ...
@@ -21,11 +20,39 @@ class ScheduledTask(Task):
         # TODO Create reference to Schedule
         self.glyph = "○"
 
+    def _load_data(self, data):
+        super(ScheduledTask, self)._load_data(data)
+        self.clear_derived()
+
+    def _update_data(self, *args, **kwargs):
+        super(ScheduledTask, self)._update_data(*args, **kwargs)
+        self.clear_derived()
+
+    def __setitem__(self, key, value):
+        super(ScheduledTask, self).__setitem__(key, value)
+        self.clear_derived()
+
+    def clear_derived(self):
+        """Clear the fields derived from the task data. This happens whenever
+        the task data changes."""
+        self.__dict__["_derived"] = {}
+
+    def get_derived(self, name: str, compute: Callable[[], Any]) -> Any:
+        """Return a field derived from the task data, computing it on first
+        access."""
+        derived = self.__dict__.setdefault("_derived", {})
+        if name not in derived:
+            derived[name] = compute()
+        return derived[name]
+
     @property
     def has_scheduled_time(self) -> bool:
         """If task's scheduled time is 00:00:00, it has been scheduled for a
         particular day but not for a specific time. If this is the case,
         return False."""
+        return self.get_derived("has_scheduled_time", self._has_scheduled_time)
+
+    def _has_scheduled_time(self) -> bool:
         start = self.scheduled_start_datetime
         if start:
             if (
@@ -51,6 +78,9 @@ class ScheduledTask(Task):
     @property
     def scheduled_end_datetime(self) -> Optional[dt]:
         """Return the task's scheduled end datetime."""
+        return self.get_derived("scheduled_end_datetime", self._scheduled_end)
+
+    def _scheduled_end(self) -> Optional[dt]:
         try:
             estimate: dt = self["estimate"]
             duration = parse_duration(estimate)
@@ -60,77 +90,42 @@ class ScheduledTask(Task):
 
     @property
     def notified(self) -> bool:
-        filename = tempfile.gettempdir() + "/taskschedule"
-        uuid = self["uuid"]
-
-        # TODO Move this logic into Notifier; this is only used there
-
-        min_delay = 300  # TODO Make configurable
-        if os.path.exists(filename):
-            mode = "r+"
-        else:
-            mode = "w+"
-
-        with open(filename, mode) as f:
-            raw_data = f.read()
-
-            if not raw_data:
-                raw_data = "{}"
-
-            data = json.loads(raw_data)
-
-            # TODO Refactor to de-duplicate code
-            if uuid not in data:
-                data[uuid] = time.time()
-                f.seek(0)
-                f.truncate(0)
-                f.write(json.dumps(data))
-                return False
-            else:
-                if time.time() > float(data[uuid]) + min_delay:
-                    data[uuid] = time.time()
-                    f.seek(0)
-                    f.truncate(0)
-                    f.write(json.dumps(data))
-                    return False
-                else:
-                    return True
+        """Return True if the task was notified recently. Otherwise, record a
+        notification in the default ledger and return False."""
+        return not get_default_ledger().claim(self["uuid"])
 
     @property
     def should_be_active(self) -> bool:
         """Return true if the task should be active."""
+        return self.should_be_active_at(dt.now())
+
+    def should_be_active_at(self, now: dt, next_start: Optional[dt] = None) -> bool:
+        """Return true if the task should be active at the given time, i.e.
+        between its scheduled start and end. A task without an estimate
+        should be active until the next task starts, which is given by
+        next_start."""
 
         if self.scheduled_start_datetime is None:
             return False
 
-        start_ts: float = dt.timestamp(self.scheduled_start_datetime)
-
-        now = dt.now()
-        now_ts = dt.timestamp(now)
-
-        if self["end"] is None:
-            # TODO Implement get_next_task differently
-            # next_task = self.schedule.get_next_task(self)
-            next_task = None
-            if next_task is not None:
-                next_task_start_ts = dt.timestamp(next_task.start)
-                if now_ts > start_ts and next_task_start_ts > now_ts:
-                    return True
-        else:
-            end_ts = dt.timestamp(self["end"])
-            if now_ts > start_ts and end_ts > now_ts:
-                return True
+        end = self.scheduled_end_datetime or next_start
+        if end is None:
+            return False
 
-        return False
+        start_ts = dt.timestamp(self.scheduled_start_datetime)
+        return start_ts <= dt.timestamp(now) < dt.timestamp(end)
 
     @property
     def overdue(self) -> bool:
         """If the task is overdue (current time is past end time),
         return True. Else, return False."""
+        return self.overdue_at(dt.now())
+
+    def overdue_at(self, now: dt) -> bool:
+        """Return True if the task is overdue at the given time."""
         if not self.scheduled_start_datetime:
             return False
 
-        now = dt.now()
         now_ts = dt.timestamp(now)
 
         if self["end"] is None:
@@ -1,15 +1,31 @@
 import curses
-import time
-from datetime import datetime
-from typing import List, Tuple
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from taskschedule.config_parser import ConfigParser
 from taskschedule.hooks import run_hooks
 from taskschedule.schedule import Schedule
-from taskschedule.scheduled_task import ScheduledTask
+from taskschedule.task_record import TaskRecord
 from taskschedule.utils import calculate_datetime
 
 BufferType = List[Tuple[int, int, str, int]]
+LineType = List[Tuple[int, str, int]]
+TaskState = Tuple[bool, bool]
+
+# Rows rendered above and below the visible ones, so that scrolling by a few
+# lines does not need a render
+VIEWPORT_MARGIN = 20
+
+
+class Row(NamedTuple):
+    """A row of the schedule: a day divider, an empty hour or a task."""
+
+    kind: str
+    day: str
+    hour: str = ""
+    alternate: bool = False
+    task_num: int = 0
+    task: Optional[TaskRecord] = None
 
 
 class Screen:
@@ -22,6 +38,7 @@ class Screen:
         scheduled_before: datetime,
         hide_projects=False,
         hide_empty=False,
+        hooks_enabled=True,
     ):
         self.config = ConfigParser().config()
         self.scheduled_before = scheduled_before
@@ -33,16 +50,38 @@ class Screen:
         self.stdscr.idlok(True)
         curses.noecho()
 
-        self.pad = curses.newpad(800, 800)
+        self.pad = curses.newpad(1, 1)
+        self.pad_size = (1, 1)
         self.scroll_level = 0
 
         self.hide_projects = hide_projects
         self.hide_empty = hide_empty
         self.buffer: BufferType = []
-        self.prev_buffer: BufferType = []
+
+        # Every row of the schedule, and the range of rows rendered to the
+        # buffer and the pad, where row i is on line i - first_row + 1
+        self.rows: List[Row] = []
+        self.header_buffer: BufferType = []
+        self.first_row = 0
+        self.last_row = 0
+
+        # The records and the date range the rows were built from, to build
+        # them again only when either changes
+        self.rows_records: Optional[List[TaskRecord]] = None
+        self.rows_window: Optional[Tuple[date, date]] = None
+
+        # The hash of every line on screen, to repaint only changed lines.
+        # None until the first draw, or after a full repaint is requested.
+        self.drawn_lines: Optional[Dict[int, int]] = None
         self.init_colors()
 
-        self.current_task = None
+        self.current_task: Optional[TaskRecord] = None
+        self.hooks_enabled = hooks_enabled
+
+        # The time the current frame is rendered at, and the time-dependent
+        # state of each task at that time
+        self.now = datetime.now()
+        self.task_states: Dict[TaskRecord, TaskState] = {}
 
         self.schedule = schedule
 
@@ -111,9 +150,24 @@ class Screen:
             self.COLOR_DIVIDER_TEXT = curses.color_pair(0)
             self.COLOR_BLUE = curses.color_pair(0)
 
-    def get_task_color(self, task: ScheduledTask, alternate: bool) -> int:
+    def get_task_state(self, task: TaskRecord) -> TaskState:
+        """Return whether the given task should be active and whether it is
+        overdue at the time of the current frame."""
+        try:
+            return self.task_states[task]
+        except KeyError:
+            next_start = self.schedule.get_next_start(task)
+            state = (
+                task.should_be_active_at(self.now, next_start),
+                task.overdue_at(self.now),
+            )
+            self.task_states[task] = state
+            return state
+
+    def get_task_color(self, task: TaskRecord, alternate: bool) -> int:
         """Return the color for the given task."""
         color = None
+        should_be_active, overdue = self.get_task_state(task)
 
         if task.completed:
             if alternate:
@@ -122,12 +176,12 @@ class Screen:
                 color = self.COLOR_COMPLETED
         elif task.active:
             color = self.COLOR_ACTIVE
-        elif task.should_be_active:
+        elif should_be_active:
             if alternate:
                 color = self.COLOR_SHOULD_BE_ACTIVE_ALTERNATE
             else:
                 color = self.COLOR_SHOULD_BE_ACTIVE
-        elif task.overdue and not task.completed:
+        elif overdue:
             if alternate:
                 color = self.COLOR_OVERDUE_ALTERNATE
             else:
@@ -145,15 +199,40 @@ class Screen:
         max_y, max_x = self.stdscr.getmaxyx()
         return max_y, max_x
 
-    def scroll(self, lines: int):
-        """Scroll the curses pad by n lines."""
+    def get_visible_rows(self) -> int:
+        """Return the number of rows between the header and the footnote."""
         max_y, max_x = self.get_maxyx()
+        return max(max_y - 3, 1)
+
+    def get_max_scroll_level(self) -> int:
+        """Return the scroll level at which the last row is at the bottom of
+        the screen."""
+        return max(len(self.rows) - self.get_visible_rows(), 0)
+
+    def scroll(self, lines: int):
+        """Scroll the schedule by n lines. Rows are only rendered again when
+        the view leaves the rendered margin."""
         self.scroll_level += lines
+        if self.scroll_level > self.get_max_scroll_level():
+            self.scroll_level = self.get_max_scroll_level()
         if self.scroll_level < 0:
             self.scroll_level = 0
 
+        visible_end = min(self.scroll_level + self.get_visible_rows(), len(self.rows))
+        if self.scroll_level < self.first_row or visible_end > self.last_row:
+            self.render_viewport()
+            self.draw()
+            return
+
         self.stdscr.refresh()
-        self.pad.refresh(self.scroll_level + 1, 0, 1, 0, max_y - 3, max_x - 1)
+        self.refresh_pad()
+
+    def refresh_pad(self):
+        """Copy the visible part of the pad to the screen."""
+        max_y, max_x = self.get_maxyx()
+        self.pad.refresh(
+            self.scroll_level - self.first_row + 1, 0, 1, 0, max_y - 3, max_x - 1
+        )
 
     def prerender_footnote(self) -> str:
         """Pre-render the footnote."""
@@ -261,38 +340,77 @@ class Screen:
         self.stdscr.addstr(max_y - 1, 1, footnote, self.COLOR_DEFAULT)
 
     def draw(self, force=False):
-        """Draw the current buffer."""
+        """Draw the current buffer. Only the lines which changed since the
+        last draw are repainted, unless force is set."""
         max_y, max_x = self.get_maxyx()
+        if force:
+            self.drawn_lines = None
+
         if not self.buffer:
-            self.stdscr.clear()
-            self.stdscr.addstr(0, 0, "No tasks to display.", self.COLOR_DEFAULT)
+            if self.drawn_lines != {}:
+                self.stdscr.clear()
+                self.stdscr.addstr(0, 0, "No tasks to display.", self.COLOR_DEFAULT)
+                self.drawn_lines = {}
             self.draw_footnote()
             self.stdscr.refresh()
-        else:
-            if force or self.prev_buffer != self.buffer:
-                self.pad.clear()
-                if self.prev_buffer > self.buffer:
-                    self.stdscr.clear()
-                    self.stdscr.refresh()
-
-                for line, offset, string, color in self.buffer:
-                    if line == 0:
-                        self.stdscr.addstr(line, offset, string, color)
-                    else:
-                        self.pad.addstr(line, offset, string, color)
-
-            self.draw_footnote()
-            self.pad.refresh(self.scroll_level + 1, 0, 1, 0, max_y - 3, max_x - 1)
+            return
 
-    def render_timeboxes(self, task: ScheduledTask, color: int) -> List[dict]:
+        lines = self.group_lines(self.buffer)
+        if self.drawn_lines is None:
+            self.stdscr.clear()
+            self.pad.clear()
+            drawn_lines: Dict[int, int] = {}
+        else:
+            drawn_lines = self.drawn_lines
+
+        # Clear the lines which are no longer in the buffer
+        for line in drawn_lines.keys() - lines.keys():
+            self.clear_line(line)
+
+        line_hashes: Dict[int, int] = {}
+        for line, parts in lines.items():
+            line_hash = hash(tuple(parts))
+            line_hashes[line] = line_hash
+            if drawn_lines.get(line) == line_hash:
+                continue
+
+            self.clear_line(line)
+            window = self.stdscr if line == 0 else self.pad
+            for offset, string, color in parts:
+                window.addstr(line, offset, string, color)
+
+        self.drawn_lines = line_hashes
+
+        self.draw_footnote()
+        self.stdscr.noutrefresh()
+        self.pad.noutrefresh(
+            self.scroll_level - self.first_row + 1, 0, 1, 0, max_y - 3, max_x - 1
+        )
+        curses.doupdate()
+
+    @staticmethod
+    def group_lines(buffer: BufferType) -> Dict[int, LineType]:
+        """Group the parts of a buffer by line."""
+        lines: Dict[int, LineType] = {}
+        for line, offset, string, color in buffer:
+            lines.setdefault(line, []).append((offset, string, color))
+        return lines
+
+    def clear_line(self, line: int):
+        """Clear a line of the header or the pad."""
+        window = self.stdscr if line == 0 else self.pad
+        window.move(line, 0)
+        window.clrtoeol()
+
+    def render_timeboxes(self, task: TaskRecord, color: int) -> List[dict]:
         """Render a task's timebox column."""
 
         timeboxes: List[dict] = []
         real = 0
-        if task["tb_real"]:
-            real = task["tb_real"]
-            for i in range(task["tb_real"]):
-                if i >= task["tb_estimate"]:
+        if task.tb_real:
+            real = task.tb_real
+            for i in range(task.tb_real):
+                if i >= task.tb_estimate:
                     timeboxes.append(
                         {
                             "char": self.config["timebox"]["underestimated_glyph"],
@@ -303,8 +421,8 @@ class Screen:
                     timeboxes.append(
                         {"char": self.config["timebox"]["done_glyph"], "color": color}
                     )
-        if task["tb_estimate"]:
-            for i in range(task["tb_estimate"] - real):
+        if task.tb_estimate:
+            for i in range(task.tb_estimate - real):
                 timeboxes.append(
                     {"char": self.config["timebox"]["pending_glyph"], "color": color}
                 )
@@ -360,7 +478,7 @@ class Screen:
         date_format = "%a %d %b %Y"
         formatted_date = calculate_datetime(day).strftime(date_format)
         divider_pt2 = " " + formatted_date + " "
-        if day == datetime.now().date().isoformat():
+        if day == self.now.date().isoformat():
             divider_buffer.append(
                 (current_line, len(divider_pt1), divider_pt2, self.COLOR_DIVIDER_ACTIVE)
             )
@@ -383,21 +501,27 @@ class Screen:
 
     def run_hook(self):
         # TODO This does not belong here, move it somewhere appropriate
+        if not self.hooks_enabled:
+            return
+
         current_task = None
-        for task_ in self.schedule.tasks:
-            if task_.should_be_active:
+        for task_ in self.schedule.records:
+            should_be_active, _ = self.get_task_state(task_)
+            if should_be_active:
                 current_task = task_
 
         if current_task is not None:
-            if self.current_task is None:
+            if self.current_task is None or self.current_task.id != current_task.id:
                 self.current_task = current_task
-                if current_task["id"] != 0:
-                    run_hooks("on-progress", data=current_task.as_dict())
-            else:
-                if self.current_task["id"] != current_task["id"]:
-                    self.current_task = current_task
-                    if current_task["id"] != 0:
-                        run_hooks("on-progress", data=current_task.as_dict())
+                if current_task.id != 0:
+                    self.run_progress_hook(current_task)
+
+    def run_progress_hook(self, record: TaskRecord):
+        """Start the on-progress hooks with the full data of the given task.
+        The hooks run in the background, so rendering does not wait on them."""
+        task = self.schedule.tasks_by_uuid.get(record.uuid)
+        if task is not None:
+            run_hooks("on-progress", data=task.as_dict())
 
     def prerender_empty_line(
         self, alternate: bool, current_line: int, hour: int, day: str
@@ -415,8 +539,7 @@ class Screen:
         _buffer.append((current_line, 5, " " * (max_x - 5), color))
 
         # Draw hour column, highlight current hour
-        current_hour = time.localtime().tm_hour
-        if int(hour) == current_hour and day == datetime.now().date().isoformat():
+        if int(hour) == self.now.hour and day == self.now.date().isoformat():
             _buffer.append((current_line, 0, str(hour), self.COLOR_HOUR_CURRENT))
         else:
             _buffer.append((current_line, 0, str(hour), self.COLOR_HOUR))
@@ -426,7 +549,7 @@ class Screen:
     def prerender_task(
         self,
         task_num: int,
-        task: ScheduledTask,
+        task: TaskRecord,
         alternate: bool,
         hour: int,
         current_line: int,
@@ -447,9 +570,8 @@ class Screen:
             hour_ = ""
 
         # Draw hour column, highlight current hour
-        current_hour = time.localtime().tm_hour
         if hour_ != "":
-            if int(hour) == current_hour and day == datetime.now().date().isoformat():
+            if int(hour) == self.now.hour and day == self.now.date().isoformat():
                 _buffer.append((current_line, 0, hour_, self.COLOR_HOUR_CURRENT))
             else:
                 _buffer.append((current_line, 0, hour_, self.COLOR_HOUR))
@@ -457,35 +579,36 @@ class Screen:
         # Fill line to screen length
         _buffer.append((current_line, 5, " " * (max_x - 5), color))
 
-        # Draw glyph column
-        _buffer.append((current_line, 3, task.glyph, self.COLOR_GLYPH))
+        # Draw glyph column, marking tasks which overlap another task
+        if self.schedule.has_conflict(task):
+            glyph = self.config["schedule"]["conflict_glyph"]
+            _buffer.append((current_line, 3, glyph, self.COLOR_OVERDUE))
+        else:
+            _buffer.append((current_line, 3, task.glyph, self.COLOR_GLYPH))
 
         # Draw task id column
-        if task["id"] != 0:
-            _buffer.append((current_line, 5, str(task["id"]), color))
+        if task.id != 0:
+            _buffer.append((current_line, 5, str(task.id), color))
 
         # Draw the time column.
         # Do not show the start time if the task is not scheduled at a
         # specific time, so the column is not cluttered with tasks
         # having start times as 00:00.
         start_dt = task.scheduled_start_datetime
+        end_dt = task.scheduled_end_datetime
         if start_dt:
             if not task.has_scheduled_time:
-                if task.scheduled_end_datetime:
-                    end_time = "{}".format(
-                        task.scheduled_end_datetime.strftime("%H:%M")
-                    )
+                if end_dt:
+                    end_time = "{}".format(end_dt.strftime("%H:%M"))
                     formatted_time = "      {}".format(end_time)
                 else:
                     formatted_time = ""
             else:
                 start_time = "{}".format(start_dt.strftime("%H:%M"))
-                if task.scheduled_end_datetime is None:
+                if end_dt is None:
                     formatted_time = start_time
                 else:
-                    end_time = "{}".format(
-                        task.scheduled_end_datetime.strftime("%H:%M")
-                    )
+                    end_time = "{}".format(end_dt.strftime("%H:%M"))
                     formatted_time = "{}-{}".format(start_time, end_time)
         else:
             formatted_time = ""
@@ -507,11 +630,11 @@ class Screen:
         # Optionally draw project column
         offset = 0
         if not self.hide_projects:
-            if task["project"] is None:
+            if task.project is None:
                 project = ""
             else:
                 max_length = offsets[5] - offsets[4] - 1
-                project = task["project"][0:max_length]
+                project = task.project[0:max_length]
 
             _buffer.append((current_line, offsets[4], project, color))
             offset = offsets[5]
@@ -519,33 +642,47 @@ class Screen:
             offset = offsets[4]
 
         # Draw description column
-        description = task["description"][0 : max_x - offset]
+        description = task.description[0 : max_x - offset]
         _buffer.append((current_line, offset, description, color))
 
         return _buffer
 
-    def refresh_buffer(self):
-        """Refresh the buffer."""
-        max_y, max_x = self.get_maxyx()
-        self.prev_buffer = self.buffer
-        self.buffer = []
-
-        tasks = self.schedule.tasks
+    def refresh_buffer(self, now: Optional[datetime] = None):
+        """Render the visible rows of the schedule to the buffer. The rows
+        are only built again when the tasks or the date range changed. The
+        whole frame is rendered as of a single point in time, which defaults
+        to the current time."""
+        self.now = now or datetime.now()
+        self.task_states = {}
+        self.header_buffer = []
 
         if not self.schedule.tasks:
+            self.rows = []
+            self.rows_records = None
+            self.buffer = []
             return
 
         # Run on-progress hook
         self.run_hook()
 
-        # Add the headers to the buffer
-        header_buffer = self.prerender_headers()
-        for header in header_buffer:
-            self.buffer.append(header)
+        self.header_buffer = self.prerender_headers()
+
+        records = self.schedule.records
+        window = (
+            self.schedule.scheduled_after.date(),
+            self.schedule.scheduled_before.date(),
+        )
+        if records is not self.rows_records or window != self.rows_window:
+            self.rows = self.build_rows()
+            self.rows_records = records
+            self.rows_window = window
+
+        self.render_viewport()
 
-        # Draw schedule
+    def build_rows(self) -> List[Row]:
+        """Return every row of the schedule, without rendering them."""
+        rows: List[Row] = []
         alternate = True
-        current_line = 1
 
         # TODO Hide empty hours again
         # if self.hide_empty:
@@ -567,32 +704,56 @@ class Screen:
                     day_has_tasks = True
 
             if day_has_tasks or not self.hide_empty:
-                divider_buffer = self.prerender_divider(day, current_line)
-                for divider_part in divider_buffer:
-                    self.buffer.append(divider_part)
-
-                current_line += 1
+                rows.append(Row("divider", day))
                 alternate = False
 
             for hour in time_slots[day]:
                 tasks = time_slots[day][hour]
                 if not tasks and not self.hide_empty:
-                    empty_line_buffer = self.prerender_empty_line(
-                        alternate, current_line, hour, day
-                    )
-                    for part in empty_line_buffer:
-                        self.buffer.append(part)
-
-                    current_line += 1
+                    rows.append(Row("empty", day, hour, alternate))
                     alternate = not alternate
 
-                task: ScheduledTask
+                task: TaskRecord
                 for task_num, task in enumerate(tasks):
-                    task_buffer = self.prerender_task(
-                        task_num, task, alternate, hour, current_line, day
-                    )
-                    for part in task_buffer:
-                        self.buffer.append(part)
-
-                    current_line += 1
+                    rows.append(Row("task", day, hour, alternate, task_num, task))
                     alternate = not alternate
+
+        return rows
+
+    def prerender_row(self, row: Row, current_line: int) -> BufferType:
+        """Pre-render a row of the schedule."""
+        if row.kind == "divider":
+            return self.prerender_divider(row.day, current_line)
+        if row.kind == "empty":
+            return self.prerender_empty_line(
+                row.alternate, current_line, row.hour, row.day
+            )
+        return self.prerender_task(
+            row.task_num, row.task, row.alternate, row.hour, current_line, row.day
+        )
+
+    def render_viewport(self):
+        """Render the visible rows and a margin around them to the buffer,
+        resizing the pad to fit them."""
+        max_y, max_x = self.get_maxyx()
+        visible_rows = self.get_visible_rows()
+
+        pad_size = (visible_rows + 2 * VIEWPORT_MARGIN + 2, max_x + 1)
+        if pad_size != self.pad_size:
+            self.pad = curses.newpad(*pad_size)
+            self.pad_size = pad_size
+            self.drawn_lines = None
+
+        # The rows may have shrunk, or the screen grown, since the last scroll
+        if self.scroll_level > self.get_max_scroll_level():
+            self.scroll_level = self.get_max_scroll_level()
+
+        self.first_row = max(self.scroll_level - VIEWPORT_MARGIN, 0)
+        self.last_row = min(
+            self.scroll_level + visible_rows + VIEWPORT_MARGIN, len(self.rows)
+        )
+
+        self.buffer = list(self.header_buffer)
+        for index in range(self.first_row, self.last_row):
+            current_line = index - self.first_row + 1
+            self.buffer.extend(self.prerender_row(self.rows[index], current_line))
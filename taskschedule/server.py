@@ -0,0 +1,298 @@
+"""This module provides `taskschedule serve`, a local HTTP API which keeps the
+schedule loaded and indexed in memory. The tasks are reloaded in the
+background when the task data changes, and every reload starts a new data
+generation.
+
+Responses carry an ETag derived from the generation, so clients polling with
+If-None-Match get an empty 304 response until the answer changes, and never
+cause a `task export`.
+
+The schedule's date range is evaluated again on every reload, and a reload
+also happens when the day changes, so a range like 'today' to 'tomorrow'
+follows the calendar. Queries outside the loaded range are rejected rather
+than answered from the tasks which happen to be loaded."""
+
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+
+from taskschedule.dates import calculate
+from taskschedule.export import format_epoch, to_row
+from taskschedule.schedule import Schedule
+from taskschedule.task_record import TaskRecord
+from taskschedule.watcher import DataWatcher
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Rendered response bodies kept for the current generation
+RESPONSE_CACHE_SIZE = 64
+
+
+class ServerError(Exception):
+    """Raised when the server cannot be started."""
+
+    # pylint: disable=unnecessary-pass
+    pass
+
+
+def format_task(task: Optional[TaskRecord]) -> Optional[Dict[str, object]]:
+    if task is None:
+        return None
+    return to_row(task)
+
+
+def parse_date(value: Optional[str], default: datetime) -> datetime:
+    """Parse a date expression of a query, e.g. 'today+9hr'. Expressions
+    which need `task calc` are rejected rather than run per request."""
+    if value is None:
+        return default
+
+    result = calculate(value)
+    if result is None:
+        raise HTTPException(400, f"Unsupported date expression: {value}")
+    return result
+
+
+def matches_etag(request: Request, etag: str) -> bool:
+    """Return True if the request's If-None-Match header matches the ETag."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def respond(request: Request, etag: str, render: Callable[[], bytes]) -> Response:
+    """Return a 304 response if the client has the current answer, and
+    otherwise render the JSON response."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if matches_etag(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(render(), media_type="application/json", headers=headers)
+
+
+class ScheduleService:
+    """Answer queries from a loaded schedule. A reload builds a new schedule
+    and then replaces the current one with its generation in a single
+    assignment, so requests are answered from a consistent schedule without
+    locking.
+
+    Rendered responses are cached by their ETag, so a client without the
+    current answer only costs a lookup once another client has asked. The
+    cache is only filled for the current generation, under the lock taken
+    to swap generations, so a request which started before a reload cannot
+    leave its answer in the new generation's cache."""
+
+    def __init__(
+        self, schedule: Schedule, load: Optional[Callable[[], Schedule]] = None
+    ):
+        """:param load: return a loaded schedule of the current date range.
+        By default, the range of the given schedule is kept."""
+        schedule.load()
+        self.current: Tuple[int, Schedule] = (1, schedule)
+        self.load_schedule = load or schedule.load_snapshot
+        self.loaded_on = date.today()
+        self.responses: Dict[Tuple[str, ...], bytes] = {}
+        self.lock = threading.Lock()
+        self.stop_read_fd, self.stop_write_fd = os.pipe()
+
+    def render(
+        self,
+        generation: int,
+        key: Tuple[str, ...],
+        build: Callable[[], Dict[str, Any]],
+    ) -> Callable[[], bytes]:
+        """Return a function rendering a response body of the generation,
+        from the cache if it was rendered before."""
+
+        def render() -> bytes:
+            with self.lock:
+                body = self.responses.get(key)
+            if body is not None:
+                return body
+
+            body = json.dumps(build(), ensure_ascii=False).encode("utf8")
+            with self.lock:
+                if self.current[0] == generation:
+                    if len(self.responses) >= RESPONSE_CACHE_SIZE:
+                        self.responses.clear()
+                    self.responses[key] = body
+            return body
+
+        return render
+
+    def reload(self):
+        """Reload the tasks and start a new generation."""
+        loaded_on = date.today()
+        snapshot = self.load_schedule()
+        with self.lock:
+            generation, _ = self.current
+            self.current = (generation + 1, snapshot)
+            self.loaded_on = loaded_on
+            self.responses.clear()
+
+    def watch(self, data_location: str):
+        """Reload the schedule whenever the task data or the day changes,
+        until stop() is called. A failed reload keeps the previous schedule,
+        and one after a change of day is retried every minute."""
+        watcher = DataWatcher(data_location)
+        try:
+            while True:
+                stopped, data_changed = watcher.wait(self.stop_read_fd, 60)
+                if stopped:
+                    return
+
+                if data_changed or date.today() != self.loaded_on:
+                    try:
+                        self.reload()
+                    except Exception as err:
+                        print("Error: {}".format(err), file=sys.stderr)
+        finally:
+            watcher.close()
+
+    def stop(self):
+        """Stop watching the task data."""
+        os.write(self.stop_write_fd, b"\0")
+
+    def close(self):
+        """Close the stop pipe, once the watcher has returned."""
+        os.close(self.stop_read_fd)
+        os.close(self.stop_write_fd)
+
+    def get_schedule(
+        self, request: Request, start: Optional[str], end: Optional[str]
+    ) -> Response:
+        generation, schedule = self.current
+        after = parse_date(start, schedule.scheduled_after)
+        before = parse_date(end, schedule.scheduled_before)
+
+        loaded = (schedule.scheduled_after, schedule.scheduled_before)
+        if (
+            after.timestamp() < loaded[0].timestamp()
+            or before.timestamp() > loaded[1].timestamp()
+        ):
+            raise HTTPException(
+                400,
+                "The range must be within the loaded range, {} to {}".format(
+                    *(value.isoformat() for value in loaded)
+                ),
+            )
+
+        # The answer is a slice of the start time index, which identifies it
+        # within a generation, however the range was written, e.g. with 'now'
+        index = schedule.start_time_index
+        first, last = index.get_bounds(after.timestamp(), before.timestamp())
+
+        def build() -> Dict:
+            return {
+                "generation": generation,
+                "tasks": [to_row(task) for task in index.tasks[first:last]],
+            }
+
+        etag = f'"{generation}-{first}-{last}"'
+        return respond(
+            request, etag, self.render(generation, ("schedule", etag), build)
+        )
+
+    def get_next_task(self, request: Request) -> Response:
+        generation, schedule = self.current
+        now = datetime.now()
+        current = schedule.get_current_task(now)
+        next_task = schedule.start_time_index.get_next(now.timestamp())
+
+        # The answer changes as time passes, not only with the data
+        uuids = [task.uuid if task else "" for task in (current, next_task)]
+        etag = '"{}-{}-{}"'.format(generation, *uuids)
+
+        def build() -> Dict:
+            return {
+                "generation": generation,
+                "current": format_task(current),
+                "next": format_task(next_task),
+            }
+
+        return respond(request, etag, self.render(generation, ("next", etag), build))
+
+    def get_conflicts(self, request: Request) -> Response:
+        generation, schedule = self.current
+
+        def build() -> Dict:
+            return {
+                "generation": generation,
+                "conflicts": [
+                    [to_row(task), to_row(other)]
+                    for task, other in schedule.get_conflicts()
+                ],
+                "free": [
+                    [format_epoch(start.timestamp()), format_epoch(end.timestamp())]
+                    for start, end in schedule.get_free_gaps()
+                ],
+            }
+
+        etag = f'"{generation}"'
+        return respond(
+            request, etag, self.render(generation, ("conflicts", etag), build)
+        )
+
+
+def create_app(service: ScheduleService) -> FastAPI:
+    """Create the API of a schedule service."""
+    app = FastAPI(title="taskschedule")
+
+    @app.get("/schedule")
+    def schedule(
+        request: Request,
+        start: Optional[str] = Query(None, alias="from"),
+        end: Optional[str] = Query(None, alias="to"),
+    ):
+        return service.get_schedule(request, start, end)
+
+    @app.get("/tasks/next")
+    def next_task(request: Request):
+        return service.get_next_task(request)
+
+    @app.get("/conflicts")
+    def conflicts(request: Request):
+        return service.get_conflicts(request)
+
+    return app
+
+
+def serve(
+    schedule: Schedule,
+    data_location: str,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    load: Optional[Callable[[], Schedule]] = None,
+):
+    """Serve the schedule API until interrupted. See ScheduleService for
+    load."""
+    try:
+        import uvicorn
+    except ImportError:
+        raise ServerError(
+            "taskschedule serve needs the server extra: "
+            "pip install 'taskschedule[server]'"
+        )
+
+    service = ScheduleService(schedule, load)
+    watcher = threading.Thread(
+        target=service.watch,
+        args=(data_location,),
+        name="taskschedule-watcher",
+        daemon=True,
+    )
+    watcher.start()
+    try:
+        uvicorn.run(create_app(service), host=host, port=port, log_level="warning")
+    finally:
+        service.stop()
+        watcher.join()
+        service.close()
@@ -0,0 +1,291 @@
+"""This module shares a loaded schedule between taskschedule instances on one
+host. A publisher writes the schedule's records into a memory-mapped file,
+and viewers map the same file and only decode it when its generation
+changes, so viewers neither run Taskwarrior nor watch its data files.
+
+The file starts with a header of a magic string, a generation counter, the
+length of the payload and the window of the published schedule. The payload
+is a JSON array of records. The generation is odd while the publisher
+writes, so viewers retry instead of reading a partial payload. A viewer
+refuses a snapshot of another window than its own."""
+
+import fcntl
+import json
+import mmap
+import os
+import select
+import struct
+import time
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from taskschedule.schedule import Schedule
+from taskschedule.task_record import TaskRecord
+
+MAGIC = b"TSSNAP2\0"
+HEADER = struct.Struct("<8sQQqq?")
+
+INITIAL_SIZE = 64 * 1024
+
+# Seconds between checks of the generation by viewers
+POLL_INTERVAL = 0.5
+
+# Attempts to read a payload while the publisher is writing it
+READ_ATTEMPTS = 50
+READ_RETRY_DELAY = 0.01
+
+# The arguments of TaskRecord, in the order records are encoded in
+RECORD_FIELDS = (
+    "id",
+    "uuid",
+    "scheduled",
+    "estimate",
+    "end",
+    "start",
+    "status",
+    "project",
+    "description",
+    "tb_estimate",
+    "tb_real",
+)
+
+
+class PublisherRunningError(Exception):
+    """Raised when another instance already publishes the snapshot."""
+
+    # pylint: disable=unnecessary-pass
+    pass
+
+
+class SnapshotWindowError(Exception):
+    """Raised when a viewer's window differs from the published one."""
+
+    # pylint: disable=unnecessary-pass
+    pass
+
+
+class SnapshotWindow(NamedTuple):
+    """The date range, as epochs, and the completed filter of a schedule."""
+
+    scheduled_after: int
+    scheduled_before: int
+    show_completed: bool
+
+    @classmethod
+    def create(
+        cls, scheduled_after: datetime, scheduled_before: datetime, show_completed: bool
+    ) -> "SnapshotWindow":
+        return cls(
+            int(scheduled_after.timestamp()),
+            int(scheduled_before.timestamp()),
+            show_completed,
+        )
+
+    def __str__(self) -> str:
+        after = datetime.fromtimestamp(self.scheduled_after)
+        before = datetime.fromtimestamp(self.scheduled_before)
+        window = f"{after:%Y-%m-%d %H:%M} to {before:%Y-%m-%d %H:%M}"
+        if not self.show_completed:
+            window += ", without completed tasks"
+        return window
+
+
+def encode_records(records: List[TaskRecord]) -> bytes:
+    rows = [[getattr(record, name) for name in RECORD_FIELDS] for record in records]
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf8")
+
+
+def decode_records(payload: bytes) -> List[TaskRecord]:
+    return [TaskRecord(*row) for row in json.loads(payload)]
+
+
+class SnapshotWriter:
+    """Publish the records of a schedule of the given window to a snapshot
+    file. Only one writer can hold a snapshot file at a time."""
+
+    def __init__(self, location: str, window: SnapshotWindow):
+        self.location = location
+        self.window = window
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        self.fd = os.open(location, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self.fd)
+            raise PublisherRunningError(f"{location} is already being published")
+
+        if os.fstat(self.fd).st_size < INITIAL_SIZE:
+            os.ftruncate(self.fd, INITIAL_SIZE)
+        self.map = mmap.mmap(self.fd, 0)
+
+        # Continue the generation of a previous publisher, so viewers which
+        # are still running see the change
+        magic, generation = HEADER.unpack_from(self.map, 0)[:2]
+        self.generation = generation + generation % 2 if magic == MAGIC else 0
+        self.published: Optional[List[TaskRecord]] = None
+
+    def publish(self, records: List[TaskRecord]) -> int:
+        """Write the records to the snapshot, unless the same list was
+        published last. Return the generation of the snapshot."""
+        if records is self.published:
+            return self.generation
+
+        payload = encode_records(records)
+        size = HEADER.size + len(payload)
+
+        self.generation += 1
+        HEADER.pack_into(self.map, 0, MAGIC, self.generation, 0, *self.window)
+        if size > len(self.map):
+            new_size = max(size, 2 * len(self.map))
+            os.ftruncate(self.fd, new_size)
+            self.map.resize(new_size)
+
+        self.map[HEADER.size : size] = payload
+        self.generation += 1
+        HEADER.pack_into(
+            self.map, 0, MAGIC, self.generation, len(payload), *self.window
+        )
+
+        self.published = records
+        return self.generation
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+
+class SnapshotReader:
+    """View the schedule published to a snapshot file. The reader stands in
+    for both the data watcher and the schedule loader of the main loop: it
+    wakes up when the generation changes, and hands out a schedule with the
+    new records.
+
+    The schedule must be of the same window as the published one, or
+    reading the snapshot raises SnapshotWindowError."""
+
+    def __init__(self, location: str, schedule: Schedule, window: SnapshotWindow):
+        self.location = location
+        self.schedule = schedule
+        self.window = window
+        self.map: Optional[mmap.mmap] = None
+        self.generation: Optional[int] = None
+
+    def open(self) -> bool:
+        """Map the snapshot file, if it exists and is large enough to hold a
+        header. Return True if the file is mapped."""
+        if self.map is not None:
+            return True
+
+        try:
+            with open(self.location, "rb") as file:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+
+        if len(self.map) < HEADER.size:
+            self.close()
+            return False
+
+        return True
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def get_generation(self) -> Optional[int]:
+        """Return the generation of the snapshot without reading the
+        payload, or None if there is no snapshot."""
+        if not self.open():
+            return None
+
+        magic, generation = HEADER.unpack_from(self.map, 0)[:2]
+        if magic != MAGIC:
+            return None
+        return generation
+
+    def read(self) -> Optional[Tuple[int, List[TaskRecord]]]:
+        """Return the generation and records of the snapshot, or None if
+        there is no complete snapshot."""
+        for _ in range(READ_ATTEMPTS):
+            if not self.open():
+                return None
+
+            magic, generation, length, *window = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC:
+                return None
+
+            published = SnapshotWindow(*window)
+            if published != self.window:
+                raise SnapshotWindowError(
+                    f"the publisher shows {published}, and this viewer "
+                    f"{self.window}; start both with the same --from, --to "
+                    "and --completed options"
+                )
+
+            if generation % 2 == 0:
+                end = HEADER.size + length
+                if end > len(self.map):
+                    # The publisher grew the file since it was mapped
+                    self.close()
+                    continue
+
+                payload = self.map[HEADER.size : end]
+                if HEADER.unpack_from(self.map, 0)[1] == generation:
+                    return generation, decode_records(payload)
+
+            time.sleep(READ_RETRY_DELAY)
+
+        return None
+
+    def changed(self) -> bool:
+        """Return True if the generation changed since the last snapshot was
+        taken."""
+        generation = self.get_generation()
+        return generation is not None and generation != self.generation
+
+    def wait(
+        self, input_fd: int, timeout: float, wake_fd: Optional[int] = None
+    ) -> Tuple[bool, bool]:
+        """Block until input is available on input_fd, the snapshot changes
+        or the timeout expires. Return whether input is available and
+        whether the snapshot changed."""
+        timeout = min(timeout, POLL_INTERVAL)
+        readable, _, _ = select.select([input_fd], [], [], max(timeout, 0))
+        return input_fd in readable, self.changed()
+
+    def request(self):
+        """Snapshots are taken as the publisher writes them, so there is
+        nothing to request."""
+
+    def fileno(self) -> Optional[int]:
+        return None
+
+    def take(self) -> Optional[Schedule]:
+        """Return a schedule of the snapshot's records if the snapshot
+        changed since it was last taken, or None."""
+        if not self.changed():
+            return None
+
+        result = self.read()
+        if result is None:
+            return None
+
+        self.generation, records = result
+        snapshot = Schedule(
+            None,
+            scheduled_after=self.schedule.scheduled_after,
+            scheduled_before=self.schedule.scheduled_before,
+        )
+        snapshot.use_records(records)
+        return snapshot
+
+    def load(self) -> List[TaskRecord]:
+        """Return the records of the snapshot, or no records if nothing has
+        been published yet."""
+        result = self.read()
+        if result is None:
+            return []
+
+        self.generation, records = result
+        return records
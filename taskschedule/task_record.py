@@ -0,0 +1,195 @@
+"""This module provides TaskRecord, a compact read-only snapshot of the task
+fields the schedule report renders."""
+
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from isodate import parse_duration
+
+from taskschedule.scheduled_task import ScheduledTask
+
+
+def to_epoch(value: Optional[datetime]) -> Optional[float]:
+    """Return the POSIX timestamp of a datetime, or None."""
+    if value is None:
+        return None
+    return value.timestamp()
+
+
+def to_datetime(value: Optional[float]) -> Optional[datetime]:
+    """Return a timezone-aware local datetime for a POSIX timestamp, or None."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value).astimezone()
+
+
+class TaskRecord:
+    """A compact, read-only snapshot of a scheduled task. Dates are stored as
+    float epochs, and the scheduled end is computed once from the estimate."""
+
+    __slots__ = (
+        "id",
+        "uuid",
+        "scheduled",
+        "estimate",
+        "end",
+        "start",
+        "status",
+        "project",
+        "description",
+        "tb_estimate",
+        "tb_real",
+        "scheduled_end",
+    )
+
+    id: int
+    uuid: Optional[str]
+    scheduled: Optional[float]
+    estimate: Optional[str]
+    end: Optional[float]
+    start: Optional[float]
+    status: str
+    project: Optional[str]
+    description: str
+    tb_estimate: Optional[int]
+    tb_real: Optional[int]
+    scheduled_end: Optional[float]
+
+    glyph = "○"
+
+    def __init__(
+        self,
+        id: int,
+        uuid: Optional[str],
+        scheduled: Optional[float],
+        estimate: Optional[str],
+        end: Optional[float],
+        start: Optional[float],
+        status: str,
+        project: Optional[str],
+        description: str,
+        tb_estimate: Optional[int] = None,
+        tb_real: Optional[int] = None,
+    ):
+        scheduled_end = None
+        if scheduled is not None and estimate:
+            scheduled_end = scheduled + parse_duration(estimate).total_seconds()
+
+        set_field = object.__setattr__
+        set_field(self, "id", id)
+        set_field(self, "uuid", uuid)
+        set_field(self, "scheduled", scheduled)
+        set_field(self, "estimate", estimate)
+        set_field(self, "end", end)
+        set_field(self, "start", start)
+        set_field(self, "status", status)
+        set_field(self, "project", project)
+        set_field(self, "description", description)
+        set_field(self, "tb_estimate", tb_estimate)
+        set_field(self, "tb_real", tb_real)
+        set_field(self, "scheduled_end", scheduled_end)
+
+    @classmethod
+    def from_task(cls, task: ScheduledTask) -> "TaskRecord":
+        """Take a snapshot of a task."""
+        return cls(
+            id=task["id"],
+            uuid=task["uuid"],
+            scheduled=to_epoch(task["scheduled"]),
+            estimate=task["estimate"],
+            end=to_epoch(task["end"]),
+            start=to_epoch(task["start"]),
+            status=task["status"],
+            project=task["project"],
+            description=task["description"],
+            tb_estimate=task["tb_estimate"],
+            tb_real=task["tb_real"],
+        )
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a field by name, like a task's fields are looked up."""
+        return getattr(self, key)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the fields of the record, with dates as epochs."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"<TaskRecord {self.id}: {self.description}>"
+
+    @property
+    def completed(self) -> bool:
+        return self.status == "completed"
+
+    @property
+    def active(self) -> bool:
+        return self.start is not None
+
+    @property
+    def scheduled_start_datetime(self) -> Optional[datetime]:
+        """Return the task's scheduled start datetime."""
+        return to_datetime(self.scheduled)
+
+    @property
+    def scheduled_end_datetime(self) -> Optional[datetime]:
+        """Return the task's scheduled end datetime."""
+        return to_datetime(self.scheduled_end)
+
+    @property
+    def has_scheduled_time(self) -> bool:
+        """If task's scheduled time is 00:00:00, it has been scheduled for a
+        particular day but not for a specific time. If this is the case,
+        return False."""
+        if self.scheduled is None:
+            return False
+
+        start = time.localtime(self.scheduled)
+        return bool(start.tm_hour or start.tm_min or start.tm_sec or self.scheduled % 1)
+
+    @property
+    def should_be_active(self) -> bool:
+        """Return true if the task should be active."""
+        return self.should_be_active_at(datetime.now())
+
+    def get_active_end(self, next_start: Optional[float] = None) -> Optional[float]:
+        """Return when the task should stop being active: its scheduled end
+        from the estimate, or without an estimate, when the next task starts.
+        The schedule's start time index uses the same definition."""
+        if self.scheduled_end is not None:
+            return self.scheduled_end
+        return next_start
+
+    def should_be_active_at(
+        self, now: datetime, next_start: Optional[float] = None
+    ) -> bool:
+        """Return true if the task should be active at the given time. A task
+        without an estimate should be active until the next task starts, which
+        is given by next_start."""
+        if self.scheduled is None:
+            return False
+
+        end = self.get_active_end(next_start)
+        if end is None:
+            return False
+
+        return self.scheduled <= now.timestamp() < end
+
+    @property
+    def overdue(self) -> bool:
+        """If the task is overdue (current time is past end time),
+        return True. Else, return False."""
+        return self.overdue_at(datetime.now())
+
+    def overdue_at(self, now: datetime) -> bool:
+        """Return True if the task is overdue at the given time."""
+        if self.scheduled is None:
+            return False
+
+        if self.end is None:
+            return now.timestamp() > self.scheduled
+
+        return now.timestamp() > self.end
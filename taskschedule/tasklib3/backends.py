@@ -1,27 +1,53 @@
-from typing import Optional, Sequence, Dict, List, Final
+from typing import Optional, Sequence, Dict, List, Final, Set, Tuple
+from uuid import UUID
+from taskschedule.config_cache import ConfigCache
 from taskschedule.tasklib3.task import Task
 from taskschedule.tasklib3.exceptions import TaskWarriorException, TaskWarriorNotFound
+from taskschedule.tasklib3.query import (
+    CHANGED_CHECKSUMS_QUERY,
+    CHECKSUMS_QUERY,
+    HIGH_WATER_QUERY,
+    UUIDS_QUERY,
+    WindowQuery,
+    register_functions,
+)
+from taskschedule.tasklib3.schedule_index import ScheduleIndex
+from sqlalchemy import String, and_, event, true, type_coerce
 from sqlmodel import Session, create_engine, select
 from pathlib import Path
 from frozendict import frozendict, deepfreeze
 from semver import Version
 
 from loguru import logger
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
 import re
 import subprocess
 import os
 import shutil
-
+import time
 
 CONFIG_REGEX: Final = re.compile(r"^(?P<key>[^\s]+)\s+(?P<value>[^\s].*$)")
 
+# The uuid as stored, skipping the conversion to UUID objects
+RAW_UUID: Final = type_coerce(Task.uuid, String)
+
+# Changed rows are fetched by uuid in chunks of this size
+SYNC_CHUNK_SIZE: Final = 500
+
+# The checksums of all rows are compared at least this often, in seconds, to
+# catch rows written without moving them past the high-water mark
+RECONCILE_INTERVAL: Final = 300.0
+
+# Upper bound on the `task` processes run at once by execute_commands
+MAX_CONCURRENT_COMMANDS: Final = 4
+
 ConfigOption = str | int
 Overrides = Dict[str, str | int]
 
 
 class TaskWarrior:
-    tasks: Sequence[Task]
+    task_map: Dict[UUID, Task]
     task_command: str
     taskrc_location: Optional[Path]
     overrides: Overrides
@@ -32,6 +58,9 @@ class TaskWarrior:
         taskrc_location: Optional[Path] = None,
         filter_obj=True,
         task_command: str = "task",
+        window: Optional[WindowQuery] = None,
+        index_location: Optional[Path] = None,
+        config_cache: Optional[ConfigCache] = None,
     ):
         # Check if `task` exists:
         task_path = shutil.which(task_command)
@@ -53,22 +82,190 @@ class TaskWarrior:
         }
 
         self.taskrc_location = taskrc_location
+        self.config_cache = config_cache
         self.engine = create_engine(f"sqlite:///{data_location}/taskchampion.sqlite3")
-        with Session(self.engine) as session:
-            statement = select(Task).where(filter_obj)
-            self.tasks = session.exec(statement).all()
+        event.listen(self.engine, "connect", register_functions)
+
+        # SQLite's data_version is tracked per connection, so all reads share
+        # a single one.
+        self.connection = self.engine.connect()
+
+        # The window is always filtered with `json_extract` predicates; with a
+        # schedule index the matching rows are looked up by uuid through it.
+        self.schedule_index: Optional[ScheduleIndex] = None
+        if index_location is not None:
+            self.schedule_index = ScheduleIndex(
+                self.connection, Path(data_location), Path(index_location)
+            )
+        if window is not None:
+            filter_obj = and_(filter_obj, window.compile())
+            if self.schedule_index is not None:
+                filter_obj = and_(filter_obj, self.schedule_index.window_clause(window))
+        self.filter_obj = filter_obj
+        self.data_version: Optional[int] = None
+        # The highest rowid at the last sync, and the checksum of each row's
+        # data, by raw uuid
+        self.high_water = 0
+        self.checksums: Optional[Dict[str, Optional[int]]] = None
+        self.reconciled_at = 0.0
+        self.task_map = {}
+        self.sync()
+
+    @property
+    def tasks(self) -> Sequence[Task]:
+        return list(self.task_map.values())
+
+    def get_checksums(self) -> Dict[str, Optional[int]]:
+        """Return the checksum of each row's data, by raw uuid. With a
+        schedule index, these are the ones its last reconciliation computed."""
+        if self.schedule_index is not None:
+            return self.schedule_index.checksums
+        return dict(self.connection.exec_driver_sql(CHECKSUMS_QUERY).all())
+
+    def get_changed_checksums(
+        self, checksums: Dict[str, Optional[int]], count: int
+    ) -> Tuple[Dict[str, Optional[int]], List[str], Set[str]]:
+        """Update the checksums of the last sync with the rows written since
+        the high-water mark, and drop those of deleted rows, given the current
+        row count. Return the checksums, and the uuids of the written and of
+        the deleted rows. Only the written rows are read."""
+        changed = dict(
+            self.connection.exec_driver_sql(
+                CHANGED_CHECKSUMS_QUERY, (self.high_water,)
+            ).all()
+        )
+        checksums.update(changed)
+
+        removed: Set[str] = set()
+        if len(checksums) != count:
+            uuids = self.connection.exec_driver_sql(UUIDS_QUERY).scalars()
+            removed = checksums.keys() - set(uuids)
+            for uuid in removed:
+                del checksums[uuid]
+
+        return checksums, list(changed), removed
+
+    def sync(self) -> List[Task]:
+        """Merge the tasks changed since the last sync into the task map and
+        return them.
+
+        Nothing is read if no other connection has written to the database.
+        Otherwise only the rows written since the highest rowid seen are read,
+        and rows deleted since are found by the row count. The `modified`
+        epochs are not relied on, as rows merged from a sync replica or
+        imported keep their original, older epoch.
+
+        Rows can also be written without moving past the high-water mark,
+        e.g. updated in place. If the database changed but the mark did not
+        move, and at least every RECONCILE_INTERVAL seconds, the checksum of
+        every row's data is compared with the one seen before instead. This
+        costs a scan of the raw data, but no JSON parsing.
+
+        Only added or changed rows are fetched and decoded. If most rows
+        changed, the tasks are reloaded instead."""
+        data_version = self.connection.exec_driver_sql("PRAGMA data_version").scalar()
+        if data_version == self.data_version:
+            return []
+
+        high_water, count = self.connection.exec_driver_sql(HIGH_WATER_QUERY).one()
+        previous = self.checksums
+        reconcile = (
+            previous is None
+            or high_water <= self.high_water
+            or time.monotonic() - self.reconciled_at >= RECONCILE_INTERVAL
+        )
+        if self.schedule_index is not None:
+            self.schedule_index.refresh(reconcile)
+
+        if reconcile:
+            checksums = self.get_checksums()
+            changed = [
+                uuid
+                for uuid, value in checksums.items()
+                if previous is None or previous.get(uuid) != value
+            ]
+            removed = set() if previous is None else previous.keys() - checksums
+            self.reconciled_at = time.monotonic()
+        else:
+            checksums, changed, removed = self.get_changed_checksums(previous, count)
+
+        tasks: List[Task] = []
+        with Session(self.connection) as session:
+            if previous is None or len(changed) > len(checksums) // 2:
+                self.task_map = {}
+                tasks = list(session.exec(select(Task).where(self.filter_obj)).all())
+            else:
+                for uuid in removed:
+                    self.task_map.pop(UUID(uuid), None)
+
+                # Evaluate the filter as a column, so changed rows which no
+                # longer match it are dropped
+                matches = and_(true(), self.filter_obj)
+                for i in range(0, len(changed), SYNC_CHUNK_SIZE):
+                    chunk = changed[i : i + SYNC_CHUNK_SIZE]
+                    rows = session.exec(
+                        select(Task, matches).where(RAW_UUID.in_(chunk))
+                    )
+                    for task, match in rows.all():
+                        self.task_map.pop(task.uuid, None)
+                        if match:
+                            tasks.append(task)
+
+        for task in tasks:
+            self.task_map[task.uuid] = task
+
+        self.checksums = checksums
+        self.high_water = high_water
+        self.data_version = data_version
+        return tasks
 
     @cached_property
     def version(self) -> Version:
-        return Version.parse("".join(self.execute_command(["--version"])))
+        return self._parse_version(self.execute_command(["--version"]))
 
     @cached_property
     def config(self) -> frozendict[str, ConfigOption]:
+        # Read the config from the cache if it is up to date
+        if self.config_cache is not None and self.taskrc_location is not None:
+            return deepfreeze(
+                self.config_cache.load(
+                    str(self.taskrc_location), self._fetch_config, self.task_command
+                )
+            )
+
+        return self._fetch_config()
+
+    def _fetch_config(self) -> frozendict[str, ConfigOption]:
         # If not, fetch the config using the 'show' command
         raw_output = self.execute_command(
             ["show"], config_override={"verbose": "nothing"}
         )
+        return self._parse_config(raw_output)
+
+    def prefetch(self):
+        """Fetch the version and the config with two concurrent `task`
+        processes, instead of one after the other on first access. With a
+        config cache, only the version is fetched if the cache is current."""
+        if "version" in self.__dict__ and "config" in self.__dict__:
+            return
+
+        if self.config_cache is not None:
+            self.config
+            self.version
+            return
+
+        version_output, config_output = self.execute_commands(
+            [["--version"], ["show"]], config_override={"verbose": "nothing"}
+        )
+        self.__dict__["version"] = self._parse_version(version_output)
+        self.__dict__["config"] = self._parse_config(config_output)
+
+    @staticmethod
+    def _parse_version(raw_output: List[str]) -> Version:
+        return Version.parse("".join(raw_output))
 
+    @staticmethod
+    def _parse_config(raw_output: List[str]) -> frozendict[str, ConfigOption]:
         config: Dict[str, str] = dict()
 
         footer = raw_output.pop()
@@ -104,6 +301,14 @@ class TaskWarrior:
         )
         return command_args
 
+    @cached_property
+    def env(self) -> Dict[str, str]:
+        """The environment `task` runs in, built once."""
+        env = os.environ.copy()
+        if self.taskrc_location:
+            env["TASKRC"] = str(self.taskrc_location)
+        return env
+
     def execute_command(
         self,
         args: Sequence[str],
@@ -115,11 +320,8 @@ class TaskWarrior:
 
         logger.debug("Executing `task` command...", command_args=" ".join(command_args))
 
-        env = os.environ.copy()
-        if self.taskrc_location:
-            env["TASKRC"] = str(self.taskrc_location)
         p = subprocess.Popen(
-            command_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env
+            command_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.env
         )
         stdout, stderr = [x.decode("utf-8") for x in p.communicate()]
         if p.returncode and allow_failure:
@@ -138,3 +340,47 @@ class TaskWarrior:
         )
 
         return stdout.rstrip().split("\n")
+
+    def execute_commands(
+        self,
+        commands: Sequence[Sequence[str]],
+        config_override: Optional[Overrides] = None,
+        allow_failure: bool = True,
+    ) -> List[List[str]]:
+        """Run independent commands with one combined override set, at most
+        MAX_CONCURRENT_COMMANDS at a time. Return their output in order."""
+        if len(commands) <= 1:
+            return [
+                self.execute_command(args, config_override, allow_failure)
+                for args in commands
+            ]
+
+        workers = min(len(commands), MAX_CONCURRENT_COMMANDS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(
+                    lambda args: self.execute_command(
+                        args, config_override, allow_failure
+                    ),
+                    commands,
+                )
+            )
+
+    def execute_bulk(
+        self,
+        uuids: Sequence[UUID],
+        command: str,
+        *args: str,
+        config_override: Optional[Overrides] = None,
+    ) -> List[str]:
+        """Run a command such as `start`, `stop` or `modify` on several tasks
+        with a single `task` process. The default overrides are always
+        applied, so `rc.bulk=0` and `rc.confirmation=no` keep Taskwarrior
+        from prompting."""
+        if not uuids:
+            return []
+
+        return self.execute_command(
+            [*(str(uuid) for uuid in uuids), command, *args],
+            config_override=config_override or {},
+        )
@@ -0,0 +1,79 @@
+from typing import Final, List, Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import ColumnElement, Integer, and_, cast
+from sqlmodel import func
+
+from taskschedule.tasklib3.task import Status, Task
+
+import zlib
+
+
+def json_field(name: str) -> ColumnElement:
+    return func.json_extract(Task.data, f"$.{name}")
+
+
+# Epochs are stored as strings inside each task's JSON data
+MODIFIED: Final = cast(json_field("modified"), Integer)
+SCHEDULED: Final = cast(json_field("scheduled"), Integer)
+STATUS: Final = json_field("status")
+
+# The SQL function computing a checksum of a task's raw data, which
+# register_functions adds to every connection
+CHECKSUM_FUNCTION: Final = "task_checksum"
+CHECKSUMS_QUERY: Final = f"SELECT uuid, {CHECKSUM_FUNCTION}(data) FROM main.tasks"
+
+# Taskchampion writes tasks with INSERT OR REPLACE, which gives the written
+# row a rowid above all others. The highest rowid is therefore a high-water
+# mark, and the rows written since one are found through the rowid without
+# a scan. The count, read from the smallest index, reveals deleted rows.
+HIGH_WATER_QUERY: Final = "SELECT coalesce(max(rowid), 0), count(*) FROM main.tasks"
+CHANGED_CHECKSUMS_QUERY: Final = (
+    f"SELECT uuid, {CHECKSUM_FUNCTION}(data) FROM main.tasks WHERE rowid > ?"
+)
+UUIDS_QUERY: Final = "SELECT uuid FROM main.tasks"
+
+
+def checksum(data: Optional[str]) -> Optional[int]:
+    if data is None:
+        return None
+    return zlib.crc32(data.encode("utf-8"))
+
+
+def register_functions(dbapi_connection, connection_record=None):
+    """Add the SQL functions used by the queries to a new connection."""
+    dbapi_connection.create_function(CHECKSUM_FUNCTION, 1, checksum, deterministic=True)
+
+
+class WindowQuery(BaseModel):
+    """Tasks scheduled within a window, optionally without completed ones.
+    Deleted tasks are never included."""
+
+    model_config = ConfigDict(frozen=True)
+
+    scheduled_after: datetime
+    scheduled_before: datetime
+    include_completed: bool = True
+
+    @property
+    def after_epoch(self) -> int:
+        return int(self.scheduled_after.timestamp())
+
+    @property
+    def before_epoch(self) -> int:
+        return int(self.scheduled_before.timestamp())
+
+    @property
+    def excluded_statuses(self) -> List[str]:
+        statuses = [Status.Deleted.value]
+        if not self.include_completed:
+            statuses.append(Status.Completed.value)
+        return statuses
+
+    def compile(self) -> ColumnElement[bool]:
+        """Compile the query to `json_extract` predicates on the tasks table."""
+        return and_(
+            SCHEDULED > self.after_epoch,
+            SCHEDULED < self.before_epoch,
+            STATUS.not_in(self.excluded_statuses),
+        )
@@ -0,0 +1,200 @@
+from typing import Dict, Final, List, Optional, Tuple
+from pathlib import Path
+from sqlalchemy import ColumnElement, Connection, Integer, column, select, table
+
+from taskschedule.tasklib3.query import (
+    CHECKSUM_FUNCTION,
+    CHECKSUMS_QUERY,
+    HIGH_WATER_QUERY,
+    WindowQuery,
+)
+from taskschedule.tasklib3.task import Task
+
+import json
+import os
+
+SCHEMA: Final = "schedule_index"
+
+# Bumped when the tables change, so an index built by an older version is
+# rebuilt instead of misread
+SCHEMA_VERSION: Final = 2
+
+ENTRIES: Final = table(
+    "entries",
+    column("uuid"),
+    column("scheduled", Integer),
+    column("status"),
+    column("checksum", Integer),
+    schema=SCHEMA,
+)
+
+DROP_STATEMENTS: Final = [
+    f"DROP TABLE IF EXISTS {SCHEMA}.entries",
+    f"DROP TABLE IF EXISTS {SCHEMA}.meta",
+]
+
+CREATE_STATEMENTS: Final = [
+    f"""CREATE TABLE IF NOT EXISTS {SCHEMA}.entries (
+        uuid TEXT PRIMARY KEY,
+        scheduled INTEGER,
+        status TEXT,
+        checksum INTEGER
+    )""",
+    f"CREATE INDEX IF NOT EXISTS {SCHEMA}.entries_scheduled ON entries (scheduled)",
+    f"CREATE TABLE IF NOT EXISTS {SCHEMA}.meta (key TEXT PRIMARY KEY, value TEXT)",
+]
+
+UPSERT_STATEMENT: Final = f"""INSERT OR REPLACE INTO {SCHEMA}.entries
+    SELECT
+        uuid,
+        CAST(json_extract(data, '$.scheduled') AS INTEGER),
+        json_extract(data, '$.status'),
+        ?
+    FROM main.tasks
+    WHERE uuid = ?"""
+
+UPSERT_SINCE_STATEMENT: Final = f"""INSERT OR REPLACE INTO {SCHEMA}.entries
+    SELECT
+        uuid,
+        CAST(json_extract(data, '$.scheduled') AS INTEGER),
+        json_extract(data, '$.status'),
+        {CHECKSUM_FUNCTION}(data)
+    FROM main.tasks
+    WHERE rowid > ?"""
+
+DELETE_REMOVED_STATEMENT: Final = f"""DELETE FROM {SCHEMA}.entries
+    WHERE uuid NOT IN (SELECT uuid FROM main.tasks)"""
+
+Stamps = Dict[str, Tuple[int, int]]
+
+
+class ScheduleIndex:
+    """An index of the tasks' scheduled epochs, kept in a side database.
+
+    SQLite can only index a table from within its own database file, so
+    instead of adding an expression index to Taskwarrior's database this
+    keeps an indexed copy of each task's scheduled epoch and status in a
+    separate file. Taskwarrior's database is only ever read.
+
+    A refresh extracts the JSON fields of the rows written since the highest
+    rowid indexed, as the backend's change feed does. Each entry also holds
+    the checksum of the row it was extracted from, so that rows written
+    without moving past the high-water mark are found by comparing the
+    checksums of all rows, when the backend reconciles."""
+
+    def __init__(self, connection: Connection, data_location: Path, location: Path):
+        self.connection = connection
+        self.database_files: List[Path] = [
+            data_location / "taskchampion.sqlite3",
+            data_location / "taskchampion.sqlite3-wal",
+        ]
+
+        # The checksums of the rows at the last reconciliation, by raw uuid
+        self.checksums: Dict[str, Optional[int]] = {}
+
+        location.parent.mkdir(parents=True, exist_ok=True)
+        connection.exec_driver_sql(f"ATTACH DATABASE ? AS {SCHEMA}", (str(location),))
+        version = connection.exec_driver_sql(f"PRAGMA {SCHEMA}.user_version").scalar()
+        if version != SCHEMA_VERSION:
+            for statement in DROP_STATEMENTS:
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql(
+                f"PRAGMA {SCHEMA}.user_version = {SCHEMA_VERSION}"
+            )
+        for statement in CREATE_STATEMENTS:
+            connection.exec_driver_sql(statement)
+        connection.commit()
+
+    def get_stamps(self) -> Stamps:
+        stamps: Stamps = {}
+        for path in self.database_files:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stamps[path.name] = (stat.st_mtime_ns, stat.st_size)
+
+        return stamps
+
+    def get_meta(self, key: str) -> Optional[str]:
+        return self.connection.exec_driver_sql(
+            f"SELECT value FROM {SCHEMA}.meta WHERE key = ?", (key,)
+        ).scalar()
+
+    def set_meta(self, key: str, value: str):
+        self.connection.exec_driver_sql(
+            f"INSERT OR REPLACE INTO {SCHEMA}.meta (key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    def refresh(self, reconcile: bool = False) -> bool:
+        """Bring the index up to date with Taskwarrior's database. Return
+        False if the database files are unchanged since the last refresh, in
+        which case nothing is read.
+
+        Only the rows written since the last refresh are extracted, unless
+        reconcile is set or the high-water mark did not move. The checksums
+        of all rows are then compared with those of the entries instead."""
+        stamps = json.dumps(self.get_stamps())
+        if stamps == self.get_meta("stamps") and not reconcile:
+            return False
+
+        high_water, count = self.connection.exec_driver_sql(HIGH_WATER_QUERY).one()
+        indexed_high_water = int(self.get_meta("high_water") or 0)
+        if reconcile or high_water <= indexed_high_water:
+            self.reconcile()
+        else:
+            self.connection.exec_driver_sql(
+                UPSERT_SINCE_STATEMENT, (indexed_high_water,)
+            )
+            entry_count = self.connection.exec_driver_sql(
+                f"SELECT count(*) FROM {SCHEMA}.entries"
+            ).scalar()
+            if entry_count != count:
+                self.connection.exec_driver_sql(DELETE_REMOVED_STATEMENT)
+
+        self.set_meta("stamps", stamps)
+        self.set_meta("high_water", str(high_water))
+        self.connection.commit()
+        return True
+
+    def reconcile(self):
+        """Extract the rows whose checksum differs from their entry's, and
+        delete the entries of removed rows. This computes the checksum of
+        every row, a scan of the raw data without JSON parsing."""
+        entries = self.get_entry_checksums()
+        checksums = dict(self.connection.exec_driver_sql(CHECKSUMS_QUERY).all())
+
+        changed = [
+            (value, uuid)
+            for uuid, value in checksums.items()
+            if uuid not in entries or entries[uuid] != value
+        ]
+        if changed:
+            self.connection.exec_driver_sql(UPSERT_STATEMENT, changed)
+
+        removed = [(uuid,) for uuid in entries.keys() - checksums.keys()]
+        if removed:
+            self.connection.exec_driver_sql(
+                f"DELETE FROM {SCHEMA}.entries WHERE uuid = ?", removed
+            )
+
+        self.checksums = checksums
+
+    def get_entry_checksums(self) -> Dict[str, Optional[int]]:
+        return dict(
+            self.connection.exec_driver_sql(
+                f"SELECT uuid, checksum FROM {SCHEMA}.entries"
+            ).all()
+        )
+
+    def window_clause(self, window: WindowQuery) -> ColumnElement[bool]:
+        """Return a clause matching the tasks in the window, looked up through
+        the index."""
+        return Task.uuid.in_(  # type: ignore[attr-defined]
+            select(ENTRIES.c.uuid).where(
+                ENTRIES.c.scheduled > window.after_epoch,
+                ENTRIES.c.scheduled < window.before_epoch,
+                ENTRIES.c.status.not_in(window.excluded_statuses),
+            )
+        )
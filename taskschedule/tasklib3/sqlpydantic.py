@@ -1,15 +1,17 @@
-from typing import Generic, TypeVar, List, Callable, Any, Optional
+from typing import Generic, TypeVar, List, Callable, Any, Optional, Dict, get_args
 from typing_extensions import Annotated
 from sqlmodel import TypeDecorator, JSON
 from pydantic import (
-    parse_obj_as,
+    TypeAdapter,
     PlainSerializer,
     WithJsonSchema,
     BeforeValidator,
 )
-from fastapi.encoders import jsonable_encoder
+from pydantic.fields import FieldInfo
 from pydantic._internal._model_construction import ModelMetaclass
 from datetime import datetime
+from enum import Enum
+from uuid import UUID
 import json
 
 T = TypeVar("T")
@@ -29,18 +31,95 @@ Epoch = Annotated[
 ]
 
 
+def trusted_converter(field: FieldInfo) -> Optional[Callable[[Any], Any]]:
+    """Return the conversion the field's validation would apply to a valid raw
+    value, or None if the raw value can be used as is."""
+    for metadata in field.metadata:
+        if isinstance(metadata, BeforeValidator):
+            return metadata.func
+
+    for annotation in (field.annotation, *get_args(field.annotation)):
+        for metadata in getattr(annotation, "__metadata__", ()):
+            if isinstance(metadata, BeforeValidator):
+                return metadata.func
+        if isinstance(annotation, type) and issubclass(annotation, (Enum, UUID)):
+            return annotation
+
+    return None
+
+
+def trusted_decoder(pydantic_type) -> Callable[[Dict[str, Any]], Any]:
+    """Build a decoder for data read from a trusted source, such as the rows
+    Taskwarrior itself wrote. Field values are converted like validation
+    would convert them, but nothing is validated and unknown keys are
+    dropped.
+
+    This does what `model_construct` does, minus its per-call introspection
+    of the default factories."""
+    fields = pydantic_type.model_fields
+    converters = {
+        name: converter
+        for name, field in fields.items()
+        if (converter := trusted_converter(field)) is not None
+    }
+    defaults = {
+        name: field.default
+        for name, field in fields.items()
+        if field.default_factory is None
+    }
+    default_factories = {
+        name: field.default_factory
+        for name, field in fields.items()
+        if field.default_factory is not None
+    }
+
+    def decode(value: Dict[str, Any]):
+        fields_set = value.keys() & fields.keys()
+        values = defaults.copy()
+        for name in fields_set:
+            values[name] = value[name]
+        for name in fields_set & converters.keys():
+            if values[name] is not None:
+                values[name] = converters[name](values[name])
+        for name, default_factory in default_factories.items():
+            if name not in fields_set:
+                values[name] = default_factory()
+
+        obj = pydantic_type.__new__(pydantic_type)
+        object.__setattr__(obj, "__dict__", values)
+        object.__setattr__(obj, "__pydantic_fields_set__", fields_set)
+        object.__setattr__(obj, "__pydantic_extra__", None)
+        object.__setattr__(obj, "__pydantic_private__", None)
+        return obj
+
+    return decode
+
+
 def pydantic_column_type(pydantic_type):
+    strict_decoder = TypeAdapter(pydantic_type).validate_python
+    fast_decoder = trusted_decoder(pydantic_type)
+
     class PydanticJSONType(TypeDecorator, Generic[T]):
+        """Store a pydantic type as JSON. Writes are always validated; with
+        `trusted_reads`, rows are decoded without validation."""
+
         impl = JSON()
+        cache_ok = True
 
         def __init__(
             self,
             json_encoder=json,
+            trusted_reads: bool = False,
         ):
             self.json_encoder = json_encoder
+            self.trusted_reads = trusted_reads
             super(PydanticJSONType, self).__init__()
 
         def bind_processor(self, dialect):
+            # Imported on first write, as fastapi is slow to import and reads
+            # never need it
+            from fastapi.encoders import jsonable_encoder
+
             impl_processor = self.impl.bind_processor(dialect)
             dumps = self.json_encoder.dumps
             if impl_processor:
@@ -76,6 +155,7 @@ def pydantic_column_type(pydantic_type):
 
         def result_processor(self, dialect, coltype) -> Callable[[Any], Optional[T]]:
             impl_processor = self.impl.result_processor(dialect, coltype)
+            decode = fast_decoder if self.trusted_reads else strict_decoder
             if impl_processor:
 
                 def process(value) -> Optional[T]:
@@ -83,10 +163,7 @@ def pydantic_column_type(pydantic_type):
                     if value is None:
                         return None
 
-                    data = value
-                    # Explicitly use the generic directly, not type(T)
-                    full_obj = parse_obj_as(pydantic_type, data)
-                    return full_obj
+                    return decode(value)
 
             else:
 
@@ -94,9 +171,7 @@ def pydantic_column_type(pydantic_type):
                     if value is None:
                         return None
 
-                    # Explicitly use the generic directly, not type(T)
-                    full_obj = parse_obj_as(pydantic_type, value)
-                    return full_obj
+                    return decode(value)
 
             return process
 
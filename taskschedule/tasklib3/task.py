@@ -49,5 +49,7 @@ class Task(SQLModel, table=True):  # type: ignore[call-arg]
     __tablename__: str = "tasks"  # type: ignore[misc]
     uuid: UUID = Field(default_factory=uuid4, primary_key=True)
     data: TaskData = Field(
-        default_factory=TaskData, sa_column=Column(pydantic_column_type(TaskData))
+        default_factory=TaskData,
+        # Rows are written by Taskwarrior itself, so reads skip validation
+        sa_column=Column(pydantic_column_type(TaskData)(trusted_reads=True)),
     )
@@ -1,5 +1,338 @@
+import json
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from sqlmodel import func
+
+from taskschedule.config_cache import ConfigCache
+from taskschedule.tasklib3 import query
 from taskschedule.tasklib3.backends import TaskWarrior
+from taskschedule.tasklib3.query import WindowQuery
+from taskschedule.tasklib3.task import Task
 
 
 def test_import():
     tw = TaskWarrior("./test_data", taskrc_location="./test_data/taskrc")
+
+
+def write_task(connection, uuid, **data):
+    data.setdefault("status", "pending")
+    data.setdefault("modified", str(int(time.time())))
+    connection.execute(
+        "INSERT OR REPLACE INTO tasks (uuid, data) VALUES (?, ?)",
+        (str(uuid), json.dumps(data)),
+    )
+    connection.commit()
+
+
+def update_task(connection, uuid, **data):
+    """Rewrite a task in place, keeping its rowid."""
+    data.setdefault("status", "pending")
+    connection.execute(
+        "UPDATE tasks SET data = ? WHERE uuid = ?", (json.dumps(data), str(uuid))
+    )
+    connection.commit()
+
+
+@pytest.fixture
+def checksum_calls(monkeypatch):
+    """Count the rows the task_checksum SQL function is computed for."""
+    calls = []
+
+    def checksum(data):
+        calls.append(data)
+        return zlib.crc32(data.encode("utf-8"))
+
+    monkeypatch.setattr(query, "checksum", checksum)
+    return calls
+
+
+@pytest.fixture
+def data_location(tmp_path):
+    connection = sqlite3.connect(tmp_path / "taskchampion.sqlite3")
+    connection.execute("CREATE TABLE tasks (uuid STRING PRIMARY KEY, data STRING)")
+    for i in range(10):
+        write_task(connection, uuid4(), description=f"task {i}", modified=str(1000 + i))
+    connection.close()
+    return tmp_path
+
+
+class TestSync:
+    def test_sync_without_changes_fetches_nothing(self, data_location):
+        tw = TaskWarrior(data_location)
+        assert len(tw.tasks) == 10
+        assert tw.sync() == []
+
+    def test_sync_merges_changed_tasks(self, data_location):
+        tw = TaskWarrior(data_location)
+        uuid = tw.tasks[0].uuid
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            write_task(connection, uuid, description="changed", modified="2000")
+
+        changed = tw.sync()
+        assert [task.uuid for task in changed] == [uuid]
+        assert tw.task_map[uuid].data.description == "changed"
+        assert len(tw.tasks) == 10
+
+    def test_sync_adds_new_tasks(self, data_location):
+        tw = TaskWarrior(data_location)
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            write_task(connection, uuid4(), description="new", modified="2000")
+
+        assert len(tw.sync()) == 1
+        assert len(tw.tasks) == 11
+
+    def test_sync_merges_rows_with_older_modified(self, data_location):
+        tw = TaskWarrior(data_location)
+        uuid = tw.tasks[-1].uuid
+
+        # e.g. a task merged from a sync replica, which keeps its timestamp
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            write_task(connection, uuid, description="merged", modified="500")
+
+        assert [task.uuid for task in tw.sync()] == [uuid]
+        assert tw.task_map[uuid].data.description == "merged"
+        assert len(tw.tasks) == 10
+
+    def test_sync_reads_only_written_rows(self, data_location, checksum_calls):
+        tw = TaskWarrior(data_location)
+        checksum_calls.clear()
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            write_task(connection, tw.tasks[0].uuid, description="changed")
+
+        assert len(tw.sync()) == 1
+        assert len(checksum_calls) == 1
+
+    def test_sync_reconciles_rows_updated_in_place(self, data_location):
+        tw = TaskWarrior(data_location)
+        uuid = tw.tasks[0].uuid
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            update_task(connection, uuid, description="updated", modified="500")
+
+        assert [task.uuid for task in tw.sync()] == [uuid]
+        assert tw.task_map[uuid].data.description == "updated"
+
+    def test_sync_follows_rows_written_below_high_water_mark(self, data_location):
+        tw = TaskWarrior(data_location)
+        removed = [task.uuid for task in tw.tasks[-2:]]
+
+        # The new row takes a rowid at or below the last one seen
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            for uuid in removed:
+                connection.execute("DELETE FROM tasks WHERE uuid = ?", (str(uuid),))
+            write_task(connection, uuid4(), description="new")
+
+        assert [task.data.description for task in tw.sync()] == ["new"]
+        assert not set(removed) & tw.task_map.keys()
+        assert len(tw.tasks) == 9
+
+    def test_sync_drops_tasks_no_longer_matching_filter(self, data_location):
+        status = func.json_extract(Task.data, "$.status")
+        tw = TaskWarrior(data_location, filter_obj=status != "deleted")
+        uuid = tw.tasks[0].uuid
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            write_task(connection, uuid, status="deleted", modified="2000")
+
+        assert uuid not in [task.uuid for task in tw.sync()]
+        assert uuid not in tw.task_map
+        assert len(tw.tasks) == 9
+
+    def test_sync_drops_purged_tasks(self, data_location):
+        tw = TaskWarrior(data_location)
+        uuid = tw.tasks[0].uuid
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            connection.execute("DELETE FROM tasks WHERE uuid = ?", (str(uuid),))
+
+        assert tw.sync() == []
+        assert uuid not in tw.task_map
+        assert len(tw.tasks) == 9
+
+    def test_sync_reloads_when_most_rows_changed(self, data_location):
+        tw = TaskWarrior(data_location)
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            for task in tw.tasks:
+                write_task(connection, task.uuid, description="changed")
+
+        assert len(tw.sync()) == 10
+        assert {task.data.description for task in tw.tasks} == {"changed"}
+
+
+class TestWindowQuery:
+    @pytest.fixture
+    def window(self):
+        return WindowQuery(
+            scheduled_after=datetime.fromtimestamp(1500),
+            scheduled_before=datetime.fromtimestamp(4500),
+            include_completed=False,
+        )
+
+    @pytest.fixture
+    def data_location(self, tmp_path):
+        connection = sqlite3.connect(tmp_path / "taskchampion.sqlite3")
+        connection.execute("CREATE TABLE tasks (uuid STRING PRIMARY KEY, data STRING)")
+        for i, status in enumerate(["pending", "pending", "completed", "deleted"]):
+            write_task(
+                connection,
+                uuid4(),
+                description=f"task {i}",
+                status=status,
+                scheduled=str(1000 * (i + 1)),
+                modified=str(1000 + i),
+            )
+        connection.close()
+        return tmp_path
+
+    def test_window_filters_tasks(self, data_location, window):
+        tw = TaskWarrior(data_location, window=window)
+        assert [task.data.description for task in tw.tasks] == ["task 1"]
+
+    def test_window_includes_completed_tasks(self, data_location, window):
+        window = window.model_copy(update={"include_completed": True})
+        tw = TaskWarrior(data_location, window=window)
+        assert {task.data.description for task in tw.tasks} == {"task 1", "task 2"}
+
+    def test_schedule_index_does_not_touch_database(self, data_location, window):
+        database = data_location / "taskchampion.sqlite3"
+        stamp = database.stat().st_mtime_ns
+        index_location = data_location / "index" / "schedule.sqlite3"
+
+        tw = TaskWarrior(data_location, window=window, index_location=index_location)
+        assert [task.data.description for task in tw.tasks] == ["task 1"]
+        assert index_location.exists()
+        assert database.stat().st_mtime_ns == stamp
+
+    def test_schedule_index_follows_changes(self, data_location, window):
+        index_location = data_location / "schedule.sqlite3"
+        tw = TaskWarrior(data_location, window=window, index_location=index_location)
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            write_task(connection, uuid4(), description="new", scheduled="3000")
+
+        tw.sync()
+        assert {task.data.description for task in tw.tasks} == {"task 1", "new"}
+
+        # A second instance reuses the index built by the first one
+        tw = TaskWarrior(data_location, window=window, index_location=index_location)
+        assert {task.data.description for task in tw.tasks} == {"task 1", "new"}
+
+    def test_schedule_index_follows_rows_with_older_modified(
+        self, data_location, window
+    ):
+        index_location = data_location / "schedule.sqlite3"
+        tw = TaskWarrior(data_location, window=window, index_location=index_location)
+        uuid = tw.tasks[0].uuid
+
+        # Moved out of the window by a write which keeps an old timestamp
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            write_task(connection, uuid, scheduled="9000", modified="10")
+
+        tw.sync()
+        assert tw.tasks == []
+
+    def test_schedule_index_follows_rows_updated_in_place(self, data_location, window):
+        index_location = data_location / "schedule.sqlite3"
+        tw = TaskWarrior(data_location, window=window, index_location=index_location)
+        uuid = tw.tasks[0].uuid
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            update_task(connection, uuid, scheduled="9000")
+
+        tw.sync()
+        assert tw.tasks == []
+
+    def test_schedule_index_reads_only_written_rows(
+        self, data_location, window, checksum_calls
+    ):
+        index_location = data_location / "schedule.sqlite3"
+        tw = TaskWarrior(data_location, window=window, index_location=index_location)
+        checksum_calls.clear()
+
+        with sqlite3.connect(data_location / "taskchampion.sqlite3") as connection:
+            write_task(connection, uuid4(), description="new", scheduled="3000")
+
+        tw.sync()
+        assert {task.data.description for task in tw.tasks} == {"task 1", "new"}
+        # Once for the index entry, once for the change feed
+        assert len(checksum_calls) == 2
+
+    def test_schedule_index_of_older_version_is_rebuilt(self, data_location, window):
+        index_location = data_location / "schedule.sqlite3"
+        with sqlite3.connect(index_location) as connection:
+            connection.execute(
+                "CREATE TABLE entries (uuid TEXT PRIMARY KEY, scheduled INTEGER,"
+                " status TEXT, modified INTEGER)"
+            )
+
+        tw = TaskWarrior(data_location, window=window, index_location=index_location)
+        assert [task.data.description for task in tw.tasks] == ["task 1"]
+
+
+FAKE_TASK = """#!/bin/sh
+for last; do :; done
+case "$last" in
+    --version) echo 3.0.1 ;;
+    show) printf '\\nVariable Value\\n-------- -----\\nuda.estimate.type duration\\n' ;;
+    *) echo "$@" ;;
+esac
+"""
+
+
+@pytest.fixture
+def fake_task(tmp_path):
+    path = tmp_path / "task"
+    path.write_text(FAKE_TASK)
+    path.chmod(0o755)
+    return str(path)
+
+
+class TestCommands:
+    def test_execute_commands_keeps_order(self, data_location, fake_task):
+        tw = TaskWarrior(data_location, task_command=fake_task)
+        results = tw.execute_commands([["a"], ["b"], ["c"]])
+        assert results == [["a"], ["b"], ["c"]]
+
+    def test_prefetch(self, data_location, fake_task):
+        tw = TaskWarrior(data_location, task_command=fake_task)
+        tw.prefetch()
+        assert "version" in tw.__dict__
+        assert str(tw.version) == "3.0.1"
+        assert tw.config["uda.estimate.type"] == "duration"
+
+    def test_execute_bulk(self, data_location, fake_task):
+        tw = TaskWarrior(data_location, task_command=fake_task)
+        uuids = [uuid4(), uuid4()]
+        output = tw.execute_bulk(uuids, "modify", "project:home")[0].split()
+
+        assert "rc.bulk=0" in output
+        assert "rc.confirmation=no" in output
+        assert output[-4:] == [str(uuids[0]), str(uuids[1]), "modify", "project:home"]
+
+    def test_config_cache(self, data_location, fake_task, tmp_path):
+        taskrc = tmp_path / "taskrc"
+        taskrc.write_text("uda.estimate.type=duration\n")
+        cache = ConfigCache(str(tmp_path / "cache"))
+
+        tw = TaskWarrior(
+            data_location, taskrc, task_command=fake_task, config_cache=cache
+        )
+        assert tw.config["uda.estimate.type"] == "duration"
+
+        def fetch_config():
+            raise AssertionError("config was not read from the cache")
+
+        tw = TaskWarrior(
+            data_location, taskrc, task_command=fake_task, config_cache=cache
+        )
+        tw._fetch_config = fetch_config
+        assert tw.config["uda.estimate.type"] == "duration"
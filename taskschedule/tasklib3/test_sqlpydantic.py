@@ -0,0 +1,41 @@
+from pydantic import TypeAdapter
+
+from taskschedule.tasklib3.sqlpydantic import trusted_decoder
+from taskschedule.tasklib3.task import Priority, Status, TaskData
+
+ROW = {
+    "description": "Test task",
+    "entry": "1700000000",
+    "scheduled": "1700003600",
+    "status": "pending",
+    "priority": "H",
+    "parent": "7b5c4b3e-3a4a-4b7e-9b1a-1b2c3d4e5f60",
+    "tags": "one,two",
+    "estimate": "PT30M",
+}
+
+
+def test_trusted_decoder_matches_validation():
+    decoded = trusted_decoder(TaskData)(ROW)
+    validated = TypeAdapter(TaskData).validate_python(ROW)
+
+    assert decoded == validated
+    assert decoded.model_dump() == validated.model_dump()
+    assert decoded.model_fields_set == validated.model_fields_set
+
+
+def test_trusted_decoder_converts_fields():
+    decoded = trusted_decoder(TaskData)(ROW)
+
+    assert decoded.scheduled.timestamp() == 1700003600
+    assert decoded.status is Status.Pending
+    assert decoded.priority is Priority.H
+    assert decoded.tags == ["one", "two"]
+
+
+def test_trusted_decoder_uses_fresh_defaults():
+    decode = trusted_decoder(TaskData)
+    first = decode({"description": "first"})
+    second = decode({"description": "second"})
+
+    assert first.depends == [] and first.depends is not second.depends
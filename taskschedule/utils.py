@@ -1,12 +1,18 @@
 from datetime import datetime
 
+from taskschedule.dates import calculate
 from taskschedule.scheduled_task import ScheduledTask
 from taskschedule.taskwarrior import PatchedTaskWarrior
 
 
 def calculate_datetime(date_str: str) -> datetime:
-    """Leverage the `task calc` command to convert a date-like string
-    to a datetime object."""
+    """Convert a date-like string to a datetime object. Supported expressions
+    are evaluated in-process; anything else falls back to the `task calc`
+    command."""
+
+    result = calculate(date_str)
+    if result is not None:
+        return result
 
     tw = PatchedTaskWarrior()
     task = ScheduledTask(tw, description="dummy")
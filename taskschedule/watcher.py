@@ -0,0 +1,137 @@
+"""This module provides a DataWatcher, which blocks until a key is pressed or
+the Taskwarrior data files change. Changes are picked up through inotify where
+available, with a low-frequency stat() poll as a fallback."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from typing import Dict, List, Optional, Tuple
+
+# See inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+EVENT_HEADER = struct.Struct("iIII")
+EVENT_BUFFER_SIZE = 4096
+
+# Taskwarrior 2 keeps its data in *.data files, Taskwarrior 3 in a SQLite
+# database which is written through its write-ahead log.
+DATA_FILES = (
+    "pending.data",
+    "completed.data",
+    "taskchampion.sqlite3",
+    "taskchampion.sqlite3-wal",
+)
+
+# Seconds between stat() polls when inotify is not available
+POLL_INTERVAL = 1.0
+
+Stamps = Dict[str, Tuple[int, int]]
+
+
+def init_inotify(directory: str) -> Optional[int]:
+    """Return an inotify file descriptor watching the given directory, or
+    None if inotify is not available on this platform."""
+    libc_name = ctypes.util.find_library("c")
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+    fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        return None
+
+    if inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+
+    return fd
+
+
+class DataWatcher:
+    """Watch a Taskwarrior data directory for changes."""
+
+    def __init__(self, data_location: str):
+        self.data_location = data_location
+        self.stamps: Stamps = self.get_stamps()
+        self.inotify_fd: Optional[int] = init_inotify(data_location)
+
+    def close(self):
+        """Stop watching the data directory."""
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
+
+    def get_stamps(self) -> Stamps:
+        """Return the modification time and size of every data file."""
+        stamps: Stamps = {}
+        for filename in DATA_FILES:
+            try:
+                stat = os.stat(os.path.join(self.data_location, filename))
+            except FileNotFoundError:
+                continue
+            stamps[filename] = (stat.st_mtime_ns, stat.st_size)
+
+        return stamps
+
+    def poll(self) -> bool:
+        """Return True if a data file changed since the last poll."""
+        stamps = self.get_stamps()
+        if stamps != self.stamps:
+            self.stamps = stamps
+            return True
+
+        return False
+
+    def read_events(self) -> bool:
+        """Drain the pending inotify events. Return True if any of them
+        concerns a data file."""
+        changed = False
+        while self.inotify_fd is not None:
+            try:
+                data = os.read(self.inotify_fd, EVENT_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if os.fsdecode(name) in DATA_FILES:
+                    changed = True
+
+        return changed
+
+    def wait(
+        self, input_fd: int, timeout: float, wake_fd: Optional[int] = None
+    ) -> Tuple[bool, bool]:
+        """Block until input is available on input_fd, a data file changes,
+        wake_fd becomes readable or the timeout expires. Return whether input
+        is available and whether the data changed."""
+        fds: List[int] = [input_fd]
+        if wake_fd is not None:
+            fds.append(wake_fd)
+        if self.inotify_fd is not None:
+            fds.append(self.inotify_fd)
+        else:
+            timeout = min(timeout, POLL_INTERVAL)
+
+        readable, _, _ = select.select(fds, [], [], max(timeout, 0))
+
+        if self.inotify_fd is None:
+            data_changed = self.poll()
+        else:
+            data_changed = self.inotify_fd in readable and self.read_events()
+
+        return input_fd in readable, data_changed
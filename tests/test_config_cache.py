@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from taskschedule.config_cache import ConfigCache, find_includes
+
+
+@pytest.fixture
+def taskrc(tmp_path):
+    theme = tmp_path / "theme.rc"
+    theme.write_text("color.active=green\n")
+    taskrc = tmp_path / ".taskrc"
+    taskrc.write_text("uda.estimate.type=duration\ninclude theme.rc\n")
+    return taskrc
+
+
+class ConfigFetcher:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"uda.estimate.type": "duration", "calls": self.calls}
+
+
+def test_find_includes(taskrc):
+    assert find_includes(str(taskrc)) == [str(taskrc.parent / "theme.rc")]
+
+
+def test_cache_hit_skips_fetch(tmp_path, taskrc):
+    cache = ConfigCache(str(tmp_path / "cache"))
+    fetch = ConfigFetcher()
+
+    config = cache.load(str(taskrc), fetch, task_command="sh")
+    assert config == {"uda.estimate.type": "duration", "calls": "1"}
+
+    assert cache.load(str(taskrc), fetch, task_command="sh") == config
+    assert fetch.calls == 1
+
+
+def test_changed_include_invalidates_cache(tmp_path, taskrc):
+    cache = ConfigCache(str(tmp_path / "cache"))
+    fetch = ConfigFetcher()
+    cache.load(str(taskrc), fetch, task_command="sh")
+
+    theme = taskrc.parent / "theme.rc"
+    theme.write_text("color.active=red\n")
+    stat = theme.stat()
+    os.utime(theme, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.load(str(taskrc), fetch, task_command="sh")["calls"] == "2"
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+
+from taskschedule.dates import DateExpressionError, calculate, evaluate
+
+NOW = datetime(2019, 12, 7, 15, 30)
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("today", datetime(2019, 12, 7)),
+        ("tomorrow", datetime(2019, 12, 8)),
+        ("eod", datetime(2019, 12, 7, 23, 59, 59)),
+        ("today+9hr", datetime(2019, 12, 7, 9)),
+        ("today+16hr+10min", datetime(2019, 12, 7, 16, 10)),
+        ("yesterday-7days", datetime(2019, 11, 29)),
+        ("today-1s", datetime(2019, 12, 6, 23, 59, 59)),
+        ("today+PT1H", datetime(2019, 12, 7, 1)),
+        ("2000-01-01", datetime(2000, 1, 1)),
+        ("2019-12-07T10:00", datetime(2019, 12, 7, 10)),
+    ],
+)
+def test_evaluate(expression, expected):
+    assert evaluate(expression, NOW) == expected.astimezone()
+
+
+def test_evaluate_unsupported_expression_raises():
+    with pytest.raises(DateExpressionError):
+        evaluate("monday", NOW)
+
+
+@pytest.mark.parametrize("expression", ["today+fortnight", "sow", "eow"])
+def test_calculate_returns_none_for_unsupported_expression(expression):
+    assert calculate(expression) is None
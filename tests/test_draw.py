@@ -0,0 +1,203 @@
+import curses
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+from taskschedule.screen import VIEWPORT_MARGIN, Row, Screen
+
+
+class CountingWindow:
+    """A stand-in for a curses window, which counts the calls made to it and
+    the characters written."""
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+        self.written = 0
+
+    def addstr(self, y, x, string, color=0):
+        self.calls["addstr"] += 1
+        self.written += len(string)
+
+    def getmaxyx(self):
+        return 40, 120
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls[name] += 1
+
+        return method
+
+    def reset(self):
+        self.calls.clear()
+        self.written = 0
+
+
+class FakeSchedule:
+    tasks = []
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    """Create a Screen drawing to counting windows, without a terminal."""
+    monkeypatch.setattr(curses, "doupdate", lambda: None)
+    monkeypatch.setattr(curses, "newpad", lambda *size: CountingWindow())
+
+    screen = Screen.__new__(Screen)
+    screen.stdscr = CountingWindow()
+    screen.pad = CountingWindow()
+    screen.pad_size = (1, 1)
+    screen.scroll_level = 0
+    screen.drawn_lines = None
+    screen.rows = []
+    screen.header_buffer = []
+    screen.first_row = 0
+    screen.last_row = 0
+    screen.rows_records = None
+    screen.rows_window = None
+    screen.schedule = FakeSchedule()
+    screen.scheduled_after = datetime(2019, 12, 7)
+    screen.scheduled_before = datetime(2019, 12, 8)
+    screen.COLOR_DEFAULT = 0
+    screen.buffer = [
+        (0, 5, "ID", 1),
+        (1, 0, "09", 2),
+        (1, 5, "1 First task", 3),
+        (2, 0, "10", 2),
+        (2, 5, "2 Second task", 3),
+    ]
+    return screen
+
+
+def test_first_draw_paints_every_line(screen):
+    screen.draw()
+    assert screen.pad.calls["clear"] == 1
+    assert screen.pad.calls["addstr"] == 4
+
+
+def test_unchanged_buffer_writes_nothing(screen):
+    screen.draw()
+    screen.stdscr.reset()
+    screen.pad.reset()
+
+    screen.draw()
+    assert screen.pad.written == 0
+    assert screen.pad.calls["clear"] == 0
+    assert screen.stdscr.calls["clear"] == 0
+
+    # Only the footnote is written to stdscr
+    assert screen.stdscr.calls["addstr"] == 1
+
+
+def test_changed_line_is_repainted(screen):
+    screen.draw()
+    screen.pad.reset()
+
+    screen.buffer[4] = (2, 5, "2 Second task, renamed", 3)
+    screen.draw()
+    assert screen.pad.calls["clear"] == 0
+    assert screen.pad.calls["clrtoeol"] == 1
+    assert screen.pad.calls["addstr"] == 2
+
+
+def test_removed_line_is_cleared(screen):
+    screen.draw()
+    screen.pad.reset()
+
+    screen.buffer = screen.buffer[:3]
+    screen.draw()
+    assert screen.pad.calls["clrtoeol"] == 1
+    assert screen.pad.calls["addstr"] == 0
+
+
+def test_forced_draw_repaints_everything(screen):
+    screen.draw()
+    screen.pad.reset()
+
+    screen.draw(force=True)
+    assert screen.pad.calls["clear"] == 1
+    assert screen.pad.calls["addstr"] == 4
+
+
+@pytest.fixture
+def long_screen(screen):
+    """A screen with 5000 rows, rendered as their index."""
+    screen.rows = [Row("divider", str(i)) for i in range(5000)]
+    screen.prerender_row = lambda row, line: [(line, 0, row.day, 0)]
+    screen.render_viewport()
+    return screen
+
+
+def test_viewport_renders_visible_rows_and_margin(long_screen):
+    visible_rows = long_screen.get_visible_rows()
+    assert len(long_screen.buffer) == visible_rows + VIEWPORT_MARGIN
+    assert long_screen.pad_size == (visible_rows + 2 * VIEWPORT_MARGIN + 2, 121)
+
+
+def test_scroll_within_margin_does_not_render(long_screen):
+    buffer = long_screen.buffer
+    long_screen.scroll(VIEWPORT_MARGIN)
+    assert long_screen.buffer is buffer
+
+
+def test_scroll_past_margin_renders_viewport(long_screen):
+    long_screen.scroll(4000)
+    assert long_screen.first_row == 4000 - VIEWPORT_MARGIN
+    assert long_screen.buffer[0] == (1, 0, str(4000 - VIEWPORT_MARGIN), 0)
+    assert len(long_screen.buffer) == long_screen.get_visible_rows() + 2 * (
+        VIEWPORT_MARGIN
+    )
+
+
+def test_scroll_stops_at_the_last_row(screen):
+    screen.rows = [Row("divider", str(i)) for i in range(50)]
+    screen.prerender_row = lambda row, line: [(line, 0, row.day, 0)]
+    screen.render_viewport()
+
+    for _ in range(100):
+        screen.scroll(1)
+
+    visible_rows = screen.get_visible_rows()
+    assert screen.scroll_level == 50 - visible_rows
+    assert screen.scroll_level - screen.first_row + 1 + visible_rows <= (
+        screen.pad_size[0]
+    )
+
+
+def test_short_schedule_does_not_scroll(screen):
+    screen.rows = [Row("divider", str(i)) for i in range(5)]
+    screen.prerender_row = lambda row, line: [(line, 0, row.day, 0)]
+    screen.scroll(10)
+    assert screen.scroll_level == 0
+
+
+class SlotSchedule:
+    """A schedule of one task, which counts the time slots it builds."""
+
+    scheduled_after = datetime(2019, 12, 7)
+    scheduled_before = datetime(2019, 12, 8)
+
+    def __init__(self):
+        self.tasks = self.records = ["task"]
+        self.time_slot_calls = 0
+
+    def get_time_slots(self):
+        self.time_slot_calls += 1
+        return {"2019-12-07": {9: []}}
+
+
+def test_rows_are_built_once_per_task_set(screen):
+    screen.schedule = SlotSchedule()
+    screen.hide_empty = False
+    screen.run_hook = lambda: None
+    screen.prerender_headers = lambda: []
+    screen.prerender_row = lambda row, line: [(line, 0, row.day, 0)]
+
+    screen.refresh_buffer()
+    screen.refresh_buffer()
+    assert screen.schedule.time_slot_calls == 1
+    assert len(screen.rows) == 2
+
+    screen.schedule.records = ["task"]
+    screen.refresh_buffer()
+    assert screen.schedule.time_slot_calls == 2
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from taskschedule.events import (
+    ON_COMPLETE,
+    ON_DUE,
+    ON_ENTER,
+    ON_OVERDUE,
+    ON_START,
+    ON_STOP,
+    EventBus,
+)
+from taskschedule.task_record import TaskRecord
+
+SCHEDULED = datetime(2019, 12, 7, 9).timestamp()
+
+
+def make_record(uuid: str, status="pending", start=None) -> TaskRecord:
+    return TaskRecord(
+        id=1,
+        uuid=uuid,
+        scheduled=SCHEDULED,
+        estimate="PT1H",
+        end=None,
+        start=start,
+        status=status,
+        project=None,
+        description=f"task {uuid}",
+    )
+
+
+class FakeRunner:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, hook_type, data, skip_running=True):
+        self.submitted.append((hook_type, data))
+        return []
+
+
+def test_first_tick_emits_nothing():
+    runner = FakeRunner()
+    bus = EventBus(runner)
+    assert bus.tick([make_record("a")], datetime(2019, 12, 7, 8)) == []
+    assert runner.submitted == []
+
+
+def test_events_between_ticks():
+    bus = EventBus(FakeRunner())
+    bus.tick([make_record("a"), make_record("b")], datetime(2019, 12, 7, 8))
+
+    events = bus.tick(
+        [make_record("a", start=SCHEDULED), make_record("c")],
+        datetime(2019, 12, 7, 9, 30),
+    )
+    assert [(event.type, event.task.uuid) for event in events] == [
+        (ON_DUE, "a"),
+        (ON_START, "a"),
+        (ON_ENTER, "c"),
+    ]
+
+    events = bus.tick(
+        [make_record("a", status="completed"), make_record("c")],
+        datetime(2019, 12, 7, 10, 30),
+    )
+    assert [(event.type, event.task.uuid) for event in events] == [
+        (ON_COMPLETE, "a"),
+        (ON_OVERDUE, "c"),
+    ]
+
+
+def test_stop_event():
+    bus = EventBus(FakeRunner())
+    bus.tick([make_record("a", start=SCHEDULED)], datetime(2019, 12, 7, 9, 30))
+    events = bus.tick([make_record("a")], datetime(2019, 12, 7, 9, 40))
+    assert [event.type for event in events] == [ON_STOP]
+
+
+def test_events_are_batched_by_type():
+    runner = FakeRunner()
+    bus = EventBus(runner)
+    bus.tick([make_record("a"), make_record("b")], datetime(2019, 12, 7, 8))
+    bus.tick([make_record("a"), make_record("b")], datetime(2019, 12, 7, 9, 30))
+
+    assert len(runner.submitted) == 1
+    hook_type, batch = runner.submitted[0]
+    assert hook_type == ON_DUE
+    assert [event["uuid"] for event in batch] == ["a", "b"]
+    assert batch[0]["event"] == ON_DUE
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from taskschedule.export import export, fold_ics_line
+from taskschedule.schedule import Schedule
+from taskschedule.task_record import TaskRecord
+
+
+def make_record(id: int, hour: int, description: str, estimate=None) -> TaskRecord:
+    return TaskRecord(
+        id=id,
+        uuid=f"uuid-{id}",
+        scheduled=datetime(2019, 12, 7, hour).timestamp(),
+        estimate=estimate,
+        end=None,
+        start=None,
+        status="pending",
+        project="home",
+        description=description,
+    )
+
+
+TASKS = [
+    make_record(1, 9, "First task", "PT1H"),
+    make_record(2, 11, "Second task; with, separators"),
+]
+
+
+def test_export_json():
+    out = io.StringIO()
+    export(iter(TASKS), "json", out)
+
+    rows = json.loads(out.getvalue())
+    assert [row["id"] for row in rows] == [1, 2]
+    assert rows[0]["scheduled_end"] == TASKS[0].scheduled_end_datetime.isoformat()
+    assert rows[1]["scheduled_end"] is None
+
+
+def test_export_empty_json():
+    out = io.StringIO()
+    export(iter([]), "json", out)
+    assert json.loads(out.getvalue()) == []
+
+
+def test_export_csv():
+    out = io.StringIO()
+    export(iter(TASKS), "csv", out)
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [row["description"] for row in rows] == [task.description for task in TASKS]
+
+
+def test_export_ics():
+    out = io.StringIO()
+    export(iter(TASKS), "ics", out)
+
+    lines = out.getvalue().split("\r\n")
+    assert lines[0] == "BEGIN:VCALENDAR"
+    assert lines.count("BEGIN:VEVENT") == 2
+    assert "SUMMARY:Second task\\; with\\, separators" in lines
+    assert sum(line.startswith("DTEND:") for line in lines) == 1
+
+
+def test_fold_ics_line():
+    lines = fold_ics_line("SUMMARY:" + "é" * 80).split("\r\n")
+    assert len(lines) == 3
+    assert all(len(line.encode("utf-8")) <= 75 for line in lines)
+    assert all(line.startswith(" ") for line in lines[1:])
+
+
+def test_schedule_iter_records():
+    schedule = Schedule(None, datetime(2019, 12, 7), datetime(2019, 12, 7, 23))
+    outside = make_record(3, 8, "Outside")
+    object.__setattr__(outside, "scheduled", datetime(2019, 12, 9, 8).timestamp())
+    schedule.__dict__["records"] = [TASKS[1], outside, TASKS[0]]
+
+    assert list(schedule.iter_records()) == TASKS
@@ -0,0 +1,120 @@
+import os
+import time
+
+import pytest
+
+from taskschedule.hooks import HookRunner
+
+
+def write_hook(directory, name: str, script: str):
+    path = directory / name
+    path.write_text("#!/bin/sh\n" + script)
+    path.chmod(0o755)
+
+
+@pytest.fixture
+def runner(tmp_path):
+    runner = HookRunner(str(tmp_path), timeout=0.5)
+    yield runner
+    runner.close()
+
+
+def test_listing_is_cached_until_directory_changes(tmp_path, runner: HookRunner):
+    write_hook(tmp_path, "on-progress-a", "exit 0\n")
+    assert runner.get_hooks("on-progress") == ["on-progress-a"]
+
+    mtime = os.stat(tmp_path).st_mtime_ns
+    write_hook(tmp_path, "on-progress-b", "exit 0\n")
+    os.utime(tmp_path, ns=(mtime, mtime))
+    assert runner.get_hooks("on-progress") == ["on-progress-a"]
+
+    os.utime(tmp_path, ns=(mtime + 10**9, mtime + 10**9))
+    assert runner.get_hooks("on-progress") == ["on-progress-a", "on-progress-b"]
+
+
+def test_hooks_run_concurrently_in_background(tmp_path, runner: HookRunner):
+    write_hook(tmp_path, "on-progress-a", "sleep 0.3\n")
+    write_hook(tmp_path, "on-progress-b", "sleep 0.3\n")
+
+    start = time.perf_counter()
+    futures = runner.submit("on-progress", {"id": 1})
+    assert time.perf_counter() - start < 0.2
+
+    for future in futures:
+        future.result()
+    assert time.perf_counter() - start < 0.55
+    assert runner.get_stats("on-progress-a").runs == 1
+    assert runner.get_stats("on-progress-a").mean_time >= 0.3
+
+
+def test_failures_and_timeouts_are_recorded(tmp_path, runner: HookRunner):
+    write_hook(tmp_path, "on-progress-fail", "exit 1\n")
+    write_hook(tmp_path, "on-progress-slow", "sleep 5\n")
+
+    for future in runner.submit("on-progress", {"id": 1}):
+        future.result()
+
+    assert runner.get_stats("on-progress-fail").failures == 1
+    assert runner.get_stats("on-progress-fail").timeouts == 0
+    assert runner.get_stats("on-progress-slow").timeouts == 1
+
+
+def test_running_hook_is_skipped(tmp_path, runner: HookRunner):
+    write_hook(tmp_path, "on-progress-a", "sleep 0.2\n")
+
+    futures = runner.submit("on-progress", {"id": 1})
+    assert runner.submit("on-progress", {"id": 2}) == []
+    futures[0].result()
+
+    assert runner.get_stats("on-progress-a").skipped == 1
+    assert runner.get_stats("on-progress-a").runs == 1
+
+
+def test_runs_of_a_hook_do_not_overlap(tmp_path, runner: HookRunner):
+    log = tmp_path / "log"
+    write_hook(
+        tmp_path,
+        "on-enter-a",
+        f"read data; echo start $data >> {log}; sleep 0.1; echo end $data >> {log}\n",
+    )
+
+    futures = []
+    for i in range(3):
+        futures += runner.submit("on-enter", i, skip_running=False)
+    for future in futures:
+        future.result()
+
+    assert log.read_text().split("\n")[:-1] == [
+        "start 0",
+        "end 0",
+        "start 1",
+        "end 1",
+        "start 2",
+        "end 2",
+    ]
+    assert runner.get_stats("on-enter-a").runs == 3
+
+
+def test_output_is_kept_instead_of_printed(tmp_path, runner: HookRunner, capsys):
+    write_hook(tmp_path, "on-progress-a", "echo hello; echo oops >&2\n")
+
+    for future in runner.submit("on-progress", {"id": 1}):
+        future.result()
+
+    assert capsys.readouterr().out == ""
+    assert runner.get_stats("on-progress-a").last_stdout == "hello\n"
+    assert runner.get_stats("on-progress-a").last_stderr == "oops\n"
+    assert runner.take_output() == [("on-progress-a", "hello\n")]
+    assert runner.take_output() == []
+
+
+def test_script_without_shebang_runs_with_sh(tmp_path, runner: HookRunner):
+    path = tmp_path / "on-progress-a"
+    path.write_text("echo $((1 + 1))\n")
+    path.chmod(0o755)
+
+    for future in runner.submit("on-progress", {"id": 1}):
+        future.result()
+
+    assert runner.get_stats("on-progress-a").failures == 0
+    assert runner.get_stats("on-progress-a").last_stdout == "2\n"
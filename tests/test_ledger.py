@@ -0,0 +1,60 @@
+import pytest
+
+from taskschedule.ledger import NotificationLedger
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = NotificationLedger(str(tmp_path / "ledger.sqlite3"), min_delay=300)
+    yield ledger
+    ledger.close()
+
+
+def test_claim_once_per_delay(ledger):
+    assert ledger.claim("a", now=1000) is True
+    assert ledger.notified_at("a") == 1000
+    assert ledger.claim("a", now=1200) is False
+    assert ledger.notified_at("a") == 1000
+
+    assert ledger.claim("a", now=1300) is True
+    assert ledger.notified_at("a") == 1300
+
+
+def test_claim_is_shared_between_instances(ledger):
+    other = NotificationLedger(ledger.location, min_delay=300)
+    try:
+        assert ledger.claim("a", now=1000) is True
+        assert other.claim("a", now=1000) is False
+    finally:
+        other.close()
+
+
+def test_release(ledger):
+    ledger.claim("a", now=1000)
+    ledger.release("a", claimed_at=1000)
+    assert ledger.claim("a", now=1001) is True
+
+    # A claim made since is kept
+    ledger.release("a", claimed_at=1000)
+    assert ledger.notified_at("a") == 1001
+
+
+def test_purge(ledger):
+    ledger.claim("expired", now=0)
+    ledger.claim("recent", now=1000)
+
+    assert ledger.purge(now=1100) == 1
+    assert ledger.notified_at("expired") is None
+    assert ledger.notified_at("recent") == 1000
+
+
+def test_purge_keeps_entries_of_other_instances(ledger):
+    # Notified by an instance showing another date range
+    other = NotificationLedger(ledger.location, min_delay=300)
+    try:
+        other.claim("elsewhere", now=1000)
+    finally:
+        other.close()
+
+    ledger.purge(now=1100)
+    assert ledger.claim("elsewhere", now=1100) is False
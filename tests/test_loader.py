@@ -0,0 +1,79 @@
+import os
+import select
+import threading
+
+import pytest
+
+from taskschedule.loader import ScheduleLoader
+
+
+class FakeSchedule:
+    """A schedule whose snapshots are loaded once released."""
+
+    def __init__(self):
+        self.loading = threading.Event()
+        self.release = threading.Event()
+        self.loads = 0
+        self.error = None
+
+    def load_snapshot(self):
+        self.loading.set()
+        self.release.wait(1)
+        self.loads += 1
+        if self.error is not None:
+            raise self.error
+        return f"snapshot {self.loads}"
+
+
+@pytest.fixture
+def schedule():
+    return FakeSchedule()
+
+
+@pytest.fixture
+def loader(schedule):
+    loader = ScheduleLoader(schedule)
+    yield loader
+    schedule.release.set()
+    loader.close()
+
+
+def wait_readable(loader: ScheduleLoader) -> bool:
+    readable, _, _ = select.select([loader.fileno()], [], [], 1)
+    return bool(readable)
+
+
+def test_snapshot_is_taken_once_loaded(schedule, loader):
+    loader.request()
+    assert loader.take() is None
+
+    schedule.release.set()
+    assert wait_readable(loader)
+    assert loader.take() == "snapshot 1"
+    assert loader.take() is None
+
+
+def test_load_error_is_raised_on_take(schedule, loader):
+    schedule.error = ValueError("broken")
+    schedule.release.set()
+    loader.request()
+
+    assert wait_readable(loader)
+    with pytest.raises(ValueError):
+        loader.take()
+
+
+def test_close_leaves_pipe_to_worker_still_loading(schedule):
+    loader = ScheduleLoader(schedule)
+    loader.request()
+    assert schedule.loading.wait(1)
+
+    loader.close(timeout=0.05)
+    assert loader.thread.is_alive()
+    os.fstat(loader.write_fd)
+
+    schedule.release.set()
+    loader.thread.join(1)
+    assert not loader.thread.is_alive()
+    with pytest.raises(OSError):
+        os.fstat(loader.write_fd)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from taskschedule.main import Main
+from taskschedule.main import Main, StartupProfile
 from taskschedule.utils import calculate_datetime
 
 if TYPE_CHECKING:
@@ -46,3 +46,33 @@ class TestMain:
         scheduled_before: datetime = calculate_datetime("tomorrow")
         assert f"scheduled.after:{scheduled_after}" in task_command
         assert f"scheduled.before:{scheduled_before}" in task_command
+
+
+def test_viewer_does_not_create_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    missing = str(tmp_path / "missing")
+    main = Main(["--viewer", "--no-notifications", "-d", missing, "-t", missing])
+
+    assert main.backend is None
+    assert main.schedule.backend is None
+
+
+def test_startup_profile():
+    profile = StartupProfile()
+    profile.mark("imports")
+    profile.mark("parse arguments")
+
+    assert [phase for phase, _ in profile.phases] == ["imports", "parse arguments"]
+    report = profile.report().splitlines()
+    assert report[0].startswith("imports")
+    assert report[-1].startswith("total")
+
+
+def test_parse_export_command():
+    main = Main.__new__(Main)
+    main.profile = None
+    main.home_dir = "tests/test-data"
+    main.parse_args(["export", "--format", "ics"])
+
+    assert main.command == "export"
+    assert main.export_format == "ics"
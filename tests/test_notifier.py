@@ -0,0 +1,178 @@
+import threading
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from taskschedule import notifier as notifier_module
+from taskschedule.ledger import NotificationLedger
+from taskschedule.notifier import Notification, NotificationDispatcher, Notifier
+from taskschedule.task_record import TaskRecord
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    """Record the notification commands instead of running them. The first
+    command blocks until released, so bursts can queue up behind it."""
+    calls = []
+    release = threading.Event()
+
+    def run_command(args):
+        calls.append(args)
+        release.wait(5)
+
+    monkeypatch.setattr(notifier_module, "run_command", run_command)
+    monkeypatch.setattr(notifier_module, "is_termux", lambda: False)
+    monkeypatch.setattr(notifier_module, "get_sound_file", lambda: "/nonexistent")
+    yield calls, release
+    release.set()
+
+
+def notification(n: int) -> Notification:
+    return Notification(f"uuid-{n}", f"10:0{n} | Task {n}", f"Task {n}")
+
+
+def test_single_notification(commands):
+    calls, release = commands
+    release.set()
+
+    dispatcher = NotificationDispatcher()
+    dispatcher.submit([notification(1)])
+    dispatcher.close()
+
+    assert calls == [
+        ["notify-send", "--urgency", "critical", "10:01 | Task 1", "Task 1"]
+    ]
+
+
+def test_bursts_are_coalesced(commands):
+    calls, release = commands
+
+    dispatcher = NotificationDispatcher()
+    dispatcher.submit([notification(1)])
+    while not calls:
+        threading.Event().wait(0.01)
+
+    # Both bursts queue up while the first notification is being delivered
+    dispatcher.submit([notification(2)])
+    dispatcher.submit([notification(3)])
+    release.set()
+    dispatcher.close()
+
+    assert len(calls) == 2
+    assert calls[1][3] == "2 tasks scheduled"
+    assert "Task 2" in calls[1][4] and "Task 3" in calls[1][4]
+
+
+def test_submit_does_not_block_when_full(commands):
+    calls, release = commands
+
+    dispatcher = NotificationDispatcher(queue_size=1)
+    dispatcher.submit([notification(1)])
+    while not calls:
+        threading.Event().wait(0.01)
+
+    assert dispatcher.submit([notification(2)]) is True
+    assert dispatcher.submit([notification(3)]) is False
+
+    release.set()
+    dispatcher.close()
+
+
+class FakeSchedule:
+    def __init__(self, records):
+        self.records = records
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.bursts = []
+        self.full = False
+
+    def submit(self, notifications):
+        if self.full:
+            return False
+        self.bursts.append(notifications)
+        return True
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def notifier(tmp_path, monkeypatch):
+    monkeypatch.setattr(notifier_module, "is_termux", lambda: True)
+
+    today = datetime.combine(date.today(), time())
+    records = [
+        make_record(1, today + timedelta(hours=9)),
+        make_record(2, today + timedelta(hours=10)),
+        make_record(3, today + timedelta(hours=10), status="completed"),
+        make_record(4, today - timedelta(hours=1)),
+    ]
+    ledger = NotificationLedger(str(tmp_path / "ledger.sqlite3"))
+    notifier = Notifier(
+        None, FakeSchedule(records), ledger=ledger, dispatcher=FakeDispatcher()
+    )
+    yield notifier
+    ledger.close()
+
+
+def make_record(id: int, scheduled: datetime, status="pending") -> TaskRecord:
+    return TaskRecord(
+        id=id,
+        uuid=f"uuid-{id}",
+        scheduled=scheduled.timestamp(),
+        estimate=None,
+        end=None,
+        start=None,
+        status=status,
+        project=None,
+        description=f"Task {id}",
+    )
+
+
+def test_next_due_time(notifier):
+    nine = datetime.combine(date.today(), time(9)).timestamp()
+    ten = datetime.combine(date.today(), time(10)).timestamp()
+
+    assert notifier.next_due_time(nine - 1) == nine
+    assert notifier.next_due_time(nine) == ten
+    assert notifier.next_due_time(ten) is None
+
+
+def test_send_notifications_from_records(notifier):
+    nine = datetime.combine(date.today(), time(9)).timestamp()
+
+    notifier.send_notifications(nine - 1)
+    assert notifier.dispatcher.bursts == []
+
+    notifier.send_notifications(nine)
+    assert [n.uuid for n in notifier.dispatcher.bursts[0]] == ["uuid-1"]
+
+    # Already notified, and yesterday's task is not a candidate
+    notifier.send_notifications(nine + 60)
+    assert len(notifier.dispatcher.bursts) == 1
+
+
+def test_dropped_notifications_are_sent_later(notifier):
+    nine = datetime.combine(date.today(), time(9)).timestamp()
+
+    notifier.dispatcher.full = True
+    notifier.send_notifications(nine)
+    assert notifier.ledger.notified_at("uuid-1") is None
+
+    notifier.dispatcher.full = False
+    notifier.send_notifications(nine + 1)
+    assert [n.uuid for n in notifier.dispatcher.bursts[0]] == ["uuid-1"]
+
+
+def test_queue_is_rebuilt_when_records_change(notifier):
+    nine = datetime.combine(date.today(), time(9)).timestamp()
+    notifier.next_due_time(nine)
+    records = notifier.records
+
+    notifier.next_due_time(nine)
+    assert notifier.records is records
+
+    notifier.schedule.records = [make_record(5, datetime.fromtimestamp(nine + 60))]
+    assert notifier.next_due_time(nine) == nine + 60
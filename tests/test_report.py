@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from taskschedule.report import format_conflict_report
+from taskschedule.task_record import TaskRecord
+
+
+def make_record(id: int, hour: int, description: str) -> TaskRecord:
+    return TaskRecord(
+        id=id,
+        uuid=None,
+        scheduled=datetime(2019, 12, 7, hour).timestamp(),
+        estimate="PT1H",
+        end=None,
+        start=None,
+        status="pending",
+        project=None,
+        description=description,
+    )
+
+
+class FakeSchedule:
+    def get_conflicts(self):
+        return [(make_record(1, 9, "First task"), make_record(2, 9, "Second task"))]
+
+    def get_free_gaps(self):
+        return [(datetime(2019, 12, 7, 10), datetime(2019, 12, 7, 11, 30))]
+
+
+def test_format_conflict_report():
+    report = format_conflict_report(FakeSchedule()).splitlines()
+    assert report == [
+        "1 conflicts",
+        "  Sat 07 Dec 09:00-10:00 1 First task",
+        "    overlaps Sat 07 Dec 09:00-10:00 2 Second task",
+        "",
+        "1 free intervals",
+        "  Sat 07 Dec 10:00 - Sat 07 Dec 11:30 (90 min)",
+    ]
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from datetime import datetime
 
 import pytest
 
+from taskschedule.schedule import (
+    ColumnLayout,
+    ConflictIndex,
+    Schedule,
+    StartTimeIndex,
+)
+from taskschedule.task_record import TaskRecord
 from taskschedule.utils import calculate_datetime
 
-if TYPE_CHECKING:
-    from taskschedule.schedule import Schedule
-
 
 class TestSchedule:
     def test_get_tasks_returns_correct_tasks(self, schedule: Schedule):
@@ -49,6 +53,18 @@ class TestSchedule:
         assert time_slots[today]["16"][0]["description"] == "test_16:10_to_16:34"
         assert time_slots[tomorrow]["00"][0]["description"] == "test_tomorrow"
 
+    def test_get_time_slots_has_every_hour(self, schedule: Schedule):
+        time_slots = schedule.get_time_slots()
+        for hours in time_slots.values():
+            assert list(hours) == [f"{hour:02d}" for hour in range(24)]
+
+    def test_time_slot_index_is_rebuilt_after_clear_cache(self, schedule: Schedule):
+        index = schedule.time_slot_index
+        assert schedule.time_slot_index is index
+
+        schedule.clear_cache()
+        assert schedule.time_slot_index is not index
+
     def test_get_max_length(self, schedule: Schedule):
         length = schedule.get_max_length("description")
         assert length == 19
@@ -67,3 +83,147 @@ class TestSchedule:
     def test_get_next_task_for_last_task_returns_none(self, schedule: Schedule):
         next_task = schedule.get_next_task(schedule.tasks[6])
         assert not next_task
+
+
+def make_record(id: int, project, description: str) -> TaskRecord:
+    return TaskRecord(
+        id=id,
+        uuid=None,
+        scheduled=None,
+        estimate=None,
+        end=None,
+        start=None,
+        status="pending",
+        project=project,
+        description=description,
+    )
+
+
+class TestColumnLayout:
+    def test_offsets(self):
+        layout = ColumnLayout([make_record(1, "home", "a"), make_record(2, None, "b")])
+        assert layout.offsets == [0, 5, 7, 19, 29, 37]
+
+        layout = ColumnLayout(
+            [make_record(1, "home", "a"), make_record(10, "project_x", "c")]
+        )
+        assert layout.offsets == [0, 5, 8, 20, 30, 40]
+
+    def test_max_length(self):
+        layout = ColumnLayout(
+            [make_record(1, None, "short"), make_record(2, None, "longer")]
+        )
+        assert layout.get_max_length("description") == 6
+        assert ColumnLayout().get_max_length("description") == 0
+
+
+def make_scheduled_record(uuid: str, hour: int, estimate=None) -> TaskRecord:
+    return TaskRecord(
+        id=None,
+        uuid=uuid,
+        scheduled=hour * 3600.0,
+        estimate=estimate,
+        end=None,
+        start=None,
+        status="pending",
+        project=None,
+        description=uuid,
+    )
+
+
+class TestStartTimeIndex:
+    @pytest.fixture
+    def index(self) -> StartTimeIndex:
+        return StartTimeIndex(
+            [
+                make_scheduled_record("c", 14),
+                make_scheduled_record("a", 9, "PT3H"),
+                make_scheduled_record("b", 10, "PT30M"),
+                make_scheduled_record("d", 16, "PT1H"),
+            ]
+        )
+
+    def test_next_and_previous(self, index: StartTimeIndex):
+        assert index.uuids == ["a", "b", "c", "d"]
+        assert index.get_next(9 * 3600).uuid == "b"
+        assert index.get_next(16 * 3600) is None
+        assert index.get_previous(10 * 3600).uuid == "a"
+        assert index.get_previous(9 * 3600) is None
+
+    def test_overlapping(self, index: StartTimeIndex):
+        overlapping = index.get_overlapping(11 * 3600, 15 * 3600)
+        assert [task.uuid for task in overlapping] == ["a", "c"]
+
+        overlapping = index.get_overlapping(16.5 * 3600, 17 * 3600)
+        assert [task.uuid for task in overlapping] == ["d"]
+
+    def test_current(self, index: StartTimeIndex):
+        assert index.get_current(8 * 3600) is None
+        assert index.get_current(10.25 * 3600).uuid == "b"
+        # b has ended, but a is still in progress
+        assert index.get_current(11 * 3600).uuid == "a"
+        # c has no estimate, so it lasts until d starts
+        assert index.get_current(15 * 3600).uuid == "c"
+        assert index.get_current(18 * 3600) is None
+
+    def test_current_agrees_with_should_be_active(self, index: StartTimeIndex):
+        for hour in range(8, 19):
+            epoch = hour * 3600 + 900
+            now = datetime.fromtimestamp(epoch)
+            active = [
+                task
+                for i, task in enumerate(index.tasks)
+                if task.should_be_active_at(
+                    now, index.starts[i + 1] if i + 1 < len(index.starts) else None
+                )
+            ]
+            assert index.get_current(epoch) == (active[-1] if active else None)
+
+
+class TestConflictIndex:
+    @pytest.fixture
+    def index(self) -> ConflictIndex:
+        return ConflictIndex(
+            [
+                make_scheduled_record("a", 9, "PT3H"),
+                make_scheduled_record("b", 10, "PT30M"),
+                make_scheduled_record("c", 11, "PT2H"),
+                make_scheduled_record("d", 14),
+                make_scheduled_record("e", 15, "PT1H"),
+                make_scheduled_record("f", 16, "PT1H"),
+            ]
+        )
+
+    def test_pairs(self, index: ConflictIndex):
+        pairs = [(task.uuid, other.uuid) for task, other in index.pairs]
+        assert pairs == [("a", "b"), ("a", "c")]
+
+        conflicting = sorted(task.uuid for task in index.conflicting)
+        # Tasks which only touch, or have no estimate, do not conflict
+        assert conflicting == ["a", "b", "c"]
+
+    def test_gaps(self, index: ConflictIndex):
+        gaps = index.get_gaps(8 * 3600, 18 * 3600)
+        assert gaps == [
+            (8 * 3600, 9 * 3600),
+            (13 * 3600, 15 * 3600),
+            (17 * 3600, 18 * 3600),
+        ]
+
+        assert index.get_gaps(10 * 3600, 12 * 3600) == []
+
+
+def test_swap_replaces_cached_tasks():
+    after = calculate_datetime("2019-12-07")
+    before = calculate_datetime("2019-12-08")
+    schedule = Schedule(None, after, before)
+    schedule.__dict__["records"] = [make_scheduled_record("a", 9)]
+    schedule.__dict__["column_layout"] = ColumnLayout()
+
+    snapshot = Schedule(None, after, before)
+    records = [make_scheduled_record("b", 10)]
+    snapshot.__dict__["records"] = records
+
+    schedule.swap(snapshot)
+    assert schedule.records is records
+    assert "column_layout" not in schedule.__dict__
@@ -1,7 +1,5 @@
 from datetime import datetime, timedelta
 
-import pytest
-
 from taskschedule.scheduled_task import ScheduledTask
 
 
@@ -72,10 +70,16 @@ def test_notified(tw):  # noqa: F811
     assert task.notified is True
 
 
-@pytest.mark.skip(reason="This cannot be tested because the method is currently broken")
 def test_should_be_active(tw):  # noqa: F811
-    # TODO Complete this test after fixing the class method
-    ...
+    task = ScheduledTask(
+        backend=tw, description="Test task", scheduled=datetime(2019, 10, 12, 10, 0)
+    )
+    during = datetime(2019, 10, 12, 10, 30)
+    next_start = datetime(2019, 10, 12, 11, 0)
+
+    assert task.should_be_active_at(during) is False
+    assert task.should_be_active_at(during, next_start) is True
+    assert task.should_be_active_at(datetime(2019, 10, 12, 11, 30), next_start) is False
 
 
 def test_overdue(tw):  # noqa: F811
@@ -88,3 +92,30 @@ def test_overdue(tw):  # noqa: F811
 
     assert future_task.overdue is False
     assert old_task.overdue is True
+
+
+def test_derived_fields_are_invalidated(tw):  # noqa: F811
+    task = ScheduledTask(
+        backend=tw,
+        description="Test task",
+        scheduled=datetime(2019, 10, 12, 0, 0),
+        estimate="PT1H",
+    )
+    assert task.has_scheduled_time is False
+    end = task.scheduled_end_datetime
+    assert task.scheduled_end_datetime is end
+
+    task["estimate"] = "PT2H"
+    assert task.scheduled_end_datetime - task["scheduled"] == timedelta(hours=2)
+
+    task["scheduled"] = datetime(2019, 10, 12, 10, 0)
+    assert task.has_scheduled_time is True
+
+
+def test_overdue_at(tw):  # noqa: F811
+    task = ScheduledTask(
+        backend=tw, description="Test task", scheduled=datetime(2019, 10, 12, 10, 0)
+    )
+
+    assert task.overdue_at(datetime(2019, 10, 12, 9, 0)) is False
+    assert task.overdue_at(datetime(2019, 10, 12, 11, 0)) is True
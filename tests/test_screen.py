@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from taskschedule.screen import Screen
 
 
@@ -53,7 +55,7 @@ class TestScreen:
         assert empty_line_buffer[1][1] == 0
 
     def test_prerender_task(self, screen: Screen):
-        task = screen.schedule.tasks[0]
+        task = screen.schedule.records[0]
         task_buffer = screen.prerender_task(0, task, False, 11, 0, "2019-12-08")
         assert task_buffer[0][1] == 0
         assert "11" in task_buffer[0][2]
@@ -77,3 +79,36 @@ class TestScreen:
         # Description column
         assert task_buffer[6][1] == 37
         assert "test_last_week" in task_buffer[6][2]
+
+    def test_refresh_buffer_renders_at_given_time(self, screen: Screen):
+        now = datetime(2019, 12, 8, 11, 30)
+        screen.refresh_buffer(now=now)
+        assert screen.now == now
+
+        empty_line_buffer = screen.prerender_empty_line(True, 0, 11, "2019-12-08")
+        assert empty_line_buffer[1][3] == screen.COLOR_HOUR_CURRENT
+        empty_line_buffer = screen.prerender_empty_line(True, 0, 12, "2019-12-08")
+        assert empty_line_buffer[1][3] == screen.COLOR_HOUR
+
+    def test_task_state_is_computed_once_per_frame(self, screen: Screen):
+        screen.refresh_buffer(now=datetime(1970, 1, 2))
+        task = screen.schedule.records[0]
+        assert screen.get_task_state(task) == (False, False)
+        assert screen.task_states[task] == (False, False)
+
+        screen.refresh_buffer(now=datetime(2313, 1, 1))
+        assert screen.get_task_state(task) == (False, True)
+
+    def test_run_hook_is_skipped_when_hooks_are_disabled(self, screen, monkeypatch):
+        calls = []
+        monkeypatch.setattr(screen, "run_progress_hook", calls.append)
+        monkeypatch.setattr(screen, "current_task", None)
+        task = screen.schedule.records[0]
+
+        monkeypatch.setattr(screen, "hooks_enabled", False)
+        screen.refresh_buffer(now=datetime.fromtimestamp(task.scheduled))
+        assert calls == []
+
+        monkeypatch.setattr(screen, "hooks_enabled", True)
+        screen.refresh_buffer(now=datetime.fromtimestamp(task.scheduled))
+        assert calls
@@ -0,0 +1,175 @@
+import os
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from taskschedule.schedule import Schedule
+from taskschedule.server import ScheduleService, ServerError, create_app, serve
+from taskschedule.task_record import TaskRecord
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+def make_record(id: int, start: datetime, estimate="PT1H") -> TaskRecord:
+    return TaskRecord(
+        id=id,
+        uuid=f"uuid-{id}",
+        scheduled=start.timestamp(),
+        estimate=estimate,
+        end=None,
+        start=None,
+        status="pending",
+        project=None,
+        description=f"task {id}",
+    )
+
+
+class FakeSchedule(Schedule):
+    """A schedule of records, which reloads the records it was given."""
+
+    def __init__(self, records):
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        super().__init__(None, today - timedelta(days=1), today + timedelta(days=2))
+        self.given_records = records
+        self.use_records(records)
+
+    def load_snapshot(self):
+        return FakeSchedule(self.given_records)
+
+
+@pytest.fixture
+def service():
+    now = datetime.now().replace(microsecond=0)
+    return ScheduleService(
+        FakeSchedule(
+            [
+                make_record(1, now - timedelta(minutes=30)),
+                make_record(2, now + timedelta(minutes=15)),
+                make_record(3, now + timedelta(hours=3)),
+            ]
+        )
+    )
+
+
+@pytest.fixture
+def client(service):
+    return TestClient(create_app(service))
+
+
+def test_schedule(client):
+    response = client.get("/schedule")
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()["tasks"]] == [1, 2, 3]
+
+    response = client.get("/schedule", params={"from": "now", "to": "now+1h"})
+    assert [task["id"] for task in response.json()["tasks"]] == [2]
+
+    response = client.get("/schedule", params={"from": "next full moon"})
+    assert response.status_code == 400
+
+    response = client.get("/schedule", params={"from": "today-7days"})
+    assert response.status_code == 400
+
+
+def test_schedule_etag_follows_the_range(client):
+    etag = client.get("/schedule", params={"from": "now"}).headers["etag"]
+
+    # The same tasks are in range, so the answer has not changed
+    response = client.get(
+        "/schedule", params={"from": "now"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = client.get(
+        "/schedule", params={"from": "today"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()["tasks"]] == [1, 2, 3]
+
+
+def test_next_task(client):
+    body = client.get("/tasks/next").json()
+    assert body["current"]["id"] == 1
+    assert body["next"]["id"] == 2
+
+
+def test_conflicts(client):
+    body = client.get("/conflicts").json()
+    assert [[task["id"] for task in pair] for pair in body["conflicts"]] == [[1, 2]]
+    assert body["free"]
+
+
+def test_etag_changes_with_generation(client, service):
+    response = client.get("/conflicts")
+    etag = response.headers["etag"]
+
+    response = client.get("/conflicts", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    service.reload()
+    response = client.get("/conflicts", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_responses_are_cached_per_generation(client, service):
+    first = client.get("/conflicts").content
+    assert client.get("/conflicts").content == first
+    assert len(service.responses) == 1
+
+    service.reload()
+    assert not service.responses
+
+
+def test_response_of_a_previous_generation_is_not_cached(service):
+    def build():
+        # A reload finishes while the response is built
+        service.reload()
+        return {"generation": 1}
+
+    body = service.render(1, ("conflicts", '"1"'), build)()
+    assert body == b'{"generation": 1}'
+    assert not service.responses
+
+
+def test_reload_uses_the_current_range(service):
+    schedules = []
+
+    def load():
+        schedule = FakeSchedule(service.current[1].given_records)
+        schedules.append(schedule)
+        return schedule
+
+    service.load_schedule = load
+    service.reload()
+    assert service.current == (2, schedules[0])
+
+
+def test_watch_reloads_when_the_day_changes(tmp_path, service):
+    service.loaded_on = date.today() - timedelta(days=1)
+    (tmp_path / "pending.data").write_text("")
+
+    # The wait times out without a change to the data, then the watcher stops
+    waits = [(False, False), (True, False)]
+    with patch("taskschedule.watcher.DataWatcher.wait", side_effect=waits):
+        with patch.object(service, "reload") as reload:
+            service.watch(str(tmp_path))
+
+    reload.assert_called_once_with()
+
+
+def test_close_closes_the_stop_pipe(service):
+    service.stop()
+    service.close()
+    for fd in (service.stop_read_fd, service.stop_write_fd):
+        with pytest.raises(OSError):
+            os.fstat(fd)
+
+
+def test_serve_names_the_server_extra(service):
+    with patch.dict("sys.modules", {"uvicorn": None}):
+        with pytest.raises(ServerError, match=r"taskschedule\[server\]"):
+            serve(service.current[1], "")
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pytest
+
+from taskschedule.schedule import Schedule
+from taskschedule.snapshot import (
+    INITIAL_SIZE,
+    PublisherRunningError,
+    SnapshotReader,
+    SnapshotWindow,
+    SnapshotWindowError,
+    SnapshotWriter,
+)
+from taskschedule.task_record import TaskRecord
+
+
+def make_record(id: int, description: str = "task") -> TaskRecord:
+    return TaskRecord(
+        id=id,
+        uuid=f"uuid-{id}",
+        scheduled=datetime(2019, 12, 7, 9).timestamp(),
+        estimate="PT1H",
+        end=None,
+        start=None,
+        status="pending",
+        project="home",
+        description=description,
+    )
+
+
+WINDOW = SnapshotWindow.create(datetime(2019, 12, 7), datetime(2019, 12, 8), True)
+
+
+@pytest.fixture
+def location(tmp_path):
+    return str(tmp_path / "taskschedule" / "snapshot")
+
+
+@pytest.fixture
+def writer(location):
+    writer = SnapshotWriter(location, WINDOW)
+    yield writer
+    writer.close()
+
+
+@pytest.fixture
+def reader(location):
+    schedule = Schedule(None, datetime(2019, 12, 7), datetime(2019, 12, 8))
+    reader = SnapshotReader(location, schedule, WINDOW)
+    yield reader
+    reader.close()
+
+
+def test_reader_without_snapshot(reader):
+    assert reader.load() == []
+    assert reader.take() is None
+
+
+def test_reader_takes_each_generation_once(writer, reader):
+    writer.publish([make_record(1), make_record(2)])
+    snapshot = reader.take()
+    assert [record.id for record in snapshot.records] == [1, 2]
+    assert snapshot.records[0].scheduled_end == make_record(1).scheduled_end
+    assert reader.take() is None
+
+    records = [make_record(3)]
+    generation = writer.publish(records)
+    assert writer.publish(records) == generation
+    assert [record.id for record in reader.take().records] == [3]
+
+
+def test_reader_follows_growing_snapshot(writer, reader):
+    writer.publish([make_record(1)])
+    reader.take()
+
+    records = [make_record(i, "x" * 100) for i in range(INITIAL_SIZE // 100)]
+    writer.publish(records)
+    assert len(reader.take().records) == len(records)
+
+
+def test_single_publisher(writer, location):
+    with pytest.raises(PublisherRunningError):
+        SnapshotWriter(location, WINDOW)
+
+
+def test_new_publisher_continues_generation(location, reader):
+    writer = SnapshotWriter(location, WINDOW)
+    writer.publish([make_record(1)])
+    writer.close()
+    reader.take()
+
+    writer = SnapshotWriter(location, WINDOW)
+    writer.publish([make_record(2)])
+    writer.close()
+    assert [record.id for record in reader.take().records] == [2]
+
+
+@pytest.mark.parametrize(
+    "window",
+    [
+        SnapshotWindow.create(datetime(2019, 12, 6), datetime(2019, 12, 8), True),
+        SnapshotWindow.create(datetime(2019, 12, 7), datetime(2019, 12, 8), False),
+    ],
+)
+def test_reader_rejects_other_window(location, reader, window):
+    writer = SnapshotWriter(location, window)
+    writer.publish([make_record(1)])
+    writer.close()
+
+    assert reader.changed()
+    with pytest.raises(SnapshotWindowError):
+        reader.take()
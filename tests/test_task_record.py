@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+
+from taskschedule.scheduled_task import ScheduledTask
+from taskschedule.task_record import TaskRecord
+
+
+def make_record(**kwargs) -> TaskRecord:
+    fields = dict(
+        id=1,
+        uuid=None,
+        scheduled=None,
+        estimate=None,
+        end=None,
+        start=None,
+        status="pending",
+        project=None,
+        description="Test task",
+    )
+    fields.update(kwargs)
+    return TaskRecord(**fields)
+
+
+def test_from_task(tw):  # noqa: F811
+    task = ScheduledTask(
+        backend=tw,
+        description="Test task",
+        scheduled=datetime(2019, 10, 12, 10, 0),
+        estimate="PT1H",
+    )
+    record = TaskRecord.from_task(task)
+
+    assert record.description == "Test task"
+    assert record["description"] == "Test task"
+    assert record.scheduled_start_datetime == task.scheduled_start_datetime
+    assert record.scheduled_end_datetime == task.scheduled_end_datetime
+
+
+def test_record_is_read_only():
+    record = make_record()
+    with pytest.raises(AttributeError):
+        record.description = "Changed"
+
+
+def test_scheduled_end():
+    scheduled = datetime(2019, 10, 12, 10, 0).timestamp()
+    record = make_record(scheduled=scheduled, estimate="PT1H30M")
+    assert record.scheduled_end == scheduled + 5400
+
+
+def test_has_scheduled_time():
+    record = make_record(scheduled=datetime(2019, 10, 12, 10, 0).timestamp())
+    assert record.has_scheduled_time is True
+
+    record = make_record(scheduled=datetime(2019, 10, 12, 0, 0).timestamp())
+    assert record.has_scheduled_time is False
+
+
+def test_overdue():
+    future = make_record(scheduled=datetime(2313, 10, 12, 0, 0).timestamp())
+    past = make_record(scheduled=datetime(1970, 10, 12, 0, 0).timestamp())
+
+    assert future.overdue is False
+    assert past.overdue is True
+
+
+def test_status_at():
+    scheduled = datetime(2019, 10, 12, 10, 0).timestamp()
+    record = make_record(scheduled=scheduled, end=scheduled + 3600)
+
+    during = datetime(2019, 10, 12, 10, 30)
+    after = datetime(2019, 10, 12, 11, 30)
+
+    assert record.overdue_at(during) is False
+    assert record.overdue_at(after) is True
+
+
+def test_should_be_active_until_scheduled_end():
+    scheduled = datetime(2019, 10, 12, 10, 0).timestamp()
+    record = make_record(scheduled=scheduled, estimate="PT1H")
+
+    before = datetime(2019, 10, 12, 9, 0)
+    during = datetime(2019, 10, 12, 10, 30)
+    after = datetime(2019, 10, 12, 11, 30)
+
+    assert record.should_be_active_at(before) is False
+    assert record.should_be_active_at(during) is True
+    # The estimate is used even if the next task starts earlier
+    assert record.should_be_active_at(during, scheduled + 600) is True
+    assert record.should_be_active_at(after, scheduled + 3 * 3600) is False
+
+
+def test_should_be_active_until_next_start():
+    scheduled = datetime(2019, 10, 12, 10, 0).timestamp()
+    record = make_record(scheduled=scheduled)
+    during = datetime(2019, 10, 12, 10, 30)
+    after = datetime(2019, 10, 12, 11, 30)
+
+    assert record.should_be_active_at(during) is False
+    assert record.should_be_active_at(during, scheduled + 3600) is True
+    assert record.should_be_active_at(after, scheduled + 3600) is False
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from taskschedule.watcher import DataWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    watcher = DataWatcher(str(tmp_path))
+    yield watcher
+    watcher.close()
+
+
+@pytest.fixture
+def input_fds():
+    read_fd, write_fd = os.pipe()
+    yield read_fd, write_fd
+    os.close(read_fd)
+    os.close(write_fd)
+
+
+class TestDataWatcher:
+    def test_wait_times_out_without_changes(self, watcher, input_fds):
+        read_fd, _ = input_fds
+        assert watcher.wait(read_fd, 0.01) == (False, False)
+
+    def test_wait_reports_input(self, watcher, input_fds):
+        read_fd, write_fd = input_fds
+        os.write(write_fd, b"q")
+        assert watcher.wait(read_fd, 1) == (True, False)
+
+    @pytest.mark.parametrize("filename", ["pending.data", "taskchampion.sqlite3-wal"])
+    def test_wait_reports_data_changes(self, watcher, input_fds, tmp_path, filename):
+        read_fd, _ = input_fds
+        (tmp_path / filename).write_text("changed")
+        assert watcher.wait(read_fd, 1) == (False, True)
+
+    def test_wait_ignores_other_files(self, watcher, input_fds, tmp_path):
+        read_fd, _ = input_fds
+        (tmp_path / "taskchampion.sqlite3-shm").write_text("changed")
+        assert watcher.wait(read_fd, 0.01) == (False, False)
+
+    def test_poll_fallback_detects_changes(self, tmp_path):
+        watcher = DataWatcher(str(tmp_path))
+        watcher.close()
+
+        assert watcher.poll() is False
+        (tmp_path / "pending.data").write_text("changed")
+        assert watcher.poll() is True